@@ -2,8 +2,40 @@
 
 This module defines a custom reasoning and action agent graph.
 It invokes tools in a simple loop.
+
+The graph is built on first access to ``react_agent.graph``, so importing the
+package, or any of its lighter modules, does not import LangGraph or the model
+provider packages.
 """
 
-from react_agent.graph import graph
+import sys
+import types
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
+
+    graph: CompiledStateGraph[Any, Any, Any, Any]
 
 __all__ = ["graph"]
+
+
+class _Package(types.ModuleType):
+    @property
+    def graph(self) -> Any:
+        if "_graph" in self.__dict__:
+            return self.__dict__["_graph"]
+        from react_agent.graph import get_graph
+
+        return get_graph()
+
+    @graph.setter
+    def graph(self, value: Any) -> None:
+        # Importing the ``react_agent.graph`` submodule binds it here; the
+        # package attribute stays the compiled graph. Anything else assigned,
+        # such as a graph patched in by a test, replaces it.
+        if not isinstance(value, types.ModuleType):
+            self.__dict__["_graph"] = value
+
+
+sys.modules[__name__].__class__ = _Package
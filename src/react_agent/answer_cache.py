@@ -0,0 +1,171 @@
+"""An in-process cache of final answers to repeated questions.
+
+Users often ask the same question about a workspace in slightly different
+words. ``AnswerCache`` keeps the final answer of each run under its
+normalized question and a scope, which identifies everything else the answer
+depends on: the workspace fingerprint, the model and the system prompt. A
+later question in the same scope is answered from the cache when it
+
+- normalizes to the same text (an exact hit), or
+- has an embedding whose cosine similarity to a cached question is at least
+  the threshold (a similar hit).
+
+Embeddings default to the local ``HashingEmbeddings``, which need no model or
+network call, so a lookup takes well under a millisecond. Entries expire after
+their TTL, and the least recently used entries are evicted beyond
+``max_entries``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+    from react_agent.vectors import VectorIndex
+
+_SPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?？!！.。,，;；:：~～ "
+
+
+def normalize_question(question: str) -> str:
+    """Return ``question`` with width, case, spacing and trailing punctuation normalized."""
+    text = unicodedata.normalize("NFKC", question).lower()
+    return _SPACE.sub(" ", text).strip().rstrip(_TRAILING_PUNCTUATION)
+
+
+def answer_scope(*parts: str) -> str:
+    """Return a short digest identifying what answers depend on besides the question."""
+    return hashlib.blake2b("\0".join(parts).encode(), digest_size=16).hexdigest()
+
+
+@dataclass
+class CachedAnswer:
+    """A cached answer and how it was found."""
+
+    answer: str
+    question: str
+    """The cached question the answer was given for."""
+    match: Literal["exact", "similar"]
+    similarity: float
+    expires: float
+
+
+class AnswerCache:
+    """Answers keyed by scope and normalized question, with similarity lookup."""
+
+    def __init__(self, embeddings: Embeddings | None = None, max_entries: int = 1024) -> None:
+        """Initialize an empty cache.
+
+        Args:
+            embeddings: Embeds questions for similarity lookup. Defaults to
+                ``HashingEmbeddings``.
+            max_entries: Number of answers kept; the least recently used are
+                evicted first.
+        """
+        self.max_entries = max_entries
+        self._embeddings = embeddings
+        self._entries: OrderedDict[tuple[str, str], CachedAnswer] = OrderedDict()
+        self._indexes: dict[str, VectorIndex] = {}
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(["exact_hits", "similar_hits", "misses", "stores", "evictions"], 0)
+
+    def _embed(self, text: str) -> list[float]:
+        if self._embeddings is None:
+            from react_agent.vectors import HashingEmbeddings
+
+            self._embeddings = HashingEmbeddings()
+        return self._embeddings.embed_query(text)
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        del self._entries[key]
+        index = self._indexes.get(key[0])
+        if index is not None:
+            index.remove(key[1])
+            if not len(index):
+                del self._indexes[key[0]]
+
+    def get(self, question: str, scope: str, threshold: float = 1.0) -> CachedAnswer | None:
+        """Return the cached answer for ``question`` in ``scope``, if any.
+
+        Args:
+            question: The user's question.
+            scope: Digest from ``answer_scope``.
+            threshold: Minimum cosine similarity of a similar hit. ``1.0``
+                only allows exact hits.
+        """
+        normalized = normalize_question(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((scope, normalized))
+            if entry is not None and entry.expires <= now:
+                self._remove((scope, normalized))
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end((scope, normalized))
+                self._stats["exact_hits"] += 1
+                return CachedAnswer(entry.answer, entry.question, "exact", 1.0, entry.expires)
+            index = self._indexes.get(scope) if threshold < 1.0 else None
+        if index is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        vector = self._embed(normalized)
+        with self._lock:
+            index = self._indexes.get(scope)
+            for cached, similarity in index.search(vector, 4) if index is not None else []:
+                key = (scope, str(cached))
+                entry = self._entries.get(key)
+                if entry is None or similarity < threshold:
+                    break
+                if entry.expires <= now:
+                    self._remove(key)
+                    continue
+                self._entries.move_to_end(key)
+                self._stats["similar_hits"] += 1
+                return CachedAnswer(entry.answer, entry.question, "similar", similarity, entry.expires)
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, question: str, scope: str, answer: str, ttl: float = 3600) -> None:
+        """Cache ``answer`` to ``question`` in ``scope`` for ``ttl`` seconds."""
+        normalized = normalize_question(question)
+        vector = self._embed(normalized)
+        with self._lock:
+            key = (scope, normalized)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = CachedAnswer(answer, question, "exact", 1.0, time.time() + ttl)
+            index = self._indexes.get(scope)
+            if index is None:
+                from react_agent.vectors import VectorIndex
+
+                index = self._indexes[scope] = VectorIndex(len(vector))
+            index.add(normalized, vector)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def __len__(self) -> int:
+        """Return the number of cached answers, including expired ones not yet removed."""
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Remove every cached answer."""
+        with self._lock:
+            self._entries.clear()
+            self._indexes.clear()
+
+    def metrics(self) -> dict[str, Any]:
+        """Return hit, miss, store and eviction counts and the number of entries."""
+        with self._lock:
+            return {**self._stats, "entries": len(self._entries)}
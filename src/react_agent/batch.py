@@ -0,0 +1,341 @@
+"""Run many queries through the ReAct graph concurrently.
+
+Reads queries from a JSONL file, runs each through ``react_agent.graph`` with
+at most ``--concurrency`` runs in flight, and appends one JSON line per query
+to the output file as soon as it finishes::
+
+    python -m react_agent.batch queries.jsonl results.jsonl --concurrency 8
+
+Each input line is an object with a ``query`` and optionally an ``id`` and any
+``Context`` field, such as ``workspace_path`` or ``model``, that overrides the
+defaults for that query. Queries without an ``id`` are identified by a hash of
+their line. Other fields are ignored.
+
+The output file is also the checkpoint: rerunning the same command skips every
+query that already has a result in it, so an interrupted batch resumes where
+it stopped. Failed queries are written with an ``error`` and are retried on the
+next run when ``--retry-errors`` is given.
+
+All runs share one process, so they share the chat model clients and their
+connection pools, and each workspace is indexed once per model rather than
+once per query (see ``Context.share_workspace_index``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sys
+import time
+from collections.abc import AsyncIterator, Iterable, Iterator, Sequence
+from dataclasses import dataclass, fields
+from pathlib import Path
+from typing import IO, Any
+
+from langchain_core.runnables import Runnable
+
+from react_agent.context import Context
+
+logger = logging.getLogger(__name__)
+
+_CONTEXT_FIELDS = frozenset(f.name for f in fields(Context) if f.init)
+
+
+def read_queries(path: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield the queries of a JSONL file, each with an ``id``.
+
+    Blank lines are skipped. A line that is not a JSON object with a ``query``
+    string is yielded with an ``error`` instead, so it is reported in the
+    output rather than stopping the batch.
+    """
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                record = {"error": f"Invalid JSON on line {number}: {e}"}
+            if not isinstance(record, dict):
+                record = {"error": f"Line {number} is not a JSON object"}
+            elif "error" not in record and not isinstance(record.get("query"), str):
+                record = {**record, "error": f"Line {number} has no 'query' string"}
+            if record.get("id") is None:
+                record["id"] = hashlib.sha256(line.encode()).hexdigest()[:16]
+            record["id"] = str(record["id"])
+            yield record
+
+
+def completed_ids(path: str | Path, *, include_errors: bool = True) -> set[str]:
+    """Return the ids that already have a result in an output file.
+
+    Args:
+        path: Output JSONL file. A missing file has no results.
+        include_errors: Count failed queries as completed.
+    """
+    done: set[str] = set()
+    try:
+        f = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return done
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short by an interrupted run.
+                continue
+            if isinstance(record, dict) and "id" in record:
+                if include_errors or "error" not in record:
+                    done.add(str(record["id"]))
+    return done
+
+
+def _open_for_append(path: Path) -> IO[str]:
+    # Drop a partial last line left by an interrupted run, so that the next
+    # result does not get appended to it.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    with open(path, "r+b") as f:
+        end = position = f.seek(0, 2)
+        while position > 0:
+            start = max(0, position - 65536)
+            f.seek(start)
+            chunk = f.read(position - start)
+            if position == end and chunk.endswith(b"\n"):
+                break
+            cut = chunk.rfind(b"\n")
+            if cut >= 0:
+                f.truncate(start + cut + 1)
+                break
+            position = start
+        else:
+            f.truncate(0)
+    return open(path, "a", encoding="utf-8")
+
+
+@dataclass
+class BatchSummary:
+    """Counts for one batch run."""
+
+    total: int = 0
+    skipped: int = 0
+    """Queries that already had a result in the output file."""
+    succeeded: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+class BatchRunner:
+    """Run queries through a graph with bounded concurrency."""
+
+    def __init__(
+        self,
+        graph: Runnable[Any, Any] | None = None,
+        *,
+        concurrency: int = 8,
+        timeout: float | None = None,
+        recursion_limit: int = 50,
+        context_defaults: dict[str, Any] | None = None,
+    ) -> None:
+        """Initialize the runner.
+
+        Args:
+            graph: Graph to run. Defaults to the shared ``react_agent.graph``.
+            concurrency: Maximum number of queries running at once.
+            timeout: Seconds after which a query is abandoned. ``None`` waits
+                indefinitely.
+            recursion_limit: Graph step limit for each query.
+            context_defaults: ``Context`` fields applied to every query, under
+                the fields given in the query itself.
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        unknown = set(context_defaults or {}) - _CONTEXT_FIELDS
+        if unknown:
+            raise ValueError(f"Unknown Context fields: {sorted(unknown)}")
+        self._graph = graph
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.recursion_limit = recursion_limit
+        self.context_defaults = {"share_workspace_index": True, **(context_defaults or {})}
+
+    @property
+    def graph(self) -> Runnable[Any, Any]:
+        """Return the graph queries are run through."""
+        if self._graph is None:
+            from react_agent.graph import get_graph
+
+            self._graph = get_graph()
+        return self._graph
+
+    def context_for(self, record: dict[str, Any]) -> Context:
+        """Return the ``Context`` a query runs with."""
+        overrides = {k: v for k, v in record.items() if k in _CONTEXT_FIELDS}
+        return Context(**{**self.context_defaults, **overrides})
+
+    async def run_one(self, record: dict[str, Any]) -> dict[str, Any]:
+        """Run one query and return its result record."""
+        result: dict[str, Any] = {"id": record["id"], "query": record.get("query")}
+        if "error" in record:
+            return {**result, "error": record["error"]}
+        start = time.perf_counter()
+        try:
+            state = await asyncio.wait_for(
+                self.graph.ainvoke(
+                    {"messages": [("user", record["query"])]},
+                    {"recursion_limit": self.recursion_limit},
+                    context=self.context_for(record),
+                ),
+                self.timeout,
+            )
+        except TimeoutError:
+            return {**result, "error": f"Timed out after {self.timeout}s"}
+        except Exception as e:
+            return {**result, "error": f"{type(e).__name__}: {e}"}
+        messages = state.get("messages") or []
+        return {
+            **result,
+            "answer": messages[-1].text if messages else "",
+            "steps": len(messages),
+            "token_count": state.get("token_count"),
+            "seconds": round(time.perf_counter() - start, 2),
+        }
+
+    async def stream(self, records: Iterable[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+        """Run queries and yield each result as soon as it finishes.
+
+        Records are pulled from ``records`` only as workers free up, so a large
+        input is never held in memory at once.
+        """
+        queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(self.concurrency)
+        results: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+
+        failures: list[Exception] = []
+
+        async def feed() -> None:
+            try:
+                for record in records:
+                    await queue.put(record)
+            except Exception as e:
+                # Let the workers finish what they have, then re-raise.
+                failures.append(e)
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work() -> None:
+            while (record := await queue.get()) is not None:
+                await results.put(await self.run_one(record))
+            await results.put(None)
+
+        tasks = [asyncio.create_task(feed())]
+        tasks += [asyncio.create_task(work()) for _ in range(self.concurrency)]
+        try:
+            running = self.concurrency
+            while running:
+                result = await results.get()
+                if result is None:
+                    running -= 1
+                else:
+                    yield result
+            if failures:
+                raise failures[0]
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def arun(
+        self,
+        records: Iterable[dict[str, Any]],
+        output: str | Path,
+        *,
+        resume: bool = True,
+        retry_errors: bool = False,
+    ) -> BatchSummary:
+        """Run queries and append their results to ``output`` as they finish.
+
+        Args:
+            records: Queries, as yielded by ``read_queries``.
+            output: JSONL file results are appended to.
+            resume: Skip queries that already have a result in ``output``.
+                Otherwise ``output`` is overwritten.
+            retry_errors: When resuming, rerun queries whose result is an error.
+        """
+        output = Path(output)
+        if not resume:
+            output.unlink(missing_ok=True)
+        done = completed_ids(output, include_errors=not retry_errors) if resume else set()
+        summary = BatchSummary()
+        start = time.perf_counter()
+
+        def pending() -> Iterator[dict[str, Any]]:
+            seen: set[str] = set()
+            for record in records:
+                summary.total += 1
+                if record["id"] in done or record["id"] in seen:
+                    summary.skipped += 1
+                    continue
+                seen.add(record["id"])
+                yield record
+
+        with _open_for_append(output) as f:
+            async for result in self.stream(pending()):
+                f.write(json.dumps(result, ensure_ascii=False, default=str) + "\n")
+                f.flush()
+                if "error" in result:
+                    summary.failed += 1
+                    logger.warning("Query %s failed: %s", result["id"], result["error"])
+                else:
+                    summary.succeeded += 1
+                finished = summary.succeeded + summary.failed
+                if finished % 50 == 0:
+                    logger.info("%d queries finished, %d failed", finished, summary.failed)
+        summary.seconds = round(time.perf_counter() - start, 2)
+        return summary
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    """Run the batch command line."""
+    parser = argparse.ArgumentParser(prog="python -m react_agent.batch", description=__doc__.split("\n\n")[0])
+    parser.add_argument("input", type=Path, help="JSONL file of queries")
+    parser.add_argument("output", type=Path, help="JSONL file results are appended to")
+    parser.add_argument("-c", "--concurrency", type=int, default=8, help="queries run at once (default: 8)")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per query")
+    parser.add_argument("--recursion-limit", type=int, default=50, help="graph steps allowed per query")
+    parser.add_argument("--workspace-path", help="default workspace for queries that do not set one")
+    parser.add_argument("--model", help="default model for queries that do not set one")
+    parser.add_argument("--no-resume", action="store_true", help="overwrite the output instead of resuming")
+    parser.add_argument("--retry-errors", action="store_true", help="rerun queries whose result is an error")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    defaults = {
+        name: value
+        for name, value in [("workspace_path", args.workspace_path), ("model", args.model)]
+        if value is not None
+    }
+    runner = BatchRunner(
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        recursion_limit=args.recursion_limit,
+        context_defaults=defaults,
+    )
+    summary = asyncio.run(
+        runner.arun(
+            read_queries(args.input),
+            args.output,
+            resume=not args.no_resume,
+            retry_errors=args.retry_errors,
+        )
+    )
+    sys.stdout.write(json.dumps(vars(summary)) + "\n")
+    return 1 if summary.failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
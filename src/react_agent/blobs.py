@@ -0,0 +1,265 @@
+"""A content-addressed blob store with reference counting and optional compression.
+
+``BlobStore`` keeps each distinct file content once, under its SHA-256 digest.
+It has two kinds of objects:
+
+- Plain blobs, which files are hard-linked to. Identical files then share one
+  inode, so they take the space of one copy and a reader that caches by inode
+  hits the same entry for all of them. A plain blob's reference count is its
+  link count minus the store's own link, which the filesystem keeps correct
+  whoever unlinks a file.
+- Archived blobs, which are compressed with gzip or zstd and referenced by key
+  from ``archived.json`` instead of by a file. They hold content that no longer
+  needs to be on disk as a plain file, such as old offloaded tool results.
+
+Files linked to a blob share their inode, so they must be replaced, never
+rewritten in place: ``link`` and ``detach`` do that, and plain blobs are made
+read-only so that an in-place write fails instead of changing every copy.
+Blobs whose last file was removed by another process are cleaned up by ``gc``.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from typing import Literal
+
+logger = logging.getLogger(__name__)
+
+Compression = Literal["gzip", "zstd"]
+
+
+def _codec(compression: Compression) -> tuple[Callable[[bytes], bytes], Callable[[bytes], bytes], str]:
+    if compression == "gzip":
+        return (lambda data: gzip.compress(data, mtime=0)), gzip.decompress, ".gz"
+    try:
+        import zstandard  # type: ignore[import-not-found, unused-ignore]
+    except ImportError as e:
+        raise ImportError(
+            "zstd compression requires the 'zstandard' package: pip install 'react-agent[zstd]'"
+        ) from e
+    return zstandard.ZstdCompressor().compress, zstandard.ZstdDecompressor().decompress, ".zst"
+
+
+def _replace_atomically(target: Path, write: Callable[[Path], object]) -> None:
+    tmp = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, target)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+class BlobStore:
+    """Content-addressed storage for files written by an agent."""
+
+    def __init__(self, directory: str | Path, compression: Compression | None = None) -> None:
+        """Open or create a store.
+
+        Args:
+            directory: Where blobs are kept. Hard links only work within one
+                filesystem, so this should be on the same filesystem as the files
+                linked to it; otherwise files are copied and not deduplicated.
+            compression: Codec for archived blobs. ``None`` disables archiving.
+        """
+        self.directory = Path(directory)
+        self.compression = compression
+        self._compress, self._decompress, self._suffix = (
+            _codec(compression) if compression else (bytes, bytes, "")
+        )
+        self._objects = self.directory / "objects"
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._archive_file = self.directory / "archived.json"
+        self._lock = threading.RLock()
+        self._archived: dict[str, str] = (
+            json.loads(self._archive_file.read_text()) if self._archive_file.exists() else {}
+        )
+        self._archived_refs = Counter(self._archived.values())
+        self._inodes: dict[tuple[int, int], Path] = {}
+        for blob in self._objects.glob("*/*"):
+            if "." not in blob.name:
+                self._remember(blob)
+        self._can_link = True
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        """Return the digest a content is stored under."""
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, digest: str, suffix: str = "") -> Path:
+        return self._objects / digest[:2] / (digest + suffix)
+
+    # Plain blobs
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` as a plain blob unless it is already stored, and return its digest."""
+        digest = self.digest(data)
+        path = self._path(digest)
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                _replace_atomically(path, lambda tmp: tmp.write_bytes(data))
+                path.chmod(0o444)
+                self._remember(path)
+        return digest
+
+    def link(self, digest: str, target: Path) -> None:
+        """Atomically replace ``target`` with a link to a plain blob."""
+        blob = self._path(digest)
+        with self._lock:
+            old = self._stat(target)
+            if old is not None and (old.st_dev, old.st_ino) in self._inodes:
+                if self._inodes[old.st_dev, old.st_ino] == blob:
+                    return
+            if self._can_link:
+                try:
+                    _replace_atomically(target, lambda tmp: os.link(blob, tmp))
+                except OSError as e:
+                    logger.warning("Cannot hard-link into %s (%s); copying instead", self.directory, e)
+                    self._can_link = False
+            if not self._can_link:
+                _replace_atomically(target, lambda tmp: shutil.copyfile(blob, tmp))
+            self._release(old)
+
+    def unlink(self, target: Path) -> None:
+        """Remove ``target``, and its blob if nothing else references it."""
+        with self._lock:
+            old = self._stat(target)
+            target.unlink(missing_ok=True)
+            self._release(old)
+
+    def release(self, old: os.stat_result) -> None:
+        """Remove the blob of a file that was just removed from ``old``'s inode, if it is unreferenced."""
+        with self._lock:
+            self._release(old)
+
+    def detach(self, target: Path) -> None:
+        """Give ``target`` its own inode so it can be rewritten in place."""
+        with self._lock:
+            old = self._stat(target)
+            if old is None or old.st_nlink < 2:
+                return
+            _replace_atomically(target, lambda tmp: shutil.copyfile(target, tmp))
+            target.chmod(0o644)
+            self._release(old)
+
+    def _remember(self, blob: Path) -> None:
+        stat = blob.stat()
+        self._inodes[stat.st_dev, stat.st_ino] = blob
+
+    @staticmethod
+    def _stat(path: Path) -> os.stat_result | None:
+        try:
+            return path.lstat()
+        except OSError:
+            return None
+
+    def _release(self, old: os.stat_result | None) -> None:
+        # After one of its files went away, an inode with a single link left
+        # is only referenced by the store if it is one of its blobs.
+        if old is None or old.st_nlink != 2:
+            return
+        blob = self._inodes.pop((old.st_dev, old.st_ino), None)
+        if blob is not None:
+            blob.unlink(missing_ok=True)
+
+    def refcount(self, digest: str) -> int:
+        """Return the number of files and archive keys referencing ``digest``."""
+        stat = self._stat(self._path(digest))
+        linked = stat.st_nlink - 1 if stat is not None else 0
+        return linked + self._archived_refs[digest]
+
+    # Archived blobs
+
+    def archive(self, key: str, data: bytes) -> str:
+        """Keep a compressed copy of ``data`` under ``key`` and return its digest."""
+        if self.compression is None:
+            raise ValueError("Archiving requires a compression codec")
+        digest = self.digest(data)
+        path = self._path(digest, self._suffix)
+        with self._lock:
+            if not path.exists():
+                path.parent.mkdir(exist_ok=True)
+                compressed = self._compress(data)
+                _replace_atomically(path, lambda tmp: tmp.write_bytes(compressed))
+            if self._archived.get(key) != digest:
+                self._drop(key)
+                self._archived[key] = digest
+                self._archived_refs[digest] += 1
+                self._save()
+        return digest
+
+    def archived_digest(self, key: str) -> str | None:
+        """Return the digest archived under ``key``, if any."""
+        return self._archived.get(key)
+
+    def archived_keys(self) -> list[str]:
+        """Return the keys that have archived content."""
+        return list(self._archived)
+
+    def restore(self, key: str) -> bytes | None:
+        """Return the content archived under ``key``, if any."""
+        digest = self._archived.get(key)
+        if digest is None:
+            return None
+        try:
+            return self._decompress(self._path(digest, self._suffix).read_bytes())
+        except OSError:
+            return None
+
+    def forget(self, key: str) -> None:
+        """Drop the archived content under ``key``, if any."""
+        with self._lock:
+            if self._drop(key):
+                self._save()
+
+    def _drop(self, key: str) -> bool:
+        digest = self._archived.pop(key, None)
+        if digest is None:
+            return False
+        self._archived_refs[digest] -= 1
+        if self._archived_refs[digest] <= 0:
+            del self._archived_refs[digest]
+            self._path(digest, self._suffix).unlink(missing_ok=True)
+        return True
+
+    def _save(self) -> None:
+        text = json.dumps(self._archived, indent=0, sort_keys=True)
+        _replace_atomically(self._archive_file, lambda tmp: tmp.write_text(text))
+
+    # Maintenance
+
+    def gc(self) -> int:
+        """Remove blobs nothing references and return how many were removed."""
+        removed = 0
+        with self._lock:
+            for blob in self._objects.glob("*/*"):
+                if blob.name.startswith("."):
+                    continue
+                digest, _, suffix = blob.name.partition(".")
+                referenced = self._archived_refs[digest] > 0 if suffix else blob.stat().st_nlink > 1
+                if not referenced:
+                    stat = blob.stat()
+                    self._inodes.pop((stat.st_dev, stat.st_ino), None)
+                    blob.unlink()
+                    removed += 1
+        return removed
+
+    def stats(self) -> dict[str, int]:
+        """Return the number of blobs and the bytes they occupy on disk."""
+        blobs = [p for p in self._objects.glob("*/*") if not p.name.startswith(".")]
+        return {
+            "blobs": len(blobs),
+            "archived": len(self._archived),
+            "bytes": sum(p.stat().st_size for p in blobs),
+        }
@@ -7,6 +7,7 @@ from dataclasses import dataclass, field, fields
 from typing import Annotated
 
 from . import prompts
+from .utils import load_env
 
 
 @dataclass(kw_only=True)
@@ -42,11 +43,148 @@ class Context:
             "description": "The path to the workspace directory for document analysis."
         },
     )
+
+    workspace_ignore: str = field(
+        default="",
+        metadata={
+            "description": "Comma-separated gitignore-style patterns of workspace paths "
+            "to skip, applied after the defaults (hidden entries, images/ and binary "
+            "assets) and the workspace's .agentignore. '!images/' re-includes a default."
+        },
+    )
+
+    workspace_extensions: str = field(
+        default=".md",
+        metadata={
+            "description": "Comma-separated extensions of the workspace files that are "
+            "listed and indexed. Empty allows every extension."
+        },
+    )
+
+    workspace_max_file_size: int = field(
+        default=0,
+        metadata={
+            "description": "Workspace files larger than this many bytes are not listed "
+            "or indexed. 0 allows any size."
+        },
+    )
+
+    watch_workspace: bool = field(
+        default=False,
+        metadata={
+            "description": "Keep an in-memory listing of the workspace, updated in the "
+            "background as files change, and serve the workspace index and tools from it "
+            "instead of walking the directory tree on every call."
+        },
+    )
+
+    retrieval_embeddings: str = field(
+        default="hashing",
+        metadata={
+            "description": "Embeddings used by the search_workspace tool: 'hashing' for "
+            "local feature-hashed embeddings that need no model, or a 'provider:model' "
+            "string such as 'openai:text-embedding-3-small'."
+        },
+    )
+
+    share_workspace_index: bool = field(
+        default=False,
+        metadata={
+            "description": "Reuse the workspace index built by an earlier run in this "
+            "process for the same model, as long as the workspace has not changed. "
+            "Runs in flight at the same time always share one index."
+        },
+    )
+
+    model_requests_per_minute: int = field(
+        default=0,
+        metadata={
+            "description": "Client-side limit on chat model requests per minute, shared "
+            "by all runs in the process. 0 disables it."
+        },
+    )
+
+    model_tokens_per_minute: int = field(
+        default=0,
+        metadata={
+            "description": "Client-side limit on prompt tokens sent to the chat model per "
+            "minute, shared by all runs in the process. 0 disables it."
+        },
+    )
+
+    model_max_retries: int = field(
+        default=2,
+        metadata={
+            "description": "Retries of a chat model call after a transient error such as "
+            "a 429, a 5xx or a timeout, with jittered exponential backoff."
+        },
+    )
+
+    model_hedging: bool = field(
+        default=False,
+        metadata={
+            "description": "Send a duplicate chat model request when a call takes longer "
+            "than the observed p95 latency, and use whichever answers first."
+        },
+    )
+
+    answer_cache: bool = field(
+        default=False,
+        metadata={
+            "description": "Answer a first question from the in-process answer cache when "
+            "it was already answered for the same workspace contents, model and system "
+            "prompt, and cache new final answers."
+        },
+    )
+
+    answer_cache_threshold: float = field(
+        default=0.9,
+        metadata={
+            "description": "Minimum cosine similarity between question embeddings for a "
+            "cached answer to be reused. 1.0 only reuses answers to the same question "
+            "after normalization."
+        },
+    )
+
+    answer_cache_ttl: int = field(
+        default=3600,
+        metadata={
+            "description": "Seconds a cached answer stays valid."
+        },
+    )
+
+    trace: bool = field(
+        default=False,
+        metadata={
+            "description": "Record latency spans for nodes, tools and model calls."
+        },
+    )
+
+    trace_file: str = field(
+        default="traces/react_agent.jsonl",
+        metadata={
+            "description": "JSONL file that trace spans are appended to. "
+            "Empty keeps the in-process histograms only."
+        },
+    )
+
     def __post_init__(self) -> None:
         """Fetch env vars for attributes that were not passed as args."""
+        load_env()
         for f in fields(self):
             if not f.init:
                 continue
 
             if getattr(self, f.name) == f.default:
-                setattr(self, f.name, os.environ.get(f.name.upper(), f.default))
+                value = os.environ.get(f.name.upper())
+                if value is None:
+                    continue
+                # Environment values are strings; parse them like the default.
+                if isinstance(f.default, bool):
+                    setattr(self, f.name, value.strip().lower() in ("1", "true", "yes", "on"))
+                elif isinstance(f.default, int):
+                    setattr(self, f.name, int(value))
+                elif isinstance(f.default, float):
+                    setattr(self, f.name, float(value))
+                else:
+                    setattr(self, f.name, value)
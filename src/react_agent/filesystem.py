@@ -0,0 +1,498 @@
+"""A ``FilesystemBackend`` for deep agents that caches reads and bounds disk usage.
+
+``CachedFilesystemBackend`` is a drop-in replacement for deepagents'
+``FilesystemBackend``:
+
+- Text files are cached in an LRU keyed by path and validated against the
+  file's mtime and size, so paging through a document with ``read_file``
+  reads it from disk once.
+- Files too large to cache are read by line range. A sparse index of line
+  offsets is built on the first read, and later reads seek straight to the
+  requested window.
+- Writes and edits are buffered for ``write_delay`` seconds, so a file that is
+  rewritten several times in a row reaches the disk once. Buffered content is
+  visible to reads and is flushed before any operation that scans the disk.
+  A write is only buffered if its target could be written now; a flush that
+  fails anyway is logged, and the next read or edit of the file reports it.
+- Files offloaded to ``/large_tool_results/`` are capped by count and total
+  size; the oldest are deleted first.
+
+With a ``BlobStore``, written files are hard-linked to content-addressed blobs
+so identical files are stored once, and the cache is keyed by inode so reading
+any of them after the first is a hit. Offloaded results evicted by the
+retention caps are then archived compressed instead of deleted; they stay
+readable by path but no longer appear in ``ls``, ``glob`` or ``grep``.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from deepagents.backends.filesystem import FilesystemBackend
+from deepagents.backends.protocol import (
+    DeleteResult,
+    EditResult,
+    FileData,
+    FileDownloadResponse,
+    FileUploadResponse,
+    GlobResult,
+    GrepResult,
+    LsResult,
+    ReadResult,
+    WriteResult,
+)
+from deepagents.backends.utils import (
+    _get_backend_read_file_type,
+    normalize_read_bounds,
+    perform_string_replacement,
+    slice_read_response,
+)
+
+from react_agent.blobs import BlobStore
+
+logger = logging.getLogger(__name__)
+
+LARGE_TOOL_RESULTS = "/large_tool_results"
+_INDEX_STRIDE = 1024
+"""Lines between two entries of the sparse line index of a large file."""
+
+
+@dataclass
+class _LineIndex:
+    mtime_ns: int
+    size: int
+    total_lines: int
+    offsets: list[int]
+    """Byte offset of line ``i * _INDEX_STRIDE``."""
+
+
+def _build_line_index(path: Path, mtime_ns: int, size: int) -> _LineIndex:
+    offsets = [0]
+    lines = 0
+    position = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            start = 0
+            while (i := chunk.find(b"\n", start)) != -1:
+                lines += 1
+                if lines % _INDEX_STRIDE == 0:
+                    offsets.append(position + i + 1)
+                start = i + 1
+            position += len(chunk)
+            last = chunk[-1:]
+    if last != b"\n":
+        lines += 1
+    return _LineIndex(mtime_ns, size, lines, offsets)
+
+
+class CachedFilesystemBackend(FilesystemBackend):
+    """``FilesystemBackend`` with a read cache, ranged reads, coalesced writes and retention."""
+
+    def __init__(
+        self,
+        root_dir: str | Path | None = None,
+        virtual_mode: bool = True,
+        max_file_size_mb: int = 10,
+        *,
+        cache_bytes: int = 64 * 1024 * 1024,
+        max_cached_file_bytes: int = 4 * 1024 * 1024,
+        write_delay: float = 0.5,
+        max_large_results: int = 100,
+        max_large_results_bytes: int = 50 * 1024 * 1024,
+        blob_store: BlobStore | None = None,
+    ) -> None:
+        """Initialize the backend.
+
+        Args:
+            root_dir: As for ``FilesystemBackend``.
+            virtual_mode: As for ``FilesystemBackend``.
+            max_file_size_mb: As for ``FilesystemBackend``.
+            cache_bytes: Total size of cached file contents, in characters.
+            max_cached_file_bytes: Files larger than this are read by line range
+                instead of being cached whole.
+            write_delay: Seconds a write is buffered before it is flushed. ``0``
+                writes through.
+            max_large_results: Maximum number of files kept in ``/large_tool_results``.
+            max_large_results_bytes: Maximum total size of ``/large_tool_results``.
+            blob_store: Store written files as deduplicated blobs, and archive
+                evicted results if it has a compression codec.
+        """
+        super().__init__(root_dir=root_dir, virtual_mode=virtual_mode, max_file_size_mb=max_file_size_mb)
+        self.cache_bytes = cache_bytes
+        self.max_cached_file_bytes = max_cached_file_bytes
+        self.write_delay = write_delay
+        self.max_large_results = max_large_results
+        self.max_large_results_bytes = max_large_results_bytes
+        self.blob_store = blob_store
+        self._lock = threading.RLock()
+        # Keyed by inode, so that files linked to the same blob share an entry,
+        # or by digest for archived content.
+        self._cache: OrderedDict[tuple[int, int] | str, tuple[int, int, str]] = OrderedDict()
+        self._cached_size = 0
+        self._line_indexes: OrderedDict[Path, _LineIndex] = OrderedDict()
+        self._dirty: dict[Path, tuple[str, str]] = {}
+        self._failed: dict[Path, str] = {}
+        """Errors of buffered writes that failed when flushed, by path."""
+        self._timer: threading.Timer | None = None
+        self._large_results: dict[Path, int] | None = None
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    # Read cache
+
+    def _remember(self, key: tuple[int, int] | str, mtime_ns: int, size: int, content: str) -> None:
+        self._uncache(key)
+        if len(content) > self.cache_bytes:
+            return
+        self._cache[key] = (mtime_ns, size, content)
+        self._cached_size += len(content)
+        while self._cached_size > self.cache_bytes:
+            _, (_, _, evicted) = self._cache.popitem(last=False)
+            self._cached_size -= len(evicted)
+
+    def _uncache(self, key: tuple[int, int] | str) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._cached_size -= len(entry[2])
+
+    def _forget(self, path: Path) -> None:
+        try:
+            stat = path.stat()
+        except OSError:
+            pass
+        else:
+            self._uncache((stat.st_dev, stat.st_ino))
+        self._line_indexes.pop(path, None)
+
+    def read(self, file_path: str, offset: int = 0, limit: int = 2000) -> ReadResult:
+        """Read a line range, from the cache or write buffer when possible."""
+        try:
+            path = self._resolve_path(file_path)
+        except (OSError, RuntimeError):
+            return super().read(file_path, offset, limit)
+        if _get_backend_read_file_type(file_path) != "text":
+            self.flush()
+            return super().read(file_path, offset, limit)
+        with self._lock:
+            error = self._failed.pop(path, None)
+            if error is not None:
+                return ReadResult(error=error)
+            dirty = self._dirty.get(path)
+            if dirty is not None:
+                return slice_read_response(FileData(content=dirty[1], encoding="utf-8"), offset, limit)
+            try:
+                stat = path.stat()
+            except OSError:
+                return self._read_archived(file_path, path, offset, limit)
+            key = (stat.st_dev, stat.st_ino)
+            cached = self._cache.get(key)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                self._cache.move_to_end(key)
+                return slice_read_response(FileData(content=cached[2], encoding="utf-8"), offset, limit)
+        if stat.st_size > self.max_cached_file_bytes:
+            return self._read_range(file_path, path, stat.st_mtime_ns, stat.st_size, offset, limit)
+        # Read the whole file through the base class, which validates it, then
+        # serve this and later windows from the cached text.
+        whole = super().read(file_path, 0, 1 << 62)
+        if whole.file_data is None or whole.start_line is None:
+            return super().read(file_path, offset, limit) if whole.error is None else whole
+        content = whole.file_data["content"]
+        with self._lock:
+            self._remember(key, stat.st_mtime_ns, stat.st_size, content)
+        return slice_read_response(FileData(content=content, encoding="utf-8"), offset, limit)
+
+    def _read_archived(self, file_path: str, path: Path, offset: int, limit: int) -> ReadResult:
+        store = self.blob_store
+        digest = store.archived_digest(self._to_virtual_path(path)) if store else None
+        if store is None or digest is None:
+            return super().read(file_path, offset, limit)
+        cached = self._cache.get(digest)
+        if cached is not None:
+            self._cache.move_to_end(digest)
+            content = cached[2]
+        else:
+            data = store.restore(self._to_virtual_path(path))
+            if data is None:
+                return super().read(file_path, offset, limit)
+            content = data.decode("utf-8").replace("\r\n", "\n")
+            self._remember(digest, 0, len(data), content)
+        return slice_read_response(FileData(content=content, encoding="utf-8"), offset, limit)
+
+    def _read_range(
+        self, file_path: str, path: Path, mtime_ns: int, size: int, offset: int, limit: int
+    ) -> ReadResult:
+        offset, limit = normalize_read_bounds(offset, limit)
+        if limit == 0:
+            return ReadResult(file_data=FileData(content="", encoding="utf-8"), no_lines_requested=True)
+        with self._lock:
+            index = self._line_indexes.get(path)
+        if index is None or (index.mtime_ns, index.size) != (mtime_ns, size):
+            try:
+                index = _build_line_index(path, mtime_ns, size)
+            except OSError as e:
+                return ReadResult(error=f"Error reading file '{file_path}': {e}")
+            with self._lock:
+                self._line_indexes[path] = index
+                while len(self._line_indexes) > 64:
+                    self._line_indexes.popitem(last=False)
+        if offset >= index.total_lines:
+            return ReadResult(error=f"Line offset {offset} exceeds file length ({index.total_lines} lines)")
+        end = min(offset + limit, index.total_lines)
+        skip = offset % _INDEX_STRIDE
+        lines: list[bytes] = []
+        try:
+            with open(path, "rb") as f:
+                f.seek(index.offsets[offset // _INDEX_STRIDE])
+                for i, line in enumerate(f):
+                    if i >= skip:
+                        lines.append(line)
+                        if len(lines) == end - offset:
+                            break
+            text = b"".join(lines).decode("utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            return ReadResult(error=f"Error reading file '{file_path}': {e}")
+        return ReadResult(
+            file_data=FileData(content=text.replace("\r\n", "\n"), encoding="utf-8"),
+            total_lines=index.total_lines,
+            start_line=offset + 1,
+            end_line=end,
+            next_offset=end if end < index.total_lines else None,
+        )
+
+    # Coalesced writes
+
+    def write(self, file_path: str, content: str) -> WriteResult:
+        """Write a file, buffering it for ``write_delay`` seconds."""
+        if self.write_delay <= 0:
+            return self._write_through(file_path, content)
+        try:
+            path = self._resolve_path(file_path)
+            _check_writable(path)
+        except (OSError, RuntimeError) as e:
+            return WriteResult(error=f"Error writing file '{file_path}': {e}")
+        with self._lock:
+            self._forget(path)
+            self._failed.pop(path, None)
+            self._dirty[path] = (file_path, content)
+            if self._timer is None:
+                self._timer = threading.Timer(self.write_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        return WriteResult(path=file_path)
+
+    def edit(
+        self,
+        file_path: str,
+        old_string: str,
+        new_string: str,
+        replace_all: bool = False,
+    ) -> EditResult:
+        """Edit a file, reading it through the cache and buffering the result."""
+        try:
+            error = self._failed.pop(self._resolve_path(file_path), None)
+        except (OSError, RuntimeError):
+            error = None
+        if error is not None:
+            return EditResult(error=error)
+        current = self.read(file_path, 0, 1 << 62)
+        if current.error is not None or current.file_data is None or current.start_line is None:
+            self.flush()
+            self._detach(file_path)
+            return super().edit(file_path, old_string, new_string, replace_all)
+        old_string = old_string.replace("\r\n", "\n").replace("\r", "\n")
+        new_string = new_string.replace("\r\n", "\n").replace("\r", "\n")
+        result = perform_string_replacement(current.file_data["content"], old_string, new_string, replace_all)
+        if isinstance(result, str):
+            return EditResult(error=result)
+        content, occurrences = result
+        written = self.write(file_path, content)
+        if written.error is not None:
+            return EditResult(error=f"Error editing file '{file_path}': {written.error}")
+        return EditResult(path=file_path, occurrences=int(occurrences))
+
+    def flush(self) -> list[WriteResult]:
+        """Write all buffered files to disk.
+
+        Returns:
+            The results of the writes that failed. Each failure is also logged
+            and reported by the next read or edit of its file.
+        """
+        failed = []
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty, self._dirty = self._dirty, {}
+            for path, (file_path, content) in dirty.items():
+                result = self._write_through(file_path, content)
+                if result.error is not None:
+                    logger.warning("Buffered write failed: %s", result.error)
+                    self._failed[path] = result.error
+                    failed.append(result)
+        return failed
+
+    def _write_through(self, file_path: str, content: str) -> WriteResult:
+        with self._lock:
+            if self.blob_store is None:
+                result = super().write(file_path, content)
+            else:
+                result = self._write_blob(self.blob_store, file_path, content)
+            if result.error is None and (
+                file_path == LARGE_TOOL_RESULTS or file_path.startswith(LARGE_TOOL_RESULTS + "/")
+            ):
+                self._enforce_retention(file_path)
+            return result
+
+    def _write_blob(self, store: BlobStore, file_path: str, content: str) -> WriteResult:
+        try:
+            path = self._resolve_path(file_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.is_symlink():
+                raise OSError(f"{file_path} is a symbolic link")
+            store.link(store.put(content.encode("utf-8")), path)
+            store.forget(self._to_virtual_path(path))
+        except (OSError, RuntimeError, UnicodeEncodeError) as e:
+            return WriteResult(error=f"Error writing file '{file_path}': {e}")
+        return WriteResult(path=file_path)
+
+    # Retention of offloaded tool results
+
+    def _enforce_retention(self, file_path: str) -> None:
+        with self._lock:
+            try:
+                path = self._resolve_path(file_path)
+                size = path.stat().st_size
+            except (OSError, RuntimeError):
+                return
+            if self._large_results is None:
+                directory = self._resolve_path(LARGE_TOOL_RESULTS)
+                entries = [(p.stat().st_mtime_ns, p) for p in directory.iterdir() if p.is_file()]
+                # Oldest first; dicts keep insertion order.
+                self._large_results = {p: p.stat().st_size for _, p in sorted(entries)}
+            self._large_results.pop(path, None)
+            self._large_results[path] = size
+            total = sum(self._large_results.values())
+            while len(self._large_results) > 1 and (
+                len(self._large_results) > self.max_large_results
+                or total > self.max_large_results_bytes
+            ):
+                oldest = next(iter(self._large_results))
+                total -= self._large_results.pop(oldest)
+                self._forget(oldest)
+                try:
+                    self._evict(oldest)
+                except OSError:
+                    pass
+
+    def _evict(self, path: Path) -> None:
+        store = self.blob_store
+        if store is None:
+            path.unlink()
+            return
+        if store.compression is not None:
+            store.archive(self._to_virtual_path(path), path.read_bytes())
+        store.unlink(path)
+
+    def _detach(self, file_path: str) -> None:
+        # The base class writes in place, which must not go through to a blob.
+        if self.blob_store is not None:
+            try:
+                self.blob_store.detach(self._resolve_path(file_path))
+            except (OSError, RuntimeError):
+                pass
+
+    # Everything else sees the disk, so buffered writes go first.
+
+    def ls(self, path: str) -> LsResult:
+        """List a directory after flushing buffered writes."""
+        self.flush()
+        return super().ls(path)
+
+    def grep(self, *args: Any, **kwargs: Any) -> GrepResult:
+        """Search files after flushing buffered writes."""
+        self.flush()
+        return super().grep(*args, **kwargs)
+
+    def glob(self, pattern: str, path: str | None = None) -> GlobResult:
+        """Match files after flushing buffered writes."""
+        self.flush()
+        return super().glob(pattern, path)
+
+    def delete(self, file_path: str) -> DeleteResult:
+        """Delete a path after flushing buffered writes."""
+        self.flush()
+        with self._lock:
+            self._cache.clear()
+            self._cached_size = 0
+            self._line_indexes.clear()
+            self._large_results = None
+            store = self.blob_store
+            if store is None:
+                return super().delete(file_path)
+            try:
+                path = self._resolve_path(file_path)
+                old = path.lstat()
+            except (OSError, RuntimeError):
+                return self._delete_archived(store, file_path)
+            is_dir = path.is_dir() and not path.is_symlink()
+            result = super().delete(file_path)
+            if result.error is None:
+                self._delete_archived(store, file_path)
+                if is_dir:
+                    store.gc()
+                else:
+                    store.release(old)
+            return result
+
+    def _delete_archived(self, store: BlobStore, file_path: str) -> DeleteResult:
+        try:
+            key = self._to_virtual_path(self._resolve_path(file_path))
+        except (OSError, RuntimeError):
+            return super().delete(file_path)
+        keys = [k for k in store.archived_keys() if k == key or k.startswith(key.rstrip("/") + "/")]
+        for k in keys:
+            store.forget(k)
+        return DeleteResult(path=file_path) if keys else super().delete(file_path)
+
+    def upload_files(self, files: list[tuple[str, bytes]]) -> list[FileUploadResponse]:
+        """Upload files after flushing buffered writes."""
+        self.flush()
+        for file_path, _ in files:
+            self._detach(file_path)
+        return super().upload_files(files)
+
+    def download_files(self, paths: list[str]) -> list[FileDownloadResponse]:
+        """Download files after flushing buffered writes."""
+        self.flush()
+        return super().download_files(paths)
+
+
+def _check_writable(path: Path) -> None:
+    """Raise ``OSError`` if ``path`` could not be written now, before buffering a write to it."""
+    if path.is_symlink():
+        raise OSError(f"{path} is a symbolic link")
+    if path.is_dir():
+        raise IsADirectoryError(f"{path} is a directory")
+    # The parent directories are created on write, so check the nearest one that exists.
+    parent = path.parent
+    while not parent.exists():
+        parent = parent.parent
+    if not parent.is_dir():
+        raise NotADirectoryError(f"{parent} is not a directory")
+    if not os.access(parent, os.W_OK | os.X_OK):
+        raise PermissionError(f"{parent} is not writable")
+
+
+def _flush_at_exit(ref: weakref.ref[CachedFilesystemBackend]) -> None:
+    backend = ref()
+    if backend is not None:
+        backend.flush()
+
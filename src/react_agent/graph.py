@@ -3,25 +3,113 @@
 Works with a chat model with tool calling support.
 """
 
+import asyncio
+import functools
 import json
+import os
 from datetime import UTC, datetime
 from pathlib import Path
-from typing import Dict, List, Literal, cast
+from typing import Any, Dict, List, Literal, cast
 
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, SystemMessage
 from langgraph.graph import StateGraph
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import ToolNode
 from langgraph.runtime import Runtime
 
+from react_agent.answer_cache import AnswerCache, answer_scope
 from react_agent.context import Context
+from react_agent.ignore import IgnoreRules, workspace_rules
+from react_agent.ratelimit import ModelCallGuard, get_call_guard
+from react_agent.sections import section_index
 from react_agent.state import InputState, State
+from react_agent.tokens import TokenCounter
 from react_agent.tools import TOOLS
+from react_agent.tracing import span, trace_tool_call, traced_node
 from react_agent.utils import load_chat_model
+from react_agent.workspace import (
+    SingleFlight,
+    WorkspaceModel,
+    watch_workspace,
+    watched_workspace,
+    workspace_fingerprint,
+)
 
+_workspace_reports: SingleFlight[tuple[str, bool]] = SingleFlight()
+"""Workspace index jobs and results by workspace fingerprint and model."""
 
-async def workspace_index(
-    state: State, runtime: Runtime[Context]
-) -> Dict[str, List[AIMessage]]:
+token_counter = TokenCounter()
+"""Shared across runs; per-message counts are cached by message id."""
+
+
+def call_guard(context: Context) -> ModelCallGuard:
+    """Return the shared rate limiter and retry policy for a run's model calls."""
+    return get_call_guard(
+        context.model_requests_per_minute,
+        context.model_tokens_per_minute,
+        context.model_max_retries,
+        context.model_hedging,
+    )
+
+
+answer_cache = AnswerCache()
+"""Shared across runs; used when ``Context.answer_cache`` is on."""
+
+
+def _fingerprint(context: Context) -> str:
+    # With watching on, start the watcher first so that the fingerprint comes
+    # from it rather than from a walk of the directory tree.
+    rules = workspace_rules(context)
+    if context.watch_workspace:
+        watch_workspace(context.workspace_path, rules=rules)
+    return workspace_fingerprint(context.workspace_path, rules=rules)
+
+
+async def _run_fingerprint(state: State, context: Context) -> str:
+    # The fingerprint is computed once per run by lookup_answer; without a
+    # watcher it walks the tree, so it runs in a thread.
+    if state.workspace_fingerprint:
+        return state.workspace_fingerprint
+    return await asyncio.to_thread(_fingerprint, context)
+
+
+def _answer_cache_key(
+    state: State, context: Context, fingerprint: str
+) -> tuple[str, str] | None:
+    # Only a thread's first question is cached: later answers depend on the
+    # conversation before them.
+    questions = [m for m in state.messages if isinstance(m, HumanMessage)]
+    if len(questions) != 1:
+        return None
+    scope = answer_scope(fingerprint, context.model, context.system_prompt)
+    return questions[0].text, scope
+
+
+async def lookup_answer(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
+    """Fingerprint the workspace for this run, and answer from the answer cache if it matches."""
+    fingerprint = await asyncio.to_thread(_fingerprint, runtime.context)
+    update: Dict[str, Any] = {"workspace_fingerprint": fingerprint}
+    if not runtime.context.answer_cache:
+        return update
+    key = _answer_cache_key(state, runtime.context, fingerprint)
+    hit = answer_cache.get(*key, threshold=runtime.context.answer_cache_threshold) if key else None
+    if hit is None:
+        return update
+    cache_info = {"match": hit.match, "similarity": round(hit.similarity, 4), "question": hit.question}
+    update["messages"] = [AIMessage(content=hit.answer, response_metadata={"answer_cache": cache_info})]
+    return update
+
+
+def route_cached_answer(state: State) -> Literal["__end__", "workspace_index"]:
+    """End the run if ``lookup_answer`` answered it, and start indexing otherwise."""
+    last_message = state.messages[-1]
+    if isinstance(last_message, AIMessage) and "answer_cache" in last_message.response_metadata:
+        return "__end__"
+    return "workspace_index"
+
+
+@traced_node
+async def workspace_index(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
     """对 workspace 目录进行索引和分析。
     
     该函数会：
@@ -29,6 +117,9 @@ async def workspace_index(
     2. 收集文档内容（特别是 markdown 文件）
     3. 使用大模型分析目录结构和内容
     4. 返回结构化的 JSON 分析结果
+
+    同一工作空间（按目录指纹判断）上并发的运行共享同一次索引，
+    开启 ``share_workspace_index`` 时还会复用之前运行的结果。
     
     Args:
         state: 当前状态
@@ -38,10 +129,51 @@ async def workspace_index(
         包含结构化 JSON 分析结果的 AIMessage 列表
     """
     workspace_path = runtime.context.workspace_path
+    model_name = runtime.context.model
+    share = runtime.context.share_workspace_index
+    rules = workspace_rules(runtime.context)
+    with span("workspace_index.fingerprint"):
+        fingerprint = await _run_fingerprint(state, runtime.context)
+    result_json, _ = await _workspace_reports.run(
+        (fingerprint, model_name),
+        lambda: _index_workspace(
+            workspace_path,
+            model_name,
+            call_guard(runtime.context),
+            watched_workspace(workspace_path, rules) if runtime.context.watch_workspace else None,
+            rules,
+        ),
+        reuse=share,
+        # 只缓存分析成功的结果，失败时下一次运行会重新分析
+        keep=lambda report: share and report[1],
+    )
+    return {"messages": [AIMessage(content=result_json)], "workspace_fingerprint": fingerprint}
+
+
+async def _index_workspace(
+    workspace_path: str,
+    model_name: str,
+    guard: ModelCallGuard,
+    workspace: WorkspaceModel | None = None,
+    rules: IgnoreRules | None = None,
+) -> tuple[str, bool]:
+    """扫描并分析工作空间.
+
+    Args:
+        workspace_path: 工作空间路径
+        model_name: 用于分析的模型
+        guard: 模型调用的限流与重试策略
+        workspace: 工作空间的内存模型；提供时从中读取目录结构，不再遍历目录
+        rules: 扫描时跳过的目录和文件规则，默认为 IgnoreRules()
+
+    Returns:
+        JSON 格式的分析结果，以及模型分析是否成功
+    """
     workspace_path_obj = Path(workspace_path)
+    rules = rules or IgnoreRules()
     
     # 1. 扫描目录结构
-    directory_structure = {}
+    directory_structure: Dict[str, Any] = {}
     markdown_files = []
     directory_paths = []  # 收集所有目录路径
     
@@ -54,8 +186,7 @@ async def workspace_index(
             "directory_count": 0,
             "analysis_report": ""
         }
-        error_msg = AIMessage(content=json.dumps(error_result, ensure_ascii=False, indent=2))
-        return {"messages": [error_msg]}
+        return json.dumps(error_result, ensure_ascii=False, indent=2), False
     
     # 递归遍历目录，构建目录树结构并统计信息
     def build_directory_tree(path: Path, max_depth: int = 5, current_depth: int = 0) -> dict:
@@ -77,28 +208,38 @@ async def workspace_index(
         }
         
         try:
-            items = sorted(path.iterdir(), key=lambda x: (x.is_file(), x.name))
+            # scandir 的目录项自带类型，判断是否为目录时无需逐个 stat
+            with os.scandir(path) as it:
+                items = sorted(it, key=lambda x: (not x.is_dir(), x.name))
             for item in items:
+                rel_item = os.path.relpath(item.path, workspace_path_obj)
                 if item.is_dir():
-                    # 跳过隐藏目录和常见的不需要索引的目录
-                    if not item.name.startswith('.') and item.name not in ['__pycache__', 'node_modules']:
-                        tree["children"].append(build_directory_tree(item, max_depth, current_depth + 1))
-                elif item.is_file():
-                    # 收集 markdown 文件
-                    if item.suffix.lower() == '.md':
-                        markdown_files.append(str(item.relative_to(workspace_path_obj)))
+                    # 按忽略规则剪枝：被忽略的目录（隐藏目录、images/ 等）不会被遍历
+                    if not rules.ignores(rel_item, True):
+                        tree["children"].append(build_directory_tree(Path(item.path), max_depth, current_depth + 1))
+                elif rules.allows_name(item.name) and item.is_file():
+                    # 收集 markdown 文件；其他扩展名的文件按名称跳过，不做 stat
+                    size = item.stat().st_size
+                    if rules.includes_file(rel_item, size):
+                        markdown_files.append(rel_item)
                         tree["children"].append({
                             "type": "file",
                             "name": item.name,
-                            "path": str(item.relative_to(workspace_path_obj)),
-                            "size": item.stat().st_size
+                            "path": rel_item,
+                            "size": size
                         })
         except (PermissionError, OSError) as e:
             tree["error"] = str(e)
         
         return tree
     
-    directory_structure = build_directory_tree(workspace_path_obj)
+    with span("workspace_index.scan") as scan_span:
+        if workspace is not None:
+            directory_structure, directory_paths, markdown_files = workspace.tree()
+        else:
+            directory_structure = build_directory_tree(workspace_path_obj)
+        if scan_span is not None:
+            scan_span.attributes["markdown_files"] = len(markdown_files)
     
     # 统计目录个数（递归统计目录树中的所有目录）
     def count_directories(tree: dict) -> int:
@@ -112,28 +253,34 @@ async def workspace_index(
     
     directory_count = count_directories(directory_structure)
     document_count = len(markdown_files)
+
+    # 按标题切分文档并持久化章节索引，供 list_sections / read_section 使用；
+    # 冷启动时需要读取并切分所有文档，放到线程中执行，避免阻塞事件循环
+    with span("workspace_index.sections"):
+        section_count = await asyncio.to_thread(section_index(workspace_path).update, markdown_files)
     
     # 2. 收集文档内容（读取前 N 个 markdown 文件的内容摘要）
     document_contents = []
     max_files_to_read = 20  # 限制读取的文件数量，避免内容过长
     preview_length = 2000  # 每个文件预览的最大字符数
     
-    for file_path in markdown_files[:max_files_to_read]:
-        try:
-            full_path = workspace_path_obj / file_path
-            # 高效读取文件前 N 个字符作为摘要
-            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read(preview_length)
-            document_contents.append({
-                "path": file_path,
-                "content_preview": content,
-                "size": full_path.stat().st_size
-            })
-        except Exception as e:
-            document_contents.append({
-                "path": file_path,
-                "error": f"读取文件失败: {str(e)}"
-            })
+    with span("workspace_index.read_documents"):
+        for file_path in markdown_files[:max_files_to_read]:
+            try:
+                full_path = workspace_path_obj / file_path
+                # 高效读取文件前 N 个字符作为摘要
+                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read(preview_length)
+                document_contents.append({
+                    "path": file_path,
+                    "content_preview": content,
+                    "size": full_path.stat().st_size
+                })
+            except Exception as e:
+                document_contents.append({
+                    "path": file_path,
+                    "error": f"读取文件失败: {str(e)}"
+                })
     
     # 3. 构建分析提示
     analysis_prompt = f"""请对以下工作空间目录结构和文档内容进行深入分析。
@@ -167,17 +314,22 @@ async def workspace_index(
 请用中文详细回答，结构清晰，便于理解。"""
 
     # 4. 使用大模型进行分析
+    analysis_failed = False
     try:
-        model = load_chat_model(runtime.context.model)
+        model = load_chat_model(model_name)
         
         system_message = """你是一个专业的文档分析助手。你的任务是分析工作空间的目录结构和文档内容，
 提供深入的结构化分析和建议。请确保分析全面、准确、有条理。"""
         
         # 统一使用消息对象格式，保持与 call_model 的一致性
-        response = await model.ainvoke([
+        messages: List[AnyMessage] = [
             SystemMessage(content=system_message),
             HumanMessage(content=analysis_prompt)
-        ])
+        ]
+        with span("workspace_index.analyze"):
+            response = await guard.ainvoke(
+                model, messages, tokens=lambda: token_counter.count(messages), key="workspace_index"
+            )
         
         # 提取模型的分析报告
         analysis_report = ""
@@ -194,6 +346,7 @@ async def workspace_index(
     except Exception as e:
         # 如果模型调用失败，记录错误但继续返回目录结构信息
         analysis_report = f"模型分析失败: {str(e)}"
+        analysis_failed = True
     
     # 5. 构建结构化的 JSON 返回结果
     result = {
@@ -201,21 +354,23 @@ async def workspace_index(
         "directory_structure_paths": sorted(directory_paths),  # 所有目录路径列表
         "document_count": document_count,  # 文档个数
         "directory_count": directory_count,  # 目录个数
+        "section_count": section_count,  # 文档章节个数
         "analysis_report": analysis_report,  # 模型返回的分析总结报告
         "directory_structure": directory_structure,  # 完整的目录结构树
         "document_files": markdown_files  # 所有文档文件路径列表
     }
     
-    # 将结果格式化为 JSON 字符串，通过 AIMessage 返回
+    # 将结果格式化为 JSON 字符串
     result_json = json.dumps(result, ensure_ascii=False, indent=2)
-    result_msg = AIMessage(content=result_json)
-    
-    return {"messages": [result_msg]}
+    return result_json, not analysis_failed
+
+
 
 # Define the function that calls the model
+@traced_node
 async def call_model(
     state: State, runtime: Runtime[Context]
-) -> Dict[str, List[AIMessage]]:
+) -> Dict[str, Any]:
     """Call the LLM powering our "agent".
 
     This function prepares the prompt, initializes the model, and processes the response.
@@ -225,7 +380,8 @@ async def call_model(
         config (RunnableConfig): Configuration for the model run.
 
     Returns:
-        dict: A dictionary containing the model's response message.
+        dict: A dictionary containing the model's response message and the
+        updated token count of the conversation.
     """
     # Initialize the model with tool binding. Change the model or add more tools here.
     model = load_chat_model(runtime.context.model).bind_tools(TOOLS)
@@ -236,41 +392,31 @@ async def call_model(
     )
 
     # Get the model's response
-    response = cast( # type: ignore[redundant-cast]
+    messages = [SystemMessage(content=system_message), *state.messages]
+    response = cast(
         AIMessage,
-        await model.ainvoke(
-            [{"role": "system", "content": system_message}, *state.messages]
+        await call_guard(runtime.context).ainvoke(
+            model, messages, tokens=lambda: token_counter.count(messages), key="call_model"
         ),
     )
 
     # Handle the case when it's the last step and the model still wants to use a tool
     if state.is_last_step and response.tool_calls:
-        return {
-            "messages": [
-                AIMessage(
-                    id=response.id,
-                    content="Sorry, I could not find an answer to your question in the specified number of steps.",
-                )
-            ]
-        }
+        response = AIMessage(
+            id=response.id,
+            content="Sorry, I could not find an answer to your question in the specified number of steps.",
+        )
+    elif runtime.context.answer_cache and not response.tool_calls and response.text:
+        fingerprint = await _run_fingerprint(state, runtime.context)
+        key = _answer_cache_key(state, runtime.context, fingerprint)
+        if key is not None:
+            answer_cache.put(*key, response.text, ttl=runtime.context.answer_cache_ttl)
 
     # Return the model's response as a list to be added to existing messages
-    return {"messages": [response]}
-
-
-# Define a new graph
-
-builder = StateGraph(State, input_schema=InputState, context_schema=Context)
-
-# Define the two nodes we will cycle between
-builder.add_node(call_model)
-builder.add_node("tools", ToolNode(TOOLS))
-builder.add_node(workspace_index)
-
-# Set the entrypoint as `call_model`
-# This means that this node is the first one called
-builder.add_edge("__start__", "workspace_index")
-builder.add_edge("workspace_index", "call_model")
+    return {
+        "messages": [response],
+        "token_count": token_counter.count([*state.messages, response]),
+    }
 
 
 def route_model_output(state: State) -> Literal["__end__", "tools"]:
@@ -296,19 +442,49 @@ def route_model_output(state: State) -> Literal["__end__", "tools"]:
     return "tools"
 
 
-# Add a conditional edge to determine the next step after `call_model`
-builder.add_conditional_edges(
-    "call_model",
-    # After call_model finishes running, the next node(s) are scheduled
-    # based on the output from route_model_output
-    route_model_output,
-)
+def build_graph() -> CompiledStateGraph[Any, Any, Any, Any]:
+    """Build and compile a new ReAct graph."""
+    # Define a new graph
+    builder = StateGraph(State, input_schema=InputState, context_schema=Context)
+
+    # Define the two nodes we will cycle between
+    builder.add_node(call_model)
+    builder.add_node("tools", ToolNode(TOOLS, awrap_tool_call=trace_tool_call))
+    builder.add_node(workspace_index)
+    builder.add_node(lookup_answer)
+
+    # Set the entrypoint as `lookup_answer`, which ends the run early when
+    # the answer cache has the answer
+    builder.add_edge("__start__", "lookup_answer")
+    builder.add_conditional_edges("lookup_answer", route_cached_answer)
+    builder.add_edge("workspace_index", "call_model")
+
+    # Add a conditional edge to determine the next step after `call_model`
+    builder.add_conditional_edges(
+        "call_model",
+        # After call_model finishes running, the next node(s) are scheduled
+        # based on the output from route_model_output
+        route_model_output,
+    )
+
+    # Add a normal edge from `tools` to `call_model`
+    # This creates a cycle: after using tools, we always return to the model
+    builder.add_edge("tools", "call_model")
+
+    # Compile the builder into an executable graph
+    # Note: recursion_limit should be set when invoking the graph, not during compilation
+    # Example: graph.invoke(inputs, {"recursion_limit": 100})
+    return builder.compile(name="ReAct Agent")
+
+
+@functools.cache
+def get_graph() -> CompiledStateGraph[Any, Any, Any, Any]:
+    """Return the shared compiled graph, building it on first use."""
+    return build_graph()
 
-# Add a normal edge from `tools` to `call_model`
-# This creates a cycle: after using tools, we always return to the model
-builder.add_edge("tools", "call_model")
 
-# Compile the builder into an executable graph
-# Note: recursion_limit should be set when invoking the graph, not during compilation
-# Example: graph.invoke(inputs, {"recursion_limit": 100})
-graph = builder.compile(name="ReAct Agent")
+def __getattr__(name: str) -> Any:
+    # ``graph`` is compiled on first access instead of at import time.
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
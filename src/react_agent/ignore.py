@@ -0,0 +1,237 @@
+"""Rules deciding which parts of a workspace are scanned.
+
+Lecture folders keep their figures next to the notes, often hundreds of
+hash-named images per folder, and none of it is read by the agent. Every
+workspace traversal — the workspace index and fingerprint, ``WorkspaceModel``
+and the workspace tools — asks one ``IgnoreRules`` what to skip:
+
+- gitignore-style patterns. Ignored directories are pruned during the walk,
+  so their contents are never listed.
+- an allowlist of file extensions. Other files are skipped by name, without
+  a ``stat``.
+- a maximum file size.
+
+The patterns follow ``.gitignore``: ``#`` comments, ``!`` negation, a
+trailing ``/`` for directories only, a leading or inner ``/`` to anchor a
+pattern to the workspace root, ``*``, ``?``, ``[...]`` and ``**``. The last
+matching pattern wins. As in git, a file cannot be re-included when a
+directory above it is ignored.
+
+``workspace_rules`` combines ``DEFAULT_IGNORE``, the workspace's
+``.agentignore`` file and the ``Context`` settings.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import re
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from react_agent.context import Context
+
+DEFAULT_IGNORE = (
+    ".*",
+    "__pycache__/",
+    "node_modules/",
+    "images/",
+    "img/",
+    "*.jpg",
+    "*.jpeg",
+    "*.png",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.pdf",
+)
+"""Hidden entries, dependency caches, image directories and binary assets."""
+
+IGNORE_FILE = ".agentignore"
+"""Gitignore-style file at the workspace root with more patterns."""
+
+
+def _translate(pattern: str) -> str:
+    parts = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i) and (i == 0 or pattern[i - 1] == "/"):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if c == "*":
+            parts.append("[^/]*")
+        elif c == "?":
+            parts.append("[^/]")
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        elif c == "[" and (end := pattern.find("]", i + 2)) != -1:
+            body = pattern[i + 1 : end]
+            if body[0] == "!":
+                body = "^" + body[1:]
+            parts.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
+
+
+def _compile(pattern: str) -> tuple[re.Pattern[str], bool, bool] | None:
+    # Return the regex, whether the pattern negates, and whether it only
+    # matches directories.
+    if not pattern.strip() or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate or pattern.startswith(("\\!", "\\#")):
+        pattern = pattern[1:]
+    if not pattern.endswith("\\ "):
+        pattern = pattern.rstrip()
+    directory_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    if not pattern:
+        return None
+    anchored = "/" in pattern
+    regex = ("" if anchored else "(?:.*/)?") + _translate(pattern.lstrip("/"))
+    return re.compile(regex + r"\Z", re.DOTALL), negate, directory_only
+
+
+class IgnoreRules:
+    """Ignore patterns, an extension allowlist and a size limit for workspace scans.
+
+    Paths are relative to the workspace root.
+    """
+
+    def __init__(
+        self,
+        patterns: Iterable[str] = DEFAULT_IGNORE,
+        *,
+        extensions: Iterable[str] = (".md",),
+        max_file_size: int = 0,
+    ) -> None:
+        """Compile the rules.
+
+        Args:
+            patterns: Gitignore-style patterns, in order of precedence, lowest
+                first.
+            extensions: File extensions that are listed and indexed, such as
+                ``".md"``. Empty allows every extension.
+            max_file_size: Files larger than this many bytes are skipped. ``0``
+                allows any size.
+        """
+        self.patterns = tuple(patterns)
+        self.extensions = frozenset(
+            e.lower() if e.startswith(".") else f".{e.lower()}" for e in (e.strip() for e in extensions) if e
+        )
+        self.max_file_size = max_file_size
+        compiled = (_compile(p) for p in self.patterns)
+        # Checked last pattern first, since the last match wins.
+        self._rules = [rule for rule in compiled if rule is not None][::-1]
+
+    @property
+    def key(self) -> tuple[tuple[str, ...], tuple[str, ...], int]:
+        """Return a value identifying the rules, for cache keys."""
+        return self.patterns, tuple(sorted(self.extensions)), self.max_file_size
+
+    def __eq__(self, other: object) -> bool:
+        """Return whether ``other`` has the same rules."""
+        return isinstance(other, IgnoreRules) and self.key == other.key
+
+    def __hash__(self) -> int:
+        """Return the hash of ``key``."""
+        return hash(self.key)
+
+    def __repr__(self) -> str:
+        """Return a representation with the rules."""
+        return (
+            f"IgnoreRules({list(self.patterns)!r}, extensions={sorted(self.extensions)!r}, "
+            f"max_file_size={self.max_file_size})"
+        )
+
+    def ignores(self, rel: str, is_dir: bool) -> bool:
+        """Return whether the patterns ignore ``rel`` itself.
+
+        Directories above ``rel`` are not checked; a traversal prunes them
+        before reaching ``rel``. Use ``ignores_path`` for arbitrary paths.
+        """
+        rel = rel.replace(os.sep, "/")
+        if rel.startswith("./"):
+            rel = rel[2:]
+        for regex, negate, directory_only in self._rules:
+            if (is_dir or not directory_only) and regex.match(rel):
+                return not negate
+        return False
+
+    def ignores_path(self, rel: str, is_dir: bool) -> bool:
+        """Return whether ``rel`` or a directory above it is ignored."""
+        parts = os.path.normpath(rel).replace(os.sep, "/").split("/")
+        if parts == ["."]:
+            return False
+        for i in range(1, len(parts)):
+            if self.ignores("/".join(parts[:i]), True):
+                return True
+        return self.ignores("/".join(parts), is_dir)
+
+    def allows_name(self, name: str) -> bool:
+        """Return whether a file's extension is allowed."""
+        return not self.extensions or os.path.splitext(name)[1].lower() in self.extensions
+
+    def allows_size(self, size: int) -> bool:
+        """Return whether a file's size is within the limit."""
+        return not self.max_file_size or size <= self.max_file_size
+
+    def includes_file(self, rel: str, size: int) -> bool:
+        """Return whether a file found in a traversal is listed, by name, size and patterns."""
+        return self.allows_name(rel) and self.allows_size(size) and not self.ignores(rel, False)
+
+
+def _split(value: str) -> list[str]:
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def workspace_rules(context: Context) -> IgnoreRules:
+    """Return the rules for a run's workspace.
+
+    They are ``DEFAULT_IGNORE``, then the patterns in the workspace's
+    ``.agentignore``, then ``Context.workspace_ignore``, with the extensions
+    and size limit from the context.
+    """
+    ignore_file = os.path.join(context.workspace_path, IGNORE_FILE)
+    try:
+        stat = os.stat(ignore_file)
+        version = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        version = None
+    return _workspace_rules(
+        ignore_file if version else "",
+        version,
+        context.workspace_ignore,
+        context.workspace_extensions,
+        context.workspace_max_file_size,
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _workspace_rules(
+    ignore_file: str,
+    version: tuple[int, int] | None,
+    ignore: str,
+    extensions: str,
+    max_file_size: int,
+) -> IgnoreRules:
+    patterns = list(DEFAULT_IGNORE)
+    if ignore_file:
+        try:
+            with open(ignore_file, encoding="utf-8") as f:
+                patterns.extend(line.rstrip("\n") for line in f)
+        except OSError:
+            pass
+    patterns.extend(_split(ignore))
+    return IgnoreRules(patterns, extensions=_split(extensions), max_file_size=max_file_size)
@@ -0,0 +1,71 @@
+"""Lightweight lexical scoring shared by skill ranking and retrieval.
+
+Text is tokenized into lowercase word tokens; runs of CJK characters are split
+into overlapping character bigrams, since Chinese text has no word boundaries.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from collections.abc import Iterable
+
+_TOKEN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff\uf900-\ufaff]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split ``text`` into word tokens and CJK character bigrams."""
+    tokens: list[str] = []
+    for match in _TOKEN.findall(text.lower().replace("_", " ")):
+        if match[0].isascii():
+            tokens.append(match)
+        elif len(match) == 1:
+            tokens.append(match)
+        else:
+            tokens.extend(match[i : i + 2] for i in range(len(match) - 1))
+    return tokens
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of documents."""
+
+    def __init__(self, documents: Iterable[str], *, k1: float = 1.5, b: float = 0.75) -> None:
+        """Tokenize and index ``documents``; scores refer to their positions."""
+        self.k1 = k1
+        self.b = b
+        self.term_freqs: list[Counter[str]] = [Counter(tokenize(d)) for d in documents]
+        self.lengths = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+        doc_freqs: Counter[str] = Counter()
+        for tf in self.term_freqs:
+            doc_freqs.update(tf.keys())
+        n = len(self.term_freqs)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()
+        }
+
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+        return len(self.term_freqs)
+
+    def scores(self, query: str) -> list[float]:
+        """Return the BM25 score of every document for ``query``."""
+        terms = [t for t in set(tokenize(query)) if t in self.idf]
+        result = [0.0] * len(self.term_freqs)
+        if not terms:
+            return result
+        for i, tf in enumerate(self.term_freqs):
+            norm = self.k1 * (1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = tf.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            result[i] = score
+        return result
+
+    def top_k(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Return ``(position, score)`` of the ``k`` best documents, ties in index order."""
+        scored = sorted(enumerate(self.scores(query)), key=lambda item: -item[1])
+        return scored[:k]
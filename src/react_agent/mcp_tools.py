@@ -0,0 +1,472 @@
+"""MCP tools that connect lazily and reuse one session per server.
+
+``MultiServerMCPClient.get_tools()`` connects to every server to list its tools,
+and each call of the returned tools opens a fresh session: a new subprocess for
+stdio servers, a new HTTP handshake for remote ones. ``MCPToolProvider`` instead
+
+- caches each server's tool schemas on disk, keyed by a hash of its connection
+  config, so later startups build the tools without connecting at all;
+- connects to a server the first time one of its tools is called, and keeps
+  that session open for later calls;
+- reconnects and retries once when a call could not be sent because the
+  connection had dropped. A call that was sent is never repeated, since the
+  server may have run it before the connection broke.
+
+Servers are isolated from each other. Discovery runs concurrently with a
+deadline per server, and a server that is slow or down only loses its own
+tools: its calls time out after ``call_timeout``, and after repeated failures a
+circuit breaker rejects them outright until the server has had time to recover.
+Either way the model gets an error result rather than the run failing.
+``metrics()`` reports each server's health and call latencies.
+
+Example:
+    provider = MCPToolProvider({"math": {"transport": "stdio", "command": "python", "args": ["math_server.py"]}})
+    agent = create_agent(model, provider.get_tools())
+    ...
+    await provider.aclose()
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import anyio
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.sessions import Connection, create_session
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED, CallToolResult, TextContent
+from mcp.types import Tool as MCPTool
+
+from react_agent.stats import milliseconds, quantile
+
+logger = logging.getLogger(__name__)
+
+
+def default_cache_dir() -> Path:
+    """Return the directory where tool schemas are cached by default."""
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "react_agent" / "mcp"
+
+
+def connection_key(connection: Mapping[str, Any]) -> str:
+    """Return a stable hash of a connection config.
+
+    Values that are not JSON serializable, such as an HTTP client factory, are
+    keyed by their type so that the hash does not change between processes.
+    """
+    encoded = json.dumps(
+        connection,
+        sort_keys=True,
+        default=lambda o: f"{type(o).__module__}.{type(o).__qualname__}",
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:32]
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    if isinstance(error, McpError):
+        return error.error.code == CONNECTION_CLOSED
+    return isinstance(
+        error,
+        (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, OSError),
+    )
+
+
+def _is_unsent(error: BaseException) -> bool:
+    # The session's write stream raises these when the request could not be
+    # sent; a connection lost after sending surfaces as CONNECTION_CLOSED.
+    return isinstance(error, (anyio.ClosedResourceError, anyio.BrokenResourceError))
+
+
+class CircuitBreaker:
+    """Stop calling a server after repeated failures, then probe it again later.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and calls
+    are rejected without touching the server. Once ``reset_timeout`` seconds
+    have passed, one call is let through: success closes the breaker, failure
+    opens it again. A probe that ends otherwise, say cancelled, is released with
+    ``release_probe`` so that a later call probes again.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Create a closed breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """``"closed"``, ``"open"`` or ``"half_open"``."""
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Return whether a call may go through now."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return True
+        return False
+
+    def release_probe(self) -> None:
+        """End a probe without recording its outcome."""
+        self._probing = False
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the breaker at the threshold."""
+        self.failures += 1
+        self._probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = self.clock()
+
+
+@dataclass
+class ServerStats:
+    """Call counts and recent latencies of one server."""
+
+    calls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    rejected: int = 0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=1024))
+    """Seconds taken by the most recent calls, successful or not."""
+
+    def quantile(self, q: float) -> float | None:
+        """Return the ``q`` quantile (0 to 1) of recent latencies, in seconds."""
+        return quantile(self.latencies, q)
+
+
+class _Server:
+    """A long-lived session to one server, with its deadlines and health.
+
+    The session is owned by a background task: the transports of the MCP SDK
+    are anyio task groups that must be exited by the task that entered them, so
+    the session cannot belong to whichever tool call happened to open it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connection: Connection,
+        *,
+        connect_timeout: float,
+        call_timeout: float,
+        breaker: CircuitBreaker,
+    ) -> None:
+        self.name = name
+        self.connection = connection
+        self.connect_timeout = connect_timeout
+        self.call_timeout = call_timeout
+        self.breaker = breaker
+        self.stats = ServerStats()
+        self.connects = 0
+        self._session: ClientSession | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._closing: asyncio.Event | None = None
+        self._lock: asyncio.Lock | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _alive(self) -> bool:
+        return (
+            self._session is not None
+            and self._task is not None
+            and not self._task.done()
+            and self._loop is asyncio.get_running_loop()
+        )
+
+    async def session(self) -> ClientSession:
+        if self._alive():
+            return self._session  # type: ignore[return-value]
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions are bound to the loop that opened them; one from a
+            # previous asyncio.run() cannot be reused or closed from here.
+            self._loop, self._lock, self._session, self._task = loop, asyncio.Lock(), None, None
+        assert self._lock is not None
+        async with self._lock:
+            if self._alive():
+                return self._session  # type: ignore[return-value]
+            ready: asyncio.Future[ClientSession] = loop.create_future()
+            self._closing = asyncio.Event()
+            task = self._task = asyncio.create_task(self._run(ready, self._closing))
+            try:
+                async with asyncio.timeout(self.connect_timeout):
+                    self._session = await ready
+            except Exception as e:
+                task.cancel()
+                raise ConnectionError(f"could not connect: {e!r}") from e
+            except BaseException:
+                task.cancel()
+                raise
+            self.connects += 1
+            return self._session
+
+    async def _run(self, ready: asyncio.Future[ClientSession], closing: asyncio.Event) -> None:
+        opened: ClientSession | None = None
+        try:
+            async with create_session(self.connection) as opened:
+                await opened.initialize()
+                ready.set_result(opened)
+                await closing.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            # By now a later call may have opened a new session; keep it.
+            if opened is not None and self._session is opened:
+                self._session = None
+
+    def discard(self) -> None:
+        """Forget a broken session so that the next call reconnects."""
+        self._session = None
+        if self._closing is not None:
+            self._closing.set()
+
+    async def close(self) -> None:
+        task = self._task
+        if task is None or self._loop is not asyncio.get_running_loop():
+            return
+        self.discard()
+        await task
+
+    async def call_tool(
+        self, name: str, arguments: dict[str, Any] | None = None, **kwargs: Any
+    ) -> CallToolResult:
+        """Call a tool, reporting an unavailable server as a tool error.
+
+        ``convert_mcp_tool_to_langchain_tool`` only uses ``call_tool`` of the
+        session it is given, so the server stands in for one. Returning an error
+        result rather than raising lets the agent carry on with other tools.
+        """
+        if not self.breaker.allow():
+            self.stats.rejected += 1
+            return _error_result(f"MCP server '{self.name}' is unavailable (circuit open); try again later.")
+        self.stats.calls += 1
+        start = time.perf_counter()
+        try:
+            async with asyncio.timeout(self.call_timeout):
+                result = await self._call_with_reconnect(name, arguments, **kwargs)
+        except TimeoutError:
+            self.stats.timeouts += 1
+            self.breaker.record_failure()
+            return _error_result(f"MCP server '{self.name}' did not answer within {self.call_timeout}s.")
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            self.stats.errors += 1
+            self.breaker.record_failure()
+            return _error_result(f"MCP server '{self.name}' is unavailable: {e}")
+        finally:
+            self.stats.latencies.append(time.perf_counter() - start)
+            # Other errors and cancellation record no outcome.
+            self.breaker.release_probe()
+        self.breaker.record_success()
+        return result
+
+    async def _call_with_reconnect(
+        self, name: str, arguments: dict[str, Any] | None, **kwargs: Any
+    ) -> CallToolResult:
+        session = await self.session()
+        try:
+            return await session.call_tool(name, arguments, **kwargs)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            self.discard()
+            if not _is_unsent(e):
+                raise
+        session = await self.session()
+        return await session.call_tool(name, arguments, **kwargs)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            "state": self.breaker.state,
+            "connected": self._session is not None,
+            "connects": self.connects,
+            "calls": self.stats.calls,
+            "errors": self.stats.errors,
+            "timeouts": self.stats.timeouts,
+            "rejected": self.stats.rejected,
+            "latency_p50_ms": milliseconds(self.stats.quantile(0.5)),
+            "latency_p95_ms": milliseconds(self.stats.quantile(0.95)),
+        }
+
+
+def _error_result(message: str) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=message)], isError=True)
+
+
+async def _list_tools(connection: Connection) -> list[MCPTool]:
+    async with create_session(connection) as session:
+        await session.initialize()
+        tools: list[MCPTool] = []
+        cursor: str | None = None
+        while True:
+            page = await session.list_tools(cursor=cursor)
+            tools.extend(page.tools)
+            cursor = page.nextCursor
+            if not cursor:
+                return tools
+
+
+class MCPToolProvider:
+    """LangChain tools for several MCP servers, with cached schemas and shared sessions."""
+
+    def __init__(
+        self,
+        connections: Mapping[str, Connection],
+        *,
+        cache_dir: str | Path | None = None,
+        tool_name_prefix: bool = False,
+        handle_tool_errors: bool = True,
+        connect_timeout: float = 10.0,
+        call_timeout: float = 60.0,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        """Configure the provider; nothing is connected yet.
+
+        Args:
+            connections: Connection configs by server name, as for
+                ``MultiServerMCPClient``.
+            cache_dir: Where tool schemas are cached. Defaults to
+                ``default_cache_dir()``.
+            tool_name_prefix: Prefix tool names with their server name.
+            handle_tool_errors: Return MCP tool errors, including unavailable
+                servers, to the model instead of raising them.
+            connect_timeout: Seconds allowed to connect to a server, or to
+                connect and list its tools during discovery.
+            call_timeout: Seconds allowed for a tool call, reconnection included.
+            failure_threshold: Consecutive failures that open a server's circuit.
+            reset_timeout: Seconds an open circuit waits before probing the server.
+        """
+        self.connections = dict(connections)
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.tool_name_prefix = tool_name_prefix
+        self.handle_tool_errors = handle_tool_errors
+        self.connect_timeout = connect_timeout
+        self._servers = {
+            name: _Server(
+                name,
+                connection,
+                connect_timeout=connect_timeout,
+                call_timeout=call_timeout,
+                breaker=CircuitBreaker(failure_threshold, reset_timeout),
+            )
+            for name, connection in self.connections.items()
+        }
+
+    def _cache_path(self, server_name: str) -> Path:
+        return self.cache_dir / f"{connection_key(self.connections[server_name])}.json"
+
+    def _read_cache(self, server_name: str) -> list[MCPTool] | None:
+        try:
+            data = json.loads(self._cache_path(server_name).read_text(encoding="utf-8"))
+            return [MCPTool.model_validate(t) for t in data["tools"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, server_name: str, tools: list[MCPTool]) -> None:
+        path = self._cache_path(server_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"tools": [t.model_dump(mode="json", exclude_none=True) for t in tools]}
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _build(self, server_name: str, tools: list[MCPTool]) -> list[BaseTool]:
+        return [
+            convert_mcp_tool_to_langchain_tool(
+                self._servers[server_name],  # type: ignore[arg-type]
+                tool,
+                server_name=server_name,
+                tool_name_prefix=self.tool_name_prefix,
+                handle_tool_errors=self.handle_tool_errors,
+            )
+            for tool in tools
+        ]
+
+    async def _discover(self, server_name: str, refresh: bool) -> list[BaseTool]:
+        tools = None if refresh else self._read_cache(server_name)
+        if tools is None:
+            server = self._servers[server_name]
+            try:
+                async with asyncio.timeout(self.connect_timeout):
+                    tools = await _list_tools(self.connections[server_name])
+            except Exception as e:
+                server.breaker.record_failure()
+                logger.warning("Skipping MCP server %r: tool discovery failed: %r", server_name, e)
+                return []
+            self._write_cache(server_name, tools)
+        return self._build(server_name, tools)
+
+    async def aget_tools(self, *, server_name: str | None = None, refresh: bool = False) -> list[BaseTool]:
+        """Return the tools of one or all servers.
+
+        Schemas come from the cache when present. Servers without a cached schema
+        (or all of them, with ``refresh=True``) are listed concurrently, each
+        within ``connect_timeout``; a server that fails is logged and skipped.
+        """
+        names = [server_name] if server_name is not None else list(self.connections)
+        found = await asyncio.gather(*(self._discover(name, refresh) for name in names))
+        return [tool for tools in found for tool in tools]
+
+    def get_tools(self, *, server_name: str | None = None, refresh: bool = False) -> list[BaseTool]:
+        """Sync version of ``aget_tools``, for building agents at import time.
+
+        Listing uncached servers runs on a private event loop; the tools still
+        connect lazily on the loop that calls them.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aget_tools(server_name=server_name, refresh=refresh))
+        raise RuntimeError("get_tools() cannot be called from a running event loop; use aget_tools()")
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """Return the health, call counts and latency percentiles of each server."""
+        return {name: server.metrics() for name, server in self._servers.items()}
+
+    async def aclose(self) -> None:
+        """Close every open session."""
+        await asyncio.gather(*(server.close() for server in self._servers.values()))
+
+    async def __aenter__(self) -> MCPToolProvider:
+        """Enter an ``async with`` block that closes the sessions on exit."""
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        """Close every open session."""
+        await self.aclose()
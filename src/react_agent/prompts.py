@@ -3,3 +3,8 @@
 SYSTEM_PROMPT = """You are a helpful AI assistant.
 
 System time: {system_time}"""
+
+RESEARCH_SUBAGENT_PROMPT = """You are a research assistant working on one sub-task of a larger report.
+
+Use the internet_search tool to gather facts for your sub-task only, then reply with a concise, \
+well-organized summary of your findings. Cite the source URL for each claim."""
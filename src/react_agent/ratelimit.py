@@ -0,0 +1,366 @@
+"""Client-side rate limiting, retries and hedging for chat model calls.
+
+``ModelCallGuard.ainvoke`` wraps one model call with:
+
+- Two token buckets, for requests and for prompt tokens per minute. A call
+  waits until both have room, so bursts are smoothed out before they reach
+  the endpoint instead of coming back as 429s. The buckets are adaptive:
+  every 429 halves their rate, and each success wins back a little of it.
+- Retries of transient failures (429, 408, 5xx, timeouts and connection
+  errors) with full-jitter exponential backoff, honoring ``Retry-After``.
+- Optional hedging: once enough latencies are known, a call still running at
+  the observed p95 latency of its call site gets a duplicate request, and
+  whichever answers first wins. Hedges only use spare bucket capacity, and their output is not
+  streamed, so a stream never shows the same answer twice.
+
+One guard is shared by every run with the same settings (see
+``get_call_guard``), so the limits hold for the whole process. ``metrics()``
+reports calls, retries, 429s, hedges, time spent throttled and latency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Mapping
+from typing import Any, TypeVar
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from react_agent.stats import milliseconds, quantile
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_TRANSIENT_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+_TRANSIENT_ERRORS = frozenset({"APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError"})
+
+
+def _status(error: BaseException) -> int | None:
+    status = getattr(error, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def is_transient(error: BaseException) -> bool:
+    """Return whether a failed model call may succeed if retried."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    if _status(error) in _TRANSIENT_STATUS:
+        return True
+    # Matched by name so that the provider SDKs are not imported here.
+    return any(cls.__name__ in _TRANSIENT_ERRORS for cls in type(error).__mro__)
+
+
+def _retry_after(error: BaseException) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not isinstance(headers, Mapping):
+        return None
+    try:
+        return max(0.0, float(headers.get("retry-after", "")))
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """A token bucket whose rate backs off on rate-limit errors."""
+
+    def __init__(self, per_minute: float, burst: float | None = None, min_fraction: float = 0.1) -> None:
+        """Initialize a full bucket.
+
+        Args:
+            per_minute: Tokens added per minute at full rate.
+            burst: Bucket capacity. Defaults to one second's worth, but at
+                least one token.
+            min_fraction: Lowest fraction of the full rate that ``slow_down``
+                goes to.
+        """
+        self.per_minute = per_minute
+        self.capacity = burst if burst is not None else max(1.0, per_minute / 60)
+        self.min_fraction = min_fraction
+        self.fraction = 1.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Return the current rate, in tokens per second."""
+        return self.per_minute * self.fraction / 60
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def charge(self, amount: float) -> float:
+        """Return the tokens that reserving ``amount`` takes: ``amount``, capped to the capacity.
+
+        Refunds of a reservation should be based on this, not on ``amount``.
+        """
+        return min(amount, self.capacity)
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens and return the seconds to wait before using them.
+
+        The balance may go negative, so callers are served in the order they
+        reserve. Amounts larger than the capacity are capped to it.
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= self.charge(amount)
+            return max(0.0, -self._tokens / self.rate)
+
+    def try_reserve(self, amount: float) -> bool:
+        """Take ``amount`` tokens only if they are available now."""
+        with self._lock:
+            self._refill()
+            amount = self.charge(amount)
+            if self._tokens < amount:
+                return False
+            self._tokens -= amount
+            return True
+
+    def refund(self, amount: float) -> None:
+        """Return tokens, or take more with a negative ``amount``."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def slow_down(self, factor: float = 0.5) -> None:
+        """Multiply the rate by ``factor``, down to the minimum fraction."""
+        with self._lock:
+            self._refill()
+            self.fraction = max(self.min_fraction, self.fraction * factor)
+
+    def recover(self, step: float = 0.05) -> None:
+        """Add ``step`` of the full rate back, up to the full rate."""
+        with self._lock:
+            self._refill()
+            self.fraction = min(1.0, self.fraction + step)
+
+
+class ModelCallGuard:
+    """Rate limits, retries and optionally hedges chat model calls."""
+
+    def __init__(
+        self,
+        *,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        min_hedge_samples: int = 20,
+    ) -> None:
+        """Initialize the guard.
+
+        Args:
+            requests_per_minute: Request rate limit. ``0`` disables it.
+            tokens_per_minute: Prompt token rate limit. ``0`` disables it.
+            max_retries: Retries of a call after transient failures.
+            backoff: Upper bound of the first retry delay, in seconds; it
+                doubles with every retry, up to ``max_backoff``.
+            max_backoff: Upper bound of any retry delay, in seconds.
+            hedge: Send a duplicate request when a call is slow.
+            hedge_quantile: Latency quantile after which a call is hedged.
+            min_hedge_samples: Latencies observed before hedging starts.
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute, burst=tokens_per_minute / 6) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.min_hedge_samples = min_hedge_samples
+        self._latencies: dict[str, deque[float]] = {}
+        """Recent latencies by call site, since each has its own distribution."""
+        self._counts = dict.fromkeys(
+            ["calls", "attempts", "retries", "rate_limited", "failures", "hedges", "hedge_wins"], 0
+        )
+        self._throttled = 0.0
+        self._lock = threading.Lock()
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[name] += amount
+
+    def hedge_delay(self, key: str = "") -> float | None:
+        """Return how long a call from call site ``key`` runs before it is hedged, if hedging is active."""
+        with self._lock:
+            latencies = self._latencies.get(key, ())
+            if not self.hedge or len(latencies) < self.min_hedge_samples:
+                return None
+            return quantile(latencies, self.hedge_quantile)
+
+    async def _acquire(self, tokens: int) -> None:
+        delay = 0.0
+        if self.requests is not None:
+            delay = self.requests.reserve(1)
+        if self.tokens is not None and tokens:
+            delay = max(delay, self.tokens.reserve(tokens))
+        if delay > 0:
+            with self._lock:
+                self._throttled += delay
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self._refund(tokens)
+                raise
+
+    def _try_acquire(self, tokens: int) -> bool:
+        if self.requests is not None and not self.requests.try_reserve(1):
+            return False
+        if self.tokens is not None and tokens and not self.tokens.try_reserve(tokens):
+            if self.requests is not None:
+                self.requests.refund(1)
+            return False
+        return True
+
+    def _refund(self, tokens: int) -> None:
+        if self.requests is not None:
+            self.requests.refund(1)
+        if self.tokens is not None:
+            self.tokens.refund(self.tokens.charge(tokens))
+
+    def _buckets(self) -> list[TokenBucket]:
+        return [b for b in (self.requests, self.tokens) if b is not None]
+
+    async def _attempt(
+        self, model: Runnable[Any, T], input: Any, config: RunnableConfig | None, tokens: int, key: str
+    ) -> T:
+        primary = asyncio.ensure_future(model.ainvoke(input, config))
+        pending = {primary}
+        # Whatever ends the attempt, the caller's cancellation included, no
+        # request is left running.
+        try:
+            delay = self.hedge_delay(key)
+            if delay is None:
+                return await primary
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self._try_acquire(tokens):
+                return await primary
+            self._count("hedges")
+            # The duplicate's tokens are not streamed; only its result is used.
+            hedge_config: RunnableConfig = {**(config or {}), "callbacks": []}
+            hedge = asyncio.ensure_future(model.ainvoke(input, hedge_config))
+            pending = {primary, hedge}
+            while True:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    if winner is hedge:
+                        self._count("hedge_wins")
+                    return winner.result()
+                if not pending:
+                    # Both failed; raise the last error.
+                    return done.pop().result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def ainvoke(
+        self,
+        model: Runnable[Any, T],
+        input: Any,
+        config: RunnableConfig | None = None,
+        *,
+        tokens: int | Callable[[], int] = 0,
+        key: str = "",
+    ) -> T:
+        """Call ``model.ainvoke(input, config)`` under the guard.
+
+        Args:
+            model: Model, or model with bound tools, to call.
+            input: The model input.
+            config: Config for the call.
+            tokens: Estimated prompt tokens, or a function computing them
+                that is only called when tokens are limited. They are charged
+                to the token bucket, which is corrected with the reported usage
+                afterwards.
+            key: Call site, such as ``"call_model"``. Latencies are kept per
+                call site, so that a call is only hedged when it is slow
+                compared to calls from the same place.
+        """
+        if callable(tokens):
+            tokens = tokens() if self.tokens is not None else 0
+        self._count("calls")
+        attempt = 0
+        while True:
+            await self._acquire(tokens)
+            self._count("attempts")
+            start = time.perf_counter()
+            try:
+                result = await self._attempt(model, input, config, tokens, key)
+            except Exception as e:
+                if not is_transient(e) or attempt >= self.max_retries:
+                    self._count("failures")
+                    raise
+                if _status(e) == 429 or type(e).__name__ == "RateLimitError":
+                    self._count("rate_limited")
+                    for bucket in self._buckets():
+                        bucket.slow_down()
+                wait = _retry_after(e)
+                if wait is None:
+                    wait = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+                attempt += 1
+                self._count("retries")
+                logger.info("Retrying model call in %.2fs after %s (retry %d)", wait, type(e).__name__, attempt)
+                await asyncio.sleep(wait)
+                continue
+            with self._lock:
+                latencies = self._latencies.setdefault(key, deque(maxlen=500))
+                latencies.append(time.perf_counter() - start)
+            for bucket in self._buckets():
+                bucket.recover()
+            usage = result.usage_metadata if isinstance(result, AIMessage) else None
+            if self.tokens is not None and usage:
+                # Both sides capped as the bucket caps them, so a prompt over
+                # the capacity is not credited for tokens it was never charged.
+                self.tokens.refund(self.tokens.charge(tokens) - self.tokens.charge(usage["input_tokens"]))
+            return result
+
+    def metrics(self) -> dict[str, Any]:
+        """Return call counts, seconds spent throttled, latency and the current rate fraction.
+
+        Latency percentiles cover every call site; the hedging delay is given
+        per call site.
+        """
+        with self._lock:
+            keys = list(self._latencies)
+            latencies = [t for window in self._latencies.values() for t in window]
+            counts = dict(self._counts)
+            throttled = self._throttled
+
+        return {
+            **counts,
+            "throttled_seconds": round(throttled, 3),
+            "latency_p50_ms": milliseconds(quantile(latencies, 0.5)),
+            "latency_p95_ms": milliseconds(quantile(latencies, 0.95)),
+            "hedge_after_ms": {key: milliseconds(self.hedge_delay(key)) for key in keys},
+            "rate_fraction": min((b.fraction for b in self._buckets()), default=1.0),
+        }
+
+
+@functools.lru_cache(maxsize=16)
+def get_call_guard(
+    requests_per_minute: float = 0,
+    tokens_per_minute: float = 0,
+    max_retries: int = 2,
+    hedge: bool = False,
+) -> ModelCallGuard:
+    """Return the process-wide guard with these settings."""
+    return ModelCallGuard(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_retries=max_retries,
+        hedge=hedge,
+    )
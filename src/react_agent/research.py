@@ -0,0 +1,165 @@
+"""Concurrent research for deep agents.
+
+``internet_search`` is an async Tavily search tool, so several searches issued
+in one model turn run at the same time instead of one after another.
+
+``SubAgentScheduler`` runs one research sub-agent per independent sub-task,
+at most ``max_concurrency`` at a time, and merges their answers. Its
+``as_tool`` exposes this to a lead agent as a ``parallel_research`` tool that
+takes the whole list of sub-tasks in one call::
+
+    scheduler = SubAgentScheduler(create_research_subagent(llm), max_concurrency=4)
+    agent = create_deep_agent(model=llm, tools=[internet_search, scheduler.as_tool()])
+
+Agents using these tools must be run with ``ainvoke`` or ``astream``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Sequence
+from functools import lru_cache
+from typing import Any, Literal
+
+from langchain.agents import create_agent
+from langchain_core.language_models import BaseChatModel
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool, StructuredTool, tool
+from langchain_tavily import TavilySearch
+
+from react_agent.prompts import RESEARCH_SUBAGENT_PROMPT
+
+
+@lru_cache(maxsize=16)
+def _tavily(max_results: int, include_raw_content: bool) -> TavilySearch:
+    return TavilySearch(max_results=max_results, include_raw_content=include_raw_content)
+
+
+@tool
+async def internet_search(
+    query: str,
+    max_results: int = 5,
+    topic: Literal["general", "news", "finance"] = "general",
+    include_raw_content: bool = False,
+) -> dict[str, Any]:
+    """Search the internet for information."""
+    try:
+        result = await _tavily(max_results, include_raw_content).ainvoke({"query": query, "topic": topic})
+    except Exception as e:
+        return {"error": f"Search failed for {query!r}: {e}"}
+    return result if isinstance(result, dict) else {"results": result}
+
+
+def create_research_subagent(
+    model: BaseChatModel,
+    tools: Sequence[BaseTool] = (internet_search,),
+    system_prompt: str = RESEARCH_SUBAGENT_PROMPT,
+) -> Runnable[Any, Any]:
+    """Build the agent that ``SubAgentScheduler`` runs for each sub-task."""
+    return create_agent(model, tools=list(tools), system_prompt=system_prompt)
+
+
+def _final_text(state: Any) -> str:
+    messages = state.get("messages") if isinstance(state, dict) else None
+    if not messages:
+        return str(state)
+    return str(messages[-1].text)
+
+
+class SubAgentScheduler:
+    """Run research sub-agents concurrently under a concurrency limit."""
+
+    def __init__(
+        self,
+        agent: Runnable[Any, Any],
+        max_concurrency: int = 4,
+        timeout: float | None = 300,
+        recursion_limit: int = 25,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            agent: Agent run once per sub-task, with the sub-task as its only
+                user message.
+            max_concurrency: Maximum number of sub-agents running at once,
+                shared by every call made through this scheduler.
+            timeout: Seconds after which a sub-task is abandoned. ``None``
+                waits indefinitely.
+            recursion_limit: Graph step limit for each sub-agent run.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        self.agent = agent
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.recursion_limit = recursion_limit
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _limit(self) -> asyncio.Semaphore:
+        # A semaphore is bound to the event loop it is first used on.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def _run_one(self, task: str) -> dict[str, Any]:
+        async with self._limit():
+            start = time.perf_counter()
+            try:
+                state = await asyncio.wait_for(
+                    self.agent.ainvoke(
+                        {"messages": [("user", task)]},
+                        {"recursion_limit": self.recursion_limit},
+                    ),
+                    self.timeout,
+                )
+            except TimeoutError:
+                return {"task": task, "error": f"Sub-task timed out after {self.timeout}s"}
+            except Exception as e:
+                return {"task": task, "error": f"Sub-task failed: {type(e).__name__}: {e}"}
+            return {
+                "task": task,
+                "result": _final_text(state),
+                "seconds": round(time.perf_counter() - start, 2),
+            }
+
+    async def arun(self, tasks: Sequence[str]) -> list[dict[str, Any]]:
+        """Run every sub-task and return their results in the order given.
+
+        Each result has the ``task`` and either its ``result`` or an ``error``;
+        a failed sub-task does not affect the others. There is one result per
+        sub-task given: a repeated sub-task runs once and its result is
+        repeated, and a blank one gets an error.
+        """
+        unique = list(dict.fromkeys(task.strip() for task in tasks if task.strip()))
+        done = dict(zip(unique, await asyncio.gather(*(self._run_one(task) for task in unique))))
+        return [
+            dict(done[task.strip()]) if task.strip() else {"task": "", "error": "Empty sub-task"}
+            for task in tasks
+        ]
+
+    def as_tool(self, name: str = "parallel_research") -> BaseTool:
+        """Expose the scheduler as a tool taking a list of sub-tasks."""
+
+        async def parallel_research(tasks: list[str]) -> dict[str, Any]:
+            results = await self.arun(tasks)
+            return {
+                "results": results,
+                "completed": sum("result" in r for r in results),
+                "failed": sum("error" in r for r in results),
+            }
+
+        return StructuredTool.from_function(
+            coroutine=parallel_research,
+            name=name,
+            description=(
+                "Research several independent sub-tasks at once. Each sub-task is "
+                "handled by its own research assistant with internet search, and "
+                f"up to {self.max_concurrency} run in parallel. Give each sub-task "
+                "as a self-contained instruction; one answer is returned per "
+                "sub-task, in the same order."
+            ),
+        )
@@ -0,0 +1,339 @@
+"""Hybrid lexical and dense retrieval over the sections of workspace documents.
+
+``RetrievalIndex`` splits each markdown file into passages along the sections
+of ``react_agent.sections``, cutting sections longer than ``max_passage_bytes``
+at paragraph breaks, and indexes every passage twice:
+
+- in a ``BM25Index``, which matches exact terms such as names, tickers and
+  formula symbols, and
+- in a ``VectorIndex`` of embeddings, which matches paraphrases.
+
+A query runs against both and the two rankings are merged with reciprocal rank
+fusion, which needs no calibration between BM25 scores and cosine
+similarities.
+
+Embeddings come from any LangChain ``Embeddings``. The default,
+``HashingEmbeddings``, is local and needs no model; ``load_embeddings`` also
+accepts ``"provider:model"`` strings such as ``"openai:text-embedding-3-small"``
+or ``"huggingface:BAAI/bge-small-zh-v1.5"``. Passages and their vectors are
+persisted in ``workspace_cache_dir``. Only changed files are re-split, and only
+passages with new text are re-embedded.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, cast
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from react_agent.lexical import BM25Index
+from react_agent.sections import chunk_markdown
+from react_agent.vectors import HashingEmbeddings, VectorIndex
+from react_agent.workspace import workspace_cache_dir
+
+logger = logging.getLogger(__name__)
+
+_VERSION = 1
+_RRF_K = 60
+"""Rank offset of reciprocal rank fusion; 60 is the value from its paper."""
+_EMBED_BATCH = 64
+
+
+def load_embeddings(name: str) -> Embeddings:
+    """Return the embeddings named ``name``.
+
+    Args:
+        name: ``"hashing"`` for ``HashingEmbeddings``, or a
+            ``"provider:model"`` string for ``init_embeddings``.
+    """
+    if name in ("", "hashing"):
+        return HashingEmbeddings()
+    from langgraph.store.base.embed import ensure_embeddings
+
+    return ensure_embeddings(name)
+
+
+def _embeddings_key(embeddings: Embeddings) -> str:
+    # Identifies the vector space, so that vectors from another embedder or
+    # model are not reused.
+    cls = type(embeddings)
+    detail = getattr(embeddings, "model", None) or getattr(embeddings, "model_name", None)
+    if detail is None:
+        detail = getattr(embeddings, "dims", "")
+    return f"{cls.__module__}.{cls.__qualname__}:{detail}"
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+@dataclass(frozen=True)
+class Passage:
+    """A section of a markdown file, or part of a long one."""
+
+    section_id: str
+    path: str
+    heading: str
+    start: int
+    end: int
+    text: str
+
+    @property
+    def indexed_text(self) -> str:
+        """Return the text that is indexed, with the file and headings the passage is under."""
+        return f"{self.path}\n{self.heading}\n{self.text}"
+
+
+def _split(data: bytes, start: int, end: int, max_bytes: int) -> Iterator[tuple[int, int]]:
+    # Cut at the last paragraph break, or else line break, that keeps a part
+    # within ``max_bytes``, and never inside a UTF-8 character.
+    while end - start > max_bytes:
+        limit = start + max_bytes
+        cut = data.rfind(b"\n\n", start + 1, limit)
+        if cut < 0:
+            cut = data.rfind(b"\n", start + 1, limit)
+        if cut >= 0:
+            cut += 1
+        else:
+            cut = limit
+            while cut > start + 1 and data[cut] & 0xC0 == 0x80:
+                cut -= 1
+        yield start, cut
+        start = cut
+    yield start, end
+
+
+def split_passages(data: bytes, path: str, max_bytes: int = 1500) -> list[Passage]:
+    """Split a markdown document into passages of at most ``max_bytes`` bytes."""
+    passages = []
+    for section in chunk_markdown(data, path):
+        for start, end in _split(data, section.start, section.end, max_bytes):
+            text = data[start:end].decode("utf-8", "replace").strip()
+            if text:
+                passages.append(Passage(section.id, path, section.heading_path, start, end, text))
+    return passages
+
+
+@dataclass
+class _File:
+    size: int
+    mtime_ns: int
+    passages: list[Passage]
+
+
+class RetrievalIndex:
+    """BM25 and vector indexes over the passages of a workspace's markdown files."""
+
+    def __init__(
+        self,
+        root: str,
+        embeddings: Embeddings | None = None,
+        *,
+        path: str | Path | None = None,
+        max_passage_bytes: int = 1500,
+    ) -> None:
+        """Load the index of ``root``.
+
+        Args:
+            root: The workspace directory.
+            embeddings: Embeds passages and queries. Defaults to
+                ``HashingEmbeddings``.
+            path: Directory the index is persisted to. Defaults to
+                ``workspace_cache_dir(root)``.
+            max_passage_bytes: Sections longer than this are split.
+        """
+        self.root = os.path.abspath(root)
+        self.embeddings = embeddings or HashingEmbeddings()
+        self.path = Path(path) if path is not None else workspace_cache_dir(root)
+        self.max_passage_bytes = max_passage_bytes
+        self._key = _embeddings_key(self.embeddings)
+        self._files: dict[str, _File] = {}
+        self._vectors: dict[str, np.ndarray] = {}
+        """Embeddings by digest of their passage's indexed text."""
+        self._passages: list[Passage] = []
+        self._bm25: BM25Index | None = None
+        self._vector_index: VectorIndex | None = None
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load()
+
+    @property
+    def _files_path(self) -> Path:
+        # One index per embedder, so that switching back and forth keeps both.
+        return self.path / f"retrieval-{_digest(self._key)[:8]}.json"
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self._files_path.with_suffix(".npy")
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self._files_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if (
+            not isinstance(data, dict)
+            or data.get("version") != _VERSION
+            or data.get("root") != self.root
+            or data.get("max_passage_bytes") != self.max_passage_bytes
+        ):
+            return
+        for rel, entry in data["files"].items():
+            passages = [Passage(section_id, rel, *rest) for section_id, *rest in entry["passages"]]
+            self._files[rel] = _File(entry["size"], entry["mtime_ns"], passages)
+        if data.get("embeddings") != self._key:
+            return
+        try:
+            matrix = np.load(self._vectors_path, allow_pickle=False)
+        except (OSError, ValueError):
+            return
+        if len(matrix) == len(data["digests"]):
+            self._vectors = dict(zip(data["digests"], matrix))
+
+    def save(self) -> None:
+        """Write the index to its directory, if it changed since it was loaded or saved."""
+        with self._lock:
+            if not self._dirty:
+                return
+            digests = list(self._vectors)
+            matrix = np.array([self._vectors[d] for d in digests], dtype=np.float32)
+            data: dict[str, Any] = {
+                "version": _VERSION,
+                "root": self.root,
+                "max_passage_bytes": self.max_passage_bytes,
+                "embeddings": self._key,
+                "digests": digests,
+                "files": {
+                    rel: {
+                        "size": file.size,
+                        "mtime_ns": file.mtime_ns,
+                        "passages": [[p.section_id, p.heading, p.start, p.end, p.text] for p in file.passages],
+                    }
+                    for rel, file in self._files.items()
+                },
+            }
+            self._dirty = False
+        suffix = f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            # The vectors are written first; a reader that sees new passages
+            # with old vectors only re-embeds the passages it has no vector for.
+            with open(self._vectors_path.with_suffix(suffix), "wb") as f:
+                np.save(f, matrix, allow_pickle=False)
+            os.replace(self._vectors_path.with_suffix(suffix), self._vectors_path)
+            tmp = self._files_path.with_suffix(suffix)
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self._files_path)
+        except OSError as e:
+            logger.warning("Could not save the retrieval index to %s: %s", self.path, e)
+
+    def update(self, files: Iterable[str]) -> bool:
+        """Index exactly ``files``, re-splitting changed ones, and save the index.
+
+        Returns:
+            Whether the index changed.
+        """
+        with self._lock:
+            wanted = set(files)
+            changed = False
+            for rel in set(self._files) - wanted:
+                del self._files[rel]
+                changed = True
+            for rel in wanted:
+                full = os.path.join(self.root, rel)
+                try:
+                    stat = os.stat(full)
+                    file = self._files.get(rel)
+                    if file is not None and (file.size, file.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                        continue
+                    with open(full, "rb") as f:
+                        data = f.read()
+                except OSError:
+                    changed |= self._files.pop(rel, None) is not None
+                    continue
+                passages = split_passages(data, rel, self.max_passage_bytes)
+                self._files[rel] = _File(stat.st_size, stat.st_mtime_ns, passages)
+                changed = True
+            if changed or self._bm25 is None:
+                self._rebuild()
+            self._dirty |= changed
+        self.save()
+        return changed
+
+    def _rebuild(self) -> None:
+        passages = [p for rel in sorted(self._files) for p in self._files[rel].passages]
+        digests = [_digest(p.indexed_text) for p in passages]
+        missing = list({d: p.indexed_text for d, p in zip(digests, passages) if d not in self._vectors}.items())
+        for i in range(0, len(missing), _EMBED_BATCH):
+            batch = missing[i : i + _EMBED_BATCH]
+            vectors = self.embeddings.embed_documents([text for _, text in batch])
+            self._vectors.update((d, np.asarray(v, dtype=np.float32)) for (d, _), v in zip(batch, vectors))
+        if missing:
+            self._dirty = True
+        # Drop vectors of passages that no longer exist.
+        live = set(digests)
+        if len(self._vectors) > len(live):
+            self._vectors = {d: v for d, v in self._vectors.items() if d in live}
+            self._dirty = True
+        self._passages = passages
+        self._bm25 = BM25Index(p.indexed_text for p in passages)
+        self._vector_index = None
+        if passages:
+            self._vector_index = VectorIndex(len(self._vectors[digests[0]]))
+            self._vector_index.add_many(list(range(len(passages))), [self._vectors[d] for d in digests])
+
+    def __len__(self) -> int:
+        """Return the number of indexed passages."""
+        return len(self._passages)
+
+    def search(self, query: str, k: int = 5, candidates: int = 50) -> list[tuple[Passage, float]]:
+        """Return the ``k`` passages best matching ``query``, best first.
+
+        Args:
+            query: The query.
+            k: Number of passages returned.
+            candidates: Number of passages taken from each ranking before
+                fusing them.
+
+        Returns:
+            Passages with their fused score, the sum of ``1 / (60 + rank)``
+            over the rankings they appear in.
+        """
+        with self._lock:
+            if not self._passages or self._bm25 is None or self._vector_index is None:
+                return []
+            passages, bm25, vector_index = self._passages, self._bm25, self._vector_index
+        query_vector = self.embeddings.embed_query(query)
+        scores: dict[int, float] = {}
+        lexical = [i for i, score in bm25.top_k(query, candidates) if score > 0]
+        dense = [cast(int, i) for i, _ in vector_index.search(query_vector, candidates)]
+        for ranking in (lexical, dense):
+            for rank, i in enumerate(ranking):
+                scores[i] = scores.get(i, 0.0) + 1 / (_RRF_K + rank + 1)
+        best = sorted(scores.items(), key=lambda item: -item[1])[:k]
+        return [(passages[i], score) for i, score in best]
+
+
+def retrieval_index(root: str, embeddings: str = "hashing") -> RetrievalIndex:
+    """Return the process-wide retrieval index of the workspace ``root``.
+
+    Args:
+        root: The workspace directory.
+        embeddings: Name of the embeddings, as accepted by ``load_embeddings``.
+    """
+    return _retrieval_index(os.path.abspath(root), embeddings)
+
+
+@functools.lru_cache(maxsize=16)
+def _retrieval_index(root: str, embeddings: str) -> RetrievalIndex:
+    return RetrievalIndex(root, load_embeddings(embeddings))
@@ -0,0 +1,236 @@
+"""Route each model call to the cheapest model tier that can handle it.
+
+``ModelRouterMiddleware`` looks at a few features of the step about to run,
+which are cheap to compute from the request:
+
+- how many tool results arrived since the model last spoke,
+- how many tokens the prompt has,
+- whether the last tool call failed,
+
+and asks a policy for a route name. Models come from a ``ModelPool``, which
+builds each client on first use and then reuses it, so a tier that is never
+chosen is never constructed. Per-route calls, errors, latency, token usage
+and estimated cost are recorded and available from ``metrics()``, so the
+thresholds can be tuned against real traffic::
+
+    pool = ModelPool({"fast": lambda: ChatOpenAI(...), "strong": lambda: ChatOpenAI(...)})
+    router = ModelRouterMiddleware(pool, prices={"strong": (0.002, 0.008)})
+    agent = create_agent(pool.get("fast"), tools, middleware=[router])
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+
+from react_agent.stats import milliseconds, quantile
+from react_agent.tokens import TokenCounter
+
+
+class ModelPool:
+    """Lazily built, cached chat model clients keyed by route name."""
+
+    def __init__(self, factories: Mapping[str, Callable[[], BaseChatModel]]) -> None:
+        """Initialize the pool.
+
+        Args:
+            factories: Function building the model for each route name. Each
+                is called at most once, the first time its route is used.
+        """
+        self._factories = dict(factories)
+        self._models: dict[str, BaseChatModel] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def routes(self) -> list[str]:
+        """Return the route names, in the order they were given."""
+        return list(self._factories)
+
+    def get(self, route: str) -> BaseChatModel:
+        """Return the model for ``route``, building it on first use."""
+        model = self._models.get(route)
+        if model is None:
+            with self._lock:
+                model = self._models.get(route)
+                if model is None:
+                    model = self._models[route] = self._factories[route]()
+        return model
+
+
+@dataclass(frozen=True)
+class StepFeatures:
+    """What the router knows about a model call before making it."""
+
+    pending_tool_results: int
+    """Tool results received since the last model message."""
+    prompt_tokens: int
+    last_step_errored: bool
+    """Whether any of the pending tool results is an error."""
+
+
+def _is_error(message: ToolMessage) -> bool:
+    if message.status == "error":
+        return True
+    text = message.text.lstrip()
+    return text.startswith(("Error", "Tool error", '{"error"'))
+
+
+def step_features(messages: Sequence[AnyMessage], count_tokens: Callable[[Sequence[AnyMessage]], int]) -> StepFeatures:
+    """Compute the routing features of a model call on ``messages``."""
+    pending: list[ToolMessage] = []
+    for message in reversed(messages):
+        if not isinstance(message, ToolMessage):
+            break
+        pending.append(message)
+    return StepFeatures(
+        pending_tool_results=len(pending),
+        prompt_tokens=count_tokens(messages),
+        last_step_errored=any(_is_error(m) for m in pending),
+    )
+
+
+@dataclass(frozen=True)
+class ComplexityPolicy:
+    """Pick a tier by counting the signals that a step is hard.
+
+    Each of a failed tool call, a prompt of at least ``long_prompt_tokens`` and
+    at least ``many_tool_results`` pending tool results adds one to the score;
+    the step goes to ``tiers[score]``, capped at the last tier. With two tiers
+    any one signal escalates; with three, one signal picks the middle tier.
+    """
+
+    tiers: Sequence[str] = ("fast", "strong")
+    long_prompt_tokens: int = 8000
+    many_tool_results: int = 3
+
+    def __call__(self, features: StepFeatures) -> str:
+        """Return the route for a step."""
+        score = (
+            int(features.last_step_errored)
+            + int(features.prompt_tokens >= self.long_prompt_tokens)
+            + int(features.pending_tool_results >= self.many_tool_results)
+        )
+        return self.tiers[min(score, len(self.tiers) - 1)]
+
+
+@dataclass
+class RouteStats:
+    """Calls made on one route."""
+
+    calls: int = 0
+    errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+    latencies: deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def quantile(self, q: float) -> float | None:
+        """Return the ``q`` quantile (0 to 1) of recent latencies, in seconds."""
+        return quantile(self.latencies, q)
+
+
+class ModelRouterMiddleware(AgentMiddleware):
+    """Send each model call to a model tier chosen from cheap step features."""
+
+    def __init__(
+        self,
+        pool: ModelPool,
+        policy: Callable[[StepFeatures], str] | None = None,
+        *,
+        token_counter: Callable[[Sequence[AnyMessage]], int] | None = None,
+        prices: Mapping[str, tuple[float, float]] | None = None,
+    ) -> None:
+        """Initialize the middleware.
+
+        Args:
+            pool: Models to route between. Every name the policy returns must
+                be one of its routes.
+            policy: Maps the features of a step to a route name. Defaults to a
+                ``ComplexityPolicy`` over the pool's routes, cheapest first.
+            token_counter: Counts the prompt's tokens. Defaults to a cached
+                ``TokenCounter``.
+            prices: Per-route price per 1,000 input and output tokens, used for
+                the cost estimate.
+        """
+        super().__init__()
+        self.pool = pool
+        self.policy = policy or ComplexityPolicy(tiers=tuple(pool.routes))
+        self.count_tokens = token_counter or TokenCounter()
+        self.prices = dict(prices or {})
+        self._stats: dict[str, RouteStats] = {}
+        self._lock = threading.Lock()
+
+    def route(self, request: ModelRequest) -> str:
+        """Return the route chosen for ``request``."""
+        return self.policy(step_features(request.messages, self.count_tokens))
+
+    def _record(self, route: str, seconds: float, response: ModelResponse | AIMessage | None) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(route, RouteStats())
+            stats.calls += 1
+            stats.latencies.append(seconds)
+            if response is None:
+                stats.errors += 1
+                return
+            messages = [response] if isinstance(response, AIMessage) else response.result
+            for message in messages:
+                usage = message.usage_metadata if isinstance(message, AIMessage) else None
+                if usage:
+                    stats.input_tokens += usage["input_tokens"]
+                    stats.output_tokens += usage["output_tokens"]
+                    input_price, output_price = self.prices.get(route, (0.0, 0.0))
+                    stats.cost += (usage["input_tokens"] * input_price + usage["output_tokens"] * output_price) / 1000
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Sync: call the model of the chosen route."""
+        route = self.route(request)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = handler(request.override(model=self.pool.get(route)))
+            return response
+        finally:
+            self._record(route, time.perf_counter() - start, response)
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """Async: call the model of the chosen route."""
+        route = self.route(request)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await handler(request.override(model=self.pool.get(route)))
+            return response
+        finally:
+            self._record(route, time.perf_counter() - start, response)
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """Return per-route call counts, token usage, cost and latency percentiles."""
+        with self._lock:
+            return {
+                route: {
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "input_tokens": stats.input_tokens,
+                    "output_tokens": stats.output_tokens,
+                    "cost": round(stats.cost, 6),
+                    "latency_p50_ms": milliseconds(stats.quantile(0.5)),
+                    "latency_p95_ms": milliseconds(stats.quantile(0.95)),
+                }
+                for route, stats in self._stats.items()
+            }
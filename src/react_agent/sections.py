@@ -0,0 +1,299 @@
+"""Markdown sections of workspace documents, with stable ids and byte offsets.
+
+``chunk_markdown`` splits a markdown document at its ATX headings (``#`` to
+``######``, outside fenced code blocks). Each section covers one heading and
+the text under it up to the next heading, and records
+
+- its heading path, e.g. ``("Momentum", "Time-series momentum")``, and
+- its byte range in the file, alone and with its subsections, so that it is
+  read back with one seek and one read rather than by loading the document.
+
+Text before the first heading is a section with an empty heading path.
+
+Section ids are digests of the file path, the heading path and, for repeated
+headings, their occurrence number, so an id stays the same when other parts of
+the document are edited.
+
+``SectionIndex`` holds the sections of a workspace's markdown files. Files are
+rechunked when their size or modification time changes, and the index is
+persisted as JSON next to the workspace's other derived indexes (see
+``workspace_cache_dir``), so a restart only rechunks files that changed.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from react_agent.workspace import workspace_cache_dir
+
+logger = logging.getLogger(__name__)
+
+_VERSION = 1
+_HEADING = re.compile(rb"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(rb"^ {0,3}(`{3,}|~{3,})")
+_SPACE = re.compile(r"\s+")
+
+HEADING_SEPARATOR = " > "
+"""Separator of the headings in a heading path written as text."""
+
+
+def section_id(path: str, headings: tuple[str, ...], occurrence: int = 0) -> str:
+    """Return the id of the ``occurrence``-th section with ``headings`` in ``path``."""
+    key = "\0".join([path.replace(os.sep, "/"), *headings, str(occurrence)])
+    return hashlib.blake2b(key.encode(), digest_size=6).hexdigest()
+
+
+@dataclass(frozen=True)
+class Section:
+    """A heading of a markdown file and the text under it."""
+
+    id: str
+    path: str
+    """The file, relative to the workspace."""
+    headings: tuple[str, ...]
+    """Titles of the enclosing headings and of this one, outermost first."""
+    level: int
+    """Heading level, from 1 to 6, or 0 for text before the first heading."""
+    start: int
+    end: int
+    """Byte offset of the next heading."""
+    subtree_end: int
+    """Byte offset of the next heading that is not a subsection of this one."""
+
+    @property
+    def heading_path(self) -> str:
+        """Return the heading path as text."""
+        return HEADING_SEPARATOR.join(self.headings)
+
+
+def chunk_markdown(data: bytes, path: str) -> list[Section]:
+    """Split a markdown document into sections.
+
+    Args:
+        data: The document's bytes. Offsets refer to them.
+        path: The document's path relative to the workspace, used for ids.
+    """
+    starts: list[tuple[int, int, str]] = []
+    fence: bytes | None = None
+    offset = 0
+    for line in data.splitlines(keepends=True):
+        text = line.rstrip(b"\r\n")
+        if fence is not None:
+            # A fence is closed by a run of the same character at least as long.
+            if text.lstrip(b" ").startswith(fence) and not text.strip().strip(fence[:1]):
+                fence = None
+        elif match := _FENCE.match(text):
+            fence = match.group(1)
+        elif match := _HEADING.match(text):
+            title = (match.group(2) or b"").decode("utf-8", "replace")
+            starts.append((offset, len(match.group(1)), _SPACE.sub(" ", title).strip()))
+        offset += len(line)
+    first = starts[0][0] if starts else len(data)
+    if data[:first].strip():
+        starts.insert(0, (0, 0, ""))
+
+    sections: list[Section] = []
+    stack: list[tuple[int, str]] = []
+    seen: Counter[tuple[str, ...]] = Counter()
+    for i, (start, level, title) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(data)
+        subtree_end = end
+        if level:
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, title))
+            subtree_end = next((s for s, lv, _ in starts[i + 1 :] if lv <= level), len(data))
+        headings = tuple(t for _, t in stack)
+        sections.append(
+            Section(section_id(path, headings, seen[headings]), path, headings, level, start, end, subtree_end)
+        )
+        seen[headings] += 1
+    return sections
+
+
+def _normalize(heading: str) -> str:
+    return _SPACE.sub(" ", heading).strip().casefold()
+
+
+@dataclass
+class _File:
+    size: int
+    mtime_ns: int
+    sections: list[Section]
+
+
+class SectionIndex:
+    """The sections of a workspace's markdown files, kept current and persisted."""
+
+    def __init__(self, root: str, path: str | Path | None = None) -> None:
+        """Load the index of ``root``.
+
+        Args:
+            root: The workspace directory.
+            path: JSON file the index is persisted to. Defaults to
+                ``sections.json`` in ``workspace_cache_dir(root)``.
+        """
+        self.root = os.path.abspath(root)
+        self.path = Path(path) if path is not None else workspace_cache_dir(root) / "sections.json"
+        self._files: dict[str, _File] = {}
+        self._ids: dict[str, Section] = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("version") != _VERSION or data.get("root") != self.root:
+            return
+        for rel, entry in data["files"].items():
+            sections = [
+                Section(id, rel, tuple(headings), level, start, end, subtree_end)
+                for id, headings, level, start, end, subtree_end in entry["sections"]
+            ]
+            self._put(rel, _File(entry["size"], entry["mtime_ns"], sections))
+
+    def _put(self, rel: str, file: _File | None) -> None:
+        old = self._files.pop(rel, None)
+        for section in old.sections if old is not None else []:
+            self._ids.pop(section.id, None)
+        if file is not None:
+            self._files[rel] = file
+            self._ids.update((section.id, section) for section in file.sections)
+
+    def save(self) -> None:
+        """Write the index to its file, if it changed since it was loaded or saved."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data: dict[str, Any] = {"version": _VERSION, "root": self.root, "files": {}}
+            for rel, file in self._files.items():
+                data["files"][rel] = {
+                    "size": file.size,
+                    "mtime_ns": file.mtime_ns,
+                    "sections": [
+                        [s.id, s.headings, s.level, s.start, s.end, s.subtree_end] for s in file.sections
+                    ],
+                }
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError as e:
+            # The index is rebuilt from the files when it cannot be persisted.
+            logger.warning("Could not save the section index to %s: %s", self.path, e)
+
+    def sections(self, rel: str) -> list[Section]:
+        """Return the sections of the markdown file ``rel``, rechunking it if it changed.
+
+        Raises:
+            OSError: If the file cannot be read. It is dropped from the index.
+        """
+        full = os.path.join(self.root, rel)
+        with self._lock:
+            try:
+                stat = os.stat(full)
+                file = self._files.get(rel)
+                if file is not None and (file.size, file.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+                    return file.sections
+                with open(full, "rb") as f:
+                    data = f.read()
+            except OSError:
+                if rel in self._files:
+                    self._put(rel, None)
+                    self._dirty = True
+                raise
+            file = _File(stat.st_size, stat.st_mtime_ns, chunk_markdown(data, rel))
+            self._put(rel, file)
+            self._dirty = True
+            return file.sections
+
+    def update(self, files: Iterable[str]) -> int:
+        """Index exactly ``files``, rechunking changed ones, and save the index.
+
+        Returns:
+            The number of sections in the index.
+        """
+        with self._lock:
+            wanted = set(files)
+            for rel in wanted:
+                try:
+                    self.sections(rel)
+                except OSError:
+                    continue
+            for rel in set(self._files) - wanted:
+                self._put(rel, None)
+                self._dirty = True
+            count = len(self._ids)
+        self.save()
+        return count
+
+    def get(self, id: str) -> Section | None:
+        """Return the section with ``id``, checking its file for changes first."""
+        with self._lock:
+            section = self._ids.get(id)
+            if section is None:
+                return None
+            try:
+                self.sections(section.path)
+            except OSError:
+                return None
+            return self._ids.get(id)
+
+    def find(self, rel: str, heading_path: str) -> list[Section]:
+        """Return the sections of ``rel`` whose heading path ends with ``heading_path``.
+
+        Headings are separated by ``HEADING_SEPARATOR`` and compared ignoring
+        case and spacing. Exact matches of the whole heading path are preferred
+        over matches of its last headings.
+        """
+        wanted = [_normalize(h) for h in heading_path.split(HEADING_SEPARATOR.strip())]
+        exact, matches = [], []
+        for section in self.sections(rel):
+            headings = [_normalize(h) for h in section.headings]
+            if headings == wanted:
+                exact.append(section)
+            elif headings[-len(wanted) :] == wanted:
+                matches.append(section)
+        return exact or matches
+
+    def read(self, section: Section, *, subsections: bool = False, max_bytes: int | None = None) -> str:
+        """Return the text of ``section``, read from its byte range.
+
+        Args:
+            section: A section returned by this index.
+            subsections: Include the text of its subsections.
+            max_bytes: Read at most this many bytes.
+        """
+        end = section.subtree_end if subsections else section.end
+        length = end - section.start if max_bytes is None else min(end - section.start, max_bytes)
+        with open(os.path.join(self.root, section.path), "rb") as f:
+            f.seek(section.start)
+            data = f.read(length)
+        # A cut at ``max_bytes`` may split a character.
+        return data.decode("utf-8", "ignore" if length < end - section.start else "replace")
+
+
+def section_index(root: str) -> SectionIndex:
+    """Return the process-wide section index of the workspace ``root``."""
+    return _section_index(os.path.abspath(root))
+
+
+@functools.lru_cache(maxsize=16)
+def _section_index(root: str) -> SectionIndex:
+    return SectionIndex(root)
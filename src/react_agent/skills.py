@@ -0,0 +1,332 @@
+"""Progressive skill disclosure for agents built with ``create_agent``.
+
+Skills are markdown files with a small front matter header::
+
+    ---
+    name: sales_analytics
+    description: Database schema and business logic for sales data analysis.
+    ---
+    # Sales Analytics Schema
+    ...
+
+Only the header is read at startup. Skill bodies stay on disk until the agent
+calls ``load_skill`` and are then kept in a bounded LRU, so a library of
+hundreds of skills costs a few hundred short strings of memory.
+
+When the library is larger than the middleware's ``top_k``, only the skills
+most relevant to the latest user message are disclosed in the system prompt;
+the rest stay reachable through the ``search_skills`` tool.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AnyMessage, HumanMessage, SystemMessage
+from langchain_core.tools import BaseTool, StructuredTool
+
+from react_agent.lexical import BM25Index
+
+_FRONT_MATTER = "---"
+
+
+@dataclass(frozen=True)
+class SkillMetadata:
+    """What is known about a skill without reading its body."""
+
+    name: str
+    description: str
+    path: Path
+    body_offset: int
+    """Byte offset of the body within ``path``, just past the front matter."""
+
+
+def read_skill_metadata(path: Path) -> SkillMetadata:
+    """Parse the front matter of a skill file, stopping at its closing ``---``.
+
+    Raises:
+        ValueError: If the file has no front matter or lacks ``name``/``description``.
+    """
+    fields: dict[str, str] = {}
+    with open(path, "rb") as f:
+        if f.readline().decode("utf-8").strip() != _FRONT_MATTER:
+            raise ValueError(f"Skill file has no front matter: {path}")
+        for raw in f:
+            line = raw.decode("utf-8").strip()
+            if line == _FRONT_MATTER:
+                break
+            key, sep, value = line.partition(":")
+            if sep:
+                fields[key.strip()] = value.strip()
+        else:
+            raise ValueError(f"Unterminated front matter in skill file: {path}")
+        body_offset = f.tell()
+
+    if "name" not in fields or "description" not in fields:
+        raise ValueError(f"Skill file must define name and description: {path}")
+    return SkillMetadata(
+        name=fields["name"],
+        description=fields["description"],
+        path=path,
+        body_offset=body_offset,
+    )
+
+
+class SkillRegistry:
+    """Name-indexed skill metadata with lazily loaded, LRU-cached bodies."""
+
+    def __init__(self, skills: list[SkillMetadata], *, max_loaded: int = 32) -> None:
+        """Index ``skills`` by name.
+
+        Args:
+            skills: Skill metadata, typically from ``from_directory``.
+            max_loaded: Number of skill bodies kept in memory after loading.
+        """
+        self._index: dict[str, SkillMetadata] = {s.name: s for s in skills}
+        self._loaded: OrderedDict[str, str] = OrderedDict()
+        self._reading: dict[str, asyncio.Future[str]] = {}
+        self.max_loaded = max_loaded
+        self._skills = list(self._index.values())
+        self._lexical = BM25Index(f"{s.name} {s.description}" for s in self._skills)
+        self.prompt = format_skill_list(self._skills)
+        """The full skill list, built once."""
+
+    @classmethod
+    def from_directory(
+        cls, directory: str | Path, *, pattern: str = "*.md", max_loaded: int = 32
+    ) -> SkillRegistry:
+        """Read the front matter of every skill file in ``directory``."""
+        paths = sorted(Path(directory).glob(pattern))
+        return cls([read_skill_metadata(p) for p in paths], max_loaded=max_loaded)
+
+    def __len__(self) -> int:
+        """Return the number of registered skills."""
+        return len(self._index)
+
+    def __contains__(self, name: object) -> bool:
+        """Return whether a skill called ``name`` is registered."""
+        return name in self._index
+
+    def get(self, name: str) -> SkillMetadata | None:
+        """Return the metadata of a skill, or ``None`` if it is unknown."""
+        return self._index.get(name)
+
+    def names(self) -> list[str]:
+        """Return the names of all registered skills."""
+        return list(self._index)
+
+    def search(self, query: str, k: int) -> list[SkillMetadata]:
+        """Return the ``k`` skills whose name and description best match ``query``.
+
+        Skills that do not match at all keep their registry order, so an
+        unrelated query still yields a stable selection.
+        """
+        return [self._skills[i] for i, _ in self._lexical.top_k(query, k)]
+
+    def load(self, name: str) -> str | None:
+        """Return the body of a skill, reading it from disk on a cache miss."""
+        if name in self._loaded:
+            self._loaded.move_to_end(name)
+            return self._loaded[name]
+        skill = self._index.get(name)
+        if skill is None:
+            return None
+        content = _read_body(skill)
+        self._remember(name, content)
+        return content
+
+    async def aload(self, name: str) -> str | None:
+        """Async version of ``load``.
+
+        Cached bodies are returned without leaving the event loop. A miss reads
+        the file in a worker thread, and concurrent misses for the same skill
+        share one read.
+        """
+        if name in self._loaded:
+            self._loaded.move_to_end(name)
+            return self._loaded[name]
+        skill = self._index.get(name)
+        if skill is None:
+            return None
+        pending = self._reading.get(name)
+        if pending is None:
+            pending = asyncio.ensure_future(asyncio.to_thread(_read_body, skill))
+            self._reading[name] = pending
+            try:
+                content = await asyncio.shield(pending)
+            finally:
+                del self._reading[name]
+            self._remember(name, content)
+            return content
+        return await asyncio.shield(pending)
+
+    def _remember(self, name: str, content: str) -> None:
+        self._loaded[name] = content
+        self._loaded.move_to_end(name)
+        while len(self._loaded) > self.max_loaded:
+            self._loaded.popitem(last=False)
+
+
+def _read_body(skill: SkillMetadata) -> str:
+    with open(skill.path, "rb") as f:
+        f.seek(skill.body_offset)
+        return f.read().decode("utf-8")
+
+
+def format_skill_list(skills: list[SkillMetadata]) -> str:
+    """Format skills as the markdown list shown to the model."""
+    return "\n".join(f"- **{s.name}**: {s.description}" for s in skills)
+
+
+def create_load_skill_tool(registry: SkillRegistry) -> BaseTool:
+    """Create the ``load_skill`` tool backed by ``registry``."""
+
+    def load_skill(skill_name: str) -> str:
+        """Load the full content of a skill into the agent's context.
+
+        Use this when you need detailed information about how to handle a specific
+        type of request. This will provide you with comprehensive instructions,
+        policies, and guidelines for the skill area.
+
+        Args:
+            skill_name: The name of the skill to load (e.g., "sales_analytics", "inventory_management")
+        """
+        return _format_loaded(skill_name, registry.load(skill_name))
+
+    async def aload_skill(skill_name: str) -> str:
+        return _format_loaded(skill_name, await registry.aload(skill_name))
+
+    def _format_loaded(skill_name: str, content: str | None) -> str:
+        if content is None:
+            available = ", ".join(registry.names())
+            return f"Skill '{skill_name}' not found. Available skills: {available}"
+        return f"Loaded skill: {skill_name}\n\n{content}"
+
+    return StructuredTool.from_function(
+        func=load_skill, coroutine=aload_skill, parse_docstring=True
+    )
+
+
+def create_search_skills_tool(registry: SkillRegistry) -> BaseTool:
+    """Create the ``search_skills`` tool backed by ``registry``."""
+
+    def search_skills(query: str, k: int = 5) -> str:
+        """Search the skill library for skills that are not listed in the system prompt.
+
+        Args:
+            query: Keywords describing the kind of request to handle.
+            k: Maximum number of skills to return.
+        """
+        skills = registry.search(query, k)
+        if not skills:
+            return "No skills are available."
+        return format_skill_list(skills)
+
+    async def asearch_skills(query: str, k: int = 5) -> str:
+        # Ranking is in-memory and fast; running it inline avoids the thread
+        # pool that a sync-only tool would be dispatched to.
+        return search_skills(query, k)
+
+    return StructuredTool.from_function(
+        func=search_skills, coroutine=asearch_skills, parse_docstring=True
+    )
+
+
+def _latest_user_text(messages: list[AnyMessage]) -> str:
+    for message in reversed(messages):
+        if isinstance(message, HumanMessage):
+            return message.text
+    return ""
+
+
+class SkillMiddleware(AgentMiddleware):
+    """Middleware that injects skill descriptions into the system prompt."""
+
+    def __init__(
+        self, registry: SkillRegistry, *, top_k: int = 10, max_cached_prompts: int = 128
+    ) -> None:
+        """Register the skill tools.
+
+        Args:
+            registry: The skills to disclose.
+            top_k: Maximum number of skills listed in the system prompt. Larger
+                libraries are ranked against the latest user message and the
+                ``search_skills`` tool is registered for the rest.
+            max_cached_prompts: Number of extended system messages kept, keyed
+                by base message and disclosed skills.
+        """
+        self.registry = registry
+        self.top_k = top_k
+        self.ranked = len(registry) > top_k
+        self.tools = [create_load_skill_tool(registry)]
+        if self.ranked:
+            self.tools.append(create_search_skills_tool(registry))
+        self.max_cached_prompts = max_cached_prompts
+        # The agent passes the same base system message on every call, so an
+        # extended message is built once per base message and skill selection.
+        self._system_messages: OrderedDict[
+            tuple[int, tuple[str, ...]], tuple[SystemMessage | None, SystemMessage]
+        ] = OrderedDict()
+
+    def _addendum(self, skills: list[SkillMetadata]) -> str:
+        if not self.ranked:
+            return (
+                f"\n\n## Available Skills\n\n{self.registry.prompt}\n\n"
+                "Use the load_skill tool when you need detailed information "
+                "about handling a specific type of request."
+            )
+        return (
+            f"\n\n## Available Skills\n\n{format_skill_list(skills)}\n\n"
+            f"These are the {len(skills)} skills most relevant to the request, out of "
+            f"{len(self.registry)}. Use the search_skills tool to find others and the "
+            "load_skill tool when you need detailed information about handling a "
+            "specific type of request."
+        )
+
+    def select_skills(self, messages: list[AnyMessage]) -> list[SkillMetadata]:
+        """Return the skills to disclose for a conversation."""
+        if not self.ranked:
+            return []
+        return self.registry.search(_latest_user_text(messages), self.top_k)
+
+    def _extend(
+        self, base: SystemMessage | None, skills: list[SkillMetadata]
+    ) -> SystemMessage:
+        key = (id(base), tuple(s.name for s in skills))
+        cached = self._system_messages.get(key)
+        if cached is not None and cached[0] is base:
+            self._system_messages.move_to_end(key)
+            return cached[1]
+        blocks: list[Any] = list(base.content_blocks) if base is not None else []
+        blocks.append({"type": "text", "text": self._addendum(skills)})
+        system_message = SystemMessage(content=blocks)
+        self._system_messages[key] = (base, system_message)
+        while len(self._system_messages) > self.max_cached_prompts:
+            self._system_messages.popitem(last=False)
+        return system_message
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Sync: Inject skill descriptions into system prompt."""
+        skills = self.select_skills(request.messages)
+        system_message = self._extend(request.system_message, skills)
+        return handler(request.override(system_message=system_message))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """Async: Inject skill descriptions into system prompt."""
+        skills = self.select_skills(request.messages)
+        system_message = self._extend(request.system_message, skills)
+        return await handler(request.override(system_message=system_message))
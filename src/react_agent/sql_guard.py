@@ -0,0 +1,258 @@
+"""Execution guard for agent-generated SQL queries.
+
+Queries written by the model (e.g. in the ``generate_query`` step of the SQL
+agent) can contain accidental cartesian joins that run for minutes. The guard
+estimates the cost of a query from ``EXPLAIN QUERY PLAN`` before running it and
+enforces a wall-clock budget through SQLite's progress handler, returning a
+structured error the model can use to rewrite the query instead of hanging.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from langchain_core.tools import BaseTool, StructuredTool
+
+_TABLE_REF = re.compile(
+    r"(?:\bfrom|\bjoin|,)\s*[\"`\[]?(\w+)[\"`\]]?(?:\s+(?:as\s+)?[\"`\[]?(\w+)[\"`\]]?)?",
+    re.IGNORECASE,
+)
+_SQL_KEYWORDS = {
+    "where", "on", "using", "join", "inner", "left", "right", "full", "cross",
+    "natural", "group", "order", "limit", "union", "except", "intersect", "having",
+}
+
+
+@dataclass
+class PlanStep:
+    """A single row of ``EXPLAIN QUERY PLAN`` output."""
+
+    id: int
+    parent: int
+    detail: str
+    children: list[PlanStep] = field(default_factory=list)
+
+
+@dataclass
+class QueryCost:
+    """The estimated cost of a query."""
+
+    estimated_rows: int
+    """Upper bound on the number of rows visited, multiplied across nested loops."""
+
+    full_scans: list[str]
+    """Tables (or aliases) that are scanned without an index."""
+
+    plan: list[str]
+    """The raw plan details, in plan order."""
+
+    @property
+    def is_cartesian(self) -> bool:
+        """Return whether the plan fully scans more than one table."""
+        return len(self.full_scans) > 1
+
+
+class SQLQueryGuard:
+    """Run read-only SQLite queries under a cost estimate and a time budget.
+
+    Example:
+        guard = SQLQueryGuard("Chinook.db", timeout_seconds=5)
+        run_query_tool = guard.as_tool()
+    """
+
+    def __init__(
+        self,
+        database: str | Path,
+        *,
+        timeout_seconds: float = 5.0,
+        max_estimated_rows: int = 5_000_000,
+        max_result_rows: int = 100,
+        default_table_rows: int = 1_000,
+        progress_interval: int = 1_000,
+    ) -> None:
+        """Initialize the guard.
+
+        Args:
+            database: Path to the SQLite database file.
+            timeout_seconds: Wall-clock budget for executing a single query.
+            max_estimated_rows: Queries whose plan visits more rows are rejected
+                without being executed.
+            max_result_rows: Maximum number of result rows returned to the model.
+            default_table_rows: Row estimate for plan steps whose table size is
+                unknown (CTEs, subqueries, views).
+            progress_interval: Number of SQLite VM instructions between
+                deadline checks.
+        """
+        self.database = Path(database)
+        self.timeout_seconds = timeout_seconds
+        self.max_estimated_rows = max_estimated_rows
+        self.max_result_rows = max_result_rows
+        self.default_table_rows = default_table_rows
+        self.progress_interval = progress_interval
+        self._table_rows: dict[str, int] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        # mode=ro makes DML/DDL fail at the SQLite level, whatever the model writes.
+        # as_uri() percent-encodes "?", "#" and "%" so they stay part of the path.
+        return sqlite3.connect(f"{self.database.resolve().as_uri()}?mode=ro", uri=True)
+
+    def _rows_in(self, conn: sqlite3.Connection, table: str) -> int:
+        """Estimate the number of rows in ``table`` cheaply and cache it."""
+        key = table.lower()
+        if key not in self._table_rows:
+            try:
+                # max(rowid) is a single b-tree descent, unlike count(*).
+                row = conn.execute(f'SELECT max(rowid) FROM "{table}"').fetchone()
+                self._table_rows[key] = int(row[0] or 0)
+            except sqlite3.Error:
+                self._table_rows[key] = self.default_table_rows
+        return self._table_rows[key]
+
+    def _known_tables(self, conn: sqlite3.Connection) -> set[str]:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        ).fetchall()
+        return {name.lower() for (name,) in rows}
+
+    def explain(self, query: str, conn: sqlite3.Connection | None = None) -> QueryCost:
+        """Estimate the cost of ``query`` from its query plan.
+
+        Sibling ``SCAN``/``SEARCH`` steps form nested loops, so their row
+        estimates are multiplied; independent sub-plans (subqueries, compound
+        selects) are added. Index lookups (``SEARCH``) count as one row.
+        """
+        own_conn = conn is None
+        conn = conn or self._connect()
+        try:
+            raw = conn.execute(f"EXPLAIN QUERY PLAN {query}").fetchall()
+            tables = self._known_tables(conn)
+            aliases: dict[str, str] = {}
+            for table, alias in _TABLE_REF.findall(query):
+                aliases.setdefault(table.lower(), table)
+                if alias and alias.lower() not in _SQL_KEYWORDS:
+                    aliases[alias.lower()] = table
+
+            steps = {0: PlanStep(id=0, parent=-1, detail="")}
+            for step_id, parent, _, detail in raw:
+                steps[step_id] = PlanStep(id=step_id, parent=parent, detail=detail)
+            for step in list(steps.values())[1:]:
+                steps.get(step.parent, steps[0]).children.append(step)
+
+            full_scans: list[str] = []
+
+            def step_rows(step: PlanStep) -> int | None:
+                words = step.detail.split()
+                if len(words) < 2 or words[0] not in ("SCAN", "SEARCH"):
+                    return None
+                if words[0] == "SEARCH" or words[1] == "CONSTANT":
+                    return 1
+                name = aliases.get(words[1].lower(), words[1])
+                full_scans.append(name)
+                if name.lower() in tables:
+                    return self._rows_in(conn, name)
+                return self.default_table_rows
+
+            def subtree_cost(step: PlanStep) -> int:
+                loop, extra = 1, 0
+                has_loop = False
+                for child in step.children:
+                    rows = step_rows(child)
+                    if rows is not None:
+                        has_loop = True
+                        loop *= max(rows, 1)
+                    extra += subtree_cost(child)
+                return (loop if has_loop else 0) + extra
+
+            return QueryCost(
+                estimated_rows=subtree_cost(steps[0]),
+                full_scans=full_scans,
+                plan=[detail for *_, detail in raw],
+            )
+        finally:
+            if own_conn:
+                conn.close()
+
+    def run(self, query: str) -> dict[str, Any]:
+        """Execute ``query`` under the guard.
+
+        Returns:
+            On success, a dict with ``columns``, ``rows`` and ``truncated``.
+            On failure, a dict with an ``error`` code (``query_too_expensive``,
+            ``query_timeout`` or ``query_error``), a human-readable ``message``
+            and, where available, the estimated cost and plan so the model can
+            rewrite the query.
+        """
+        conn = self._connect()
+        try:
+            try:
+                cost = self.explain(query, conn)
+            except sqlite3.Error as e:
+                return {"error": "query_error", "message": str(e), "query": query}
+
+            if cost.estimated_rows > self.max_estimated_rows:
+                hint = (
+                    f"Tables {', '.join(cost.full_scans)} are fully scanned in the same "
+                    "loop; add a join condition between them."
+                    if cost.is_cartesian
+                    else "Add a selective WHERE clause or a LIMIT, or join on indexed columns."
+                )
+                return {
+                    "error": "query_too_expensive",
+                    "message": (
+                        f"The query would visit about {cost.estimated_rows:,} rows, "
+                        f"above the limit of {self.max_estimated_rows:,}. Rewrite it. {hint}"
+                    ),
+                    "estimated_rows": cost.estimated_rows,
+                    "plan": cost.plan,
+                    "query": query,
+                }
+
+            deadline = time.monotonic() + self.timeout_seconds
+            # A non-zero return value from the handler interrupts the statement.
+            conn.set_progress_handler(
+                lambda: int(time.monotonic() > deadline), self.progress_interval
+            )
+            try:
+                cursor = conn.execute(query)
+                rows = cursor.fetchmany(self.max_result_rows + 1)
+            except sqlite3.OperationalError as e:
+                if time.monotonic() > deadline:
+                    return {
+                        "error": "query_timeout",
+                        "message": (
+                            f"The query did not finish within {self.timeout_seconds:g}s "
+                            "and was cancelled. Rewrite it to touch fewer rows."
+                        ),
+                        "estimated_rows": cost.estimated_rows,
+                        "plan": cost.plan,
+                        "query": query,
+                    }
+                return {"error": "query_error", "message": str(e), "query": query}
+            except sqlite3.Error as e:
+                return {"error": "query_error", "message": str(e), "query": query}
+
+            columns = [c[0] for c in cursor.description or []]
+            return {
+                "columns": columns,
+                "rows": [list(r) for r in rows[: self.max_result_rows]],
+                "truncated": len(rows) > self.max_result_rows,
+            }
+        finally:
+            conn.close()
+
+    def as_tool(self, name: str = "sql_db_query") -> BaseTool:
+        """Expose the guard as a drop-in replacement for the toolkit's query tool."""
+        return StructuredTool.from_function(
+            func=self.run,
+            name=name,
+            description=(
+                "Execute a read-only SQL query against the database and get back the "
+                "result. If the query is too expensive or times out, an error with the "
+                "estimated cost and query plan is returned; rewrite the query and try again."
+            ),
+        )
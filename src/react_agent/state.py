@@ -2,15 +2,181 @@
 
 from __future__ import annotations
 
+import uuid
 from dataclasses import dataclass, field
-from typing import Sequence
-
-from langchain_core.messages import AnyMessage
+from typing import Any, Callable, Sequence, cast
+
+from langchain_core.messages import (
+    AnyMessage,
+    BaseMessage,
+    RemoveMessage,
+    convert_to_messages,
+    message_chunk_to_message,
+)
 from langgraph.graph import add_messages
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
 from langgraph.managed import IsLastStep
 from typing_extensions import Annotated
 
 
+@dataclass(frozen=True)
+class TrimMessages:
+    """A bulk removal instruction understood by `merge_messages`.
+
+    Returning `{"messages": [TrimMessages.keep_last(20)]}` from a node drops all but
+    the last 20 messages with one slice, instead of one `RemoveMessage` per dropped
+    message that `add_messages` has to reconcile by id. Agents built with
+    `create_agent` need a `state_schema` whose `messages` use `merge_messages`
+    (see `test/test_memory2.py`).
+    """
+
+    start: int = 0
+    """Index of the first message to drop. Negative values count from the end."""
+
+    stop: int | None = None
+    """Index past the last message to drop; `None` drops through the end."""
+
+    before_id: str | None = None
+    """If set, drop from `start` up to the message with this id instead of `stop`.
+
+    Unlike an index, an id still points at the right message when other updates
+    in the same step have appended or removed messages.
+    """
+
+    @classmethod
+    def keep_last(cls, n: int) -> TrimMessages:
+        """Drop every message but the last `n`."""
+        return cls(0, -n) if n > 0 else cls(0, None)
+
+    @classmethod
+    def drop_range(cls, start: int, stop: int | None = None) -> TrimMessages:
+        """Drop `messages[start:stop]`."""
+        return cls(start, stop)
+
+    @classmethod
+    def drop_before(cls, message_id: str) -> TrimMessages:
+        """Drop every message before the one with id `message_id`."""
+        return cls(0, None, message_id)
+
+    def bounds(
+        self, length: int, index_of: Callable[[str], int | None]
+    ) -> tuple[int, int]:
+        """Return the `(start, stop)` indices to drop from a list of `length` messages."""
+        stop = self.stop
+        if self.before_id is not None:
+            stop = index_of(self.before_id)
+            if stop is None:
+                raise ValueError(
+                    f"Attempting to trim before a message ID that doesn't exist ('{self.before_id}')"
+                )
+        start, stop, _ = slice(self.start, stop).indices(length)
+        return start, max(start, stop)
+
+
+class _IndexedMessages(list[BaseMessage]):
+    """A merged message list carrying its id map, so the next merge can reuse it.
+
+    `positions` maps ids to absolute positions: the message at list index `i` has
+    position `base + i`. Dropping a prefix only advances `base`.
+    """
+
+    positions: dict[str, int]
+    base: int
+
+
+class _Merge:
+    def __init__(self, left: Any) -> None:
+        if isinstance(left, _IndexedMessages):
+            self.messages: list[BaseMessage] = list(left)
+            self.positions = left.positions.copy()
+            self.base = left.base
+        else:
+            # First merge for this channel value: normalize once like add_messages.
+            self.messages = cast(list[BaseMessage], add_messages(left, []))
+            self.reindex()
+        self.removed: set[str] = set()
+
+    def reindex(self) -> None:
+        ids = (m.id for m in self.messages)
+        self.positions = dict(zip(ids, range(len(self.messages))))  # type: ignore[arg-type]
+        self.base = 0
+
+    def index_of(self, message_id: str) -> int | None:
+        position = self.positions.get(message_id)
+        return None if position is None else position - self.base
+
+    def compact(self) -> None:
+        if self.removed:
+            self.messages = [m for m in self.messages if m.id not in self.removed]
+            self.removed.clear()
+            self.reindex()
+
+    def trim(self, instruction: TrimMessages) -> None:
+        self.compact()
+        start, stop = instruction.bounds(len(self.messages), self.index_of)
+        if start == stop:
+            return
+        dropped = self.messages[start:stop]
+        if start == 0 or stop == len(self.messages):
+            for message in dropped:
+                del self.positions[message.id]  # type: ignore[arg-type]
+            if start == 0:
+                self.messages = self.messages[stop:]
+                self.base += stop
+            else:
+                self.messages = self.messages[:start]
+        else:
+            self.messages = self.messages[:start] + self.messages[stop:]
+            self.reindex()
+
+    def add(self, update: Any) -> None:
+        message = message_chunk_to_message(convert_to_messages([update])[0])
+        if message.id is None:
+            message.id = str(uuid.uuid4())
+        if isinstance(message, RemoveMessage) and message.id == REMOVE_ALL_MESSAGES:
+            self.messages, self.positions, self.base = [], {}, 0
+            self.removed.clear()
+            return
+        position = self.positions.get(message.id)
+        if position is not None:
+            if isinstance(message, RemoveMessage):
+                self.removed.add(message.id)
+            else:
+                self.removed.discard(message.id)
+                self.messages[position - self.base] = message
+        elif isinstance(message, RemoveMessage):
+            raise ValueError(
+                f"Attempting to delete a message with an ID that doesn't exist ('{message.id}')"
+            )
+        else:
+            self.positions[message.id] = self.base + len(self.messages)
+            self.messages.append(message)
+
+    def result(self) -> _IndexedMessages:
+        self.compact()
+        result = _IndexedMessages(self.messages)
+        result.positions, result.base = self.positions, self.base
+        return result
+
+
+def merge_messages(left: Any, right: Any) -> Any:
+    """Reducer for `messages`: `add_messages` semantics plus `TrimMessages`.
+
+    `add_messages` converts the whole history and rebuilds its id map on every
+    update. This reducer keeps the map alongside the merged list, so appending or
+    replacing messages costs a copy of the list and map rather than a rebuild, and
+    a `TrimMessages` dropping the oldest messages never reindexes the rest. Items
+    of an update are applied in order.
+    """
+    merge = _Merge(left)
+    for update in right if isinstance(right, list) else [right]:
+        if isinstance(update, TrimMessages):
+            merge.trim(update)
+        else:
+            merge.add(update)
+    return merge.result()
+
+
 @dataclass
 class InputState:
     """Defines the input state for the agent, representing a narrower interface to the outside world.
@@ -18,7 +184,7 @@ class InputState:
     This class is used to define the initial state and structure of incoming data.
     """
 
-    messages: Annotated[Sequence[AnyMessage], add_messages] = field(
+    messages: Annotated[Sequence[AnyMessage], merge_messages] = field(
         default_factory=list
     )
     """
@@ -33,8 +199,9 @@ class InputState:
 
     Steps 2-5 may repeat as needed.
 
-    The `add_messages` annotation ensures that new messages are merged with existing ones,
+    The `merge_messages` annotation ensures that new messages are merged with existing ones,
     updating by ID to maintain an "append-only" state unless a message with the same ID is provided.
+    Nodes can also return `TrimMessages` to drop a range of old messages in bulk.
     """
 
 
@@ -53,6 +220,23 @@ class State(InputState):
     It is set to 'True' when the step count reaches recursion_limit - 1.
     """
 
+    token_count: int = field(default=0)
+    """
+    Running token count of `messages`, updated by each model call.
+
+    Counts are cached per message id (see `react_agent.tokens.TokenCounter`), so
+    keeping the total current only tokenizes the messages added since the last call.
+    Context trimming can compare it against a budget without recounting the history.
+    """
+
+    workspace_fingerprint: str = field(default="")
+    """
+    Fingerprint of the workspace, computed once at the start of each run.
+
+    `lookup_answer` sets it, and the workspace index and answer cache key reuse it
+    instead of walking the workspace again.
+    """
+
     # Additional attributes can be added here as needed.
     # Common examples include:
     # retrieved_documents: List[Document] = field(default_factory=list)
@@ -0,0 +1,26 @@
+"""Quantiles of recent latencies.
+
+The call guard, the model router and the MCP servers report latencies in their
+``metrics()`` with these helpers. Latencies are kept in seconds, quantiles are
+given as fractions from 0 to 1, and ``metrics()`` report milliseconds.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+
+def quantile(values: Iterable[float], q: float) -> float | None:
+    """Return the ``q`` quantile (0 to 1) of ``values``, or ``None`` if there are none.
+
+    This is the nearest-rank value, without interpolation.
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+def milliseconds(seconds: float | None) -> float | None:
+    """Return ``seconds`` in milliseconds, rounded for reporting."""
+    return None if seconds is None else round(seconds * 1000, 1)
@@ -0,0 +1,512 @@
+"""A persistent, SQLite-backed long-term store.
+
+``SQLiteStore`` implements LangGraph's ``BaseStore`` so it can be passed to
+``create_agent(store=...)`` in place of ``InMemoryStore``. Items live in a
+single ``WITHOUT ROWID`` table clustered on ``(namespace, key)``, so gets are
+one b-tree lookup and namespace prefix listing is a range scan. Reads go
+through an in-process LRU that is kept coherent with this store's own writes;
+it assumes no other process writes to the same database file.
+
+With an ``index`` configured, put values are embedded and ``search(..., query=...)``
+ranks items by cosine similarity using an in-process ``VectorIndex``; the
+embeddings are persisted next to the items and reloaded on open.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Hashable, Iterable, Sequence
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, cast
+
+import numpy as np
+from langgraph.store.base import (
+    BaseStore,
+    GetOp,
+    IndexConfig,
+    Item,
+    ListNamespacesOp,
+    Op,
+    PutOp,
+    Result,
+    SearchItem,
+    SearchOp,
+)
+from langgraph.store.base.embed import (
+    ensure_embeddings,
+    get_text_at_path,
+    tokenize_path,
+)
+
+from react_agent.vectors import VectorIndex
+
+# Namespace labels are joined with the ASCII unit separator and terminated by
+# it, so ("a",) sorts as a prefix of ("a", "b") but not of ("ab",).
+_SEP = "\x1f"
+_SEP_NEXT = chr(ord(_SEP) + 1)
+# SQLite's default limit on bound parameters is 999 on older builds.
+_MAX_GET_BATCH = 400
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+_VECTOR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS store_vectors (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID
+"""
+
+
+def _encode_namespace(namespace: Sequence[str]) -> str:
+    return "".join(label + _SEP for label in namespace)
+
+
+def _decode_namespace(encoded: str) -> tuple[str, ...]:
+    return tuple(encoded.split(_SEP)[:-1])
+
+
+def _timestamp(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=UTC)
+
+
+def _matches(value: Any, condition: Any) -> bool:
+    """Evaluate a search filter condition (equality or ``$eq``/``$ne``/``$gt``/... operators)."""
+    if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+        for op, expected in condition.items():
+            try:
+                if op == "$eq" and value != expected:
+                    return False
+                if op == "$ne" and value == expected:
+                    return False
+                if op == "$gt" and not value > expected:
+                    return False
+                if op == "$gte" and not value >= expected:
+                    return False
+                if op == "$lt" and not value < expected:
+                    return False
+                if op == "$lte" and not value <= expected:
+                    return False
+            except TypeError:
+                return False
+        return True
+    return bool(value == condition)
+
+
+class SQLiteStore(BaseStore):
+    """``BaseStore`` backed by a local SQLite database.
+
+    Example:
+        store = SQLiteStore("memory.db")
+        store.put(("users",), "user_123", {"name": "John Smith"})
+        store.get(("users",), "user_123")
+
+        memories = SQLiteStore(
+            "memory.db", index={"dims": 512, "embed": HashingEmbeddings(512)}
+        )
+        memories.search(("memories", "user_123"), query="favourite food", limit=5)
+    """
+
+    supports_ttl = False
+
+    def __init__(
+        self,
+        path: str | Path = ":memory:",
+        *,
+        cache_size: int = 10_000,
+        index: IndexConfig | None = None,
+        ivf_lists: int = 0,
+    ) -> None:
+        """Open (or create) the store.
+
+        Args:
+            path: Database file, or ``":memory:"`` for a throwaway store.
+            cache_size: Number of items kept in the read-through LRU. Misses
+                are cached too, so repeated lookups of unknown keys are free.
+            index: Enables semantic search. ``embed`` may be any LangChain
+                ``Embeddings`` or embedding function; ``fields`` selects the
+                value paths to embed (default: the whole value). Each item
+                gets one vector for the concatenation of its fields.
+            ivf_lists: Number of IVF partitions for the vector index; ``0``
+                scores every vector on each query.
+        """
+        self.path = str(path)
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[tuple[str, ...], str], Item | None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        if self.path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+
+        self.index_config = index
+        self._vectors: VectorIndex | None = None
+        if index is not None:
+            self.embeddings = ensure_embeddings(index["embed"])
+            self.index_fields = index.get("fields") or ["$"]
+            self._conn.execute(_VECTOR_SCHEMA)
+            self._vectors = VectorIndex(index["dims"], ivf_lists=ivf_lists)
+            self._load_vectors()
+
+    def _load_vectors(self) -> None:
+        assert self._vectors is not None
+        ids: list[Hashable] = []
+        vectors: list[np.ndarray] = []
+        for namespace, key, blob in self._conn.execute(
+            "SELECT namespace, key, embedding FROM store_vectors"
+        ):
+            ids.append((namespace, key))
+            vectors.append(np.frombuffer(blob, dtype=np.float32))
+        self._vectors.add_many(ids, vectors)
+
+    def _index_text(self, op: PutOp) -> str | None:
+        """Return the text to embed for a put, or ``None`` if it is not indexed."""
+        if op.value is None or op.index is False:
+            return None
+        fields = self.index_fields if op.index is None else op.index
+        texts = [
+            text for field in fields for text in get_text_at_path(op.value, tokenize_path(field))
+        ]
+        return "\n".join(texts) if texts else None
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+    # Cache helpers
+
+    def _cache_get(self, key: tuple[tuple[str, ...], str]) -> tuple[bool, Item | None]:
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return True, self._cache[key]
+        return False, None
+
+    def _cache_set(self, key: tuple[tuple[str, ...], str], item: Item | None) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = item
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # Batch execution
+
+    def batch(self, ops: Iterable[Op]) -> list[Result]:
+        """Execute a batch of operations.
+
+        Reads in a batch see the state from before the batch; puts are
+        deduplicated (last write wins) and committed in one transaction.
+        """
+        ops = list(ops)
+        results: list[Result] = [None] * len(ops)
+        gets: dict[tuple[tuple[str, ...], str], list[int]] = {}
+        puts: dict[tuple[tuple[str, ...], str], PutOp] = {}
+        # Embeddings are computed before taking the lock, so a slow embedder
+        # does not block readers.
+        embedded = self._embed_ops(ops)
+
+        with self._lock:
+            for i, op in enumerate(ops):
+                if isinstance(op, GetOp):
+                    cache_key = (tuple(op.namespace), op.key)
+                    hit, item = self._cache_get(cache_key)
+                    if hit:
+                        results[i] = item
+                    else:
+                        gets.setdefault(cache_key, []).append(i)
+                elif isinstance(op, SearchOp):
+                    query_vector = embedded.get(id(op))
+                    if query_vector is not None:
+                        results[i] = self._vector_search(op, query_vector)
+                    else:
+                        results[i] = self._search(op)
+                elif isinstance(op, ListNamespacesOp):
+                    results[i] = self._list_namespaces(op)
+                elif isinstance(op, PutOp):
+                    puts[(tuple(op.namespace), op.key)] = op
+                else:
+                    raise ValueError(f"Unknown operation type: {type(op)}")
+
+            if gets:
+                found = self._fetch(list(gets))
+                for cache_key, indexes in gets.items():
+                    item = found.get(cache_key)
+                    self._cache_set(cache_key, item)
+                    for i in indexes:
+                        results[i] = item
+            if puts:
+                self._apply_puts(list(puts.values()), embedded)
+        return results
+
+    def _embed_ops(self, ops: list[Op]) -> dict[int, list[float]]:
+        """Embed search queries and indexed put values, keyed by ``id(op)``."""
+        if self._vectors is None:
+            return {}
+        embedded: dict[int, list[float]] = {}
+        texts: dict[int, str] = {}
+        for op in ops:
+            if isinstance(op, SearchOp) and op.query:
+                embedded[id(op)] = self.embeddings.embed_query(op.query)
+            elif isinstance(op, PutOp):
+                text = self._index_text(op)
+                if text is not None:
+                    texts[id(op)] = text
+        if texts:
+            vectors = self.embeddings.embed_documents(list(texts.values()))
+            embedded.update(zip(texts, vectors))
+        return embedded
+
+    async def abatch(self, ops: Iterable[Op]) -> list[Result]:
+        """Execute a batch of operations in a worker thread."""
+        return await asyncio.to_thread(self.batch, list(ops))
+
+    def _fetch(
+        self, keys: list[tuple[tuple[str, ...], str]]
+    ) -> dict[tuple[tuple[str, ...], str], Item]:
+        found: dict[tuple[tuple[str, ...], str], Item] = {}
+        for start in range(0, len(keys), _MAX_GET_BATCH):
+            chunk = keys[start : start + _MAX_GET_BATCH]
+            placeholders = ",".join("(?, ?)" for _ in chunk)
+            params = [p for ns, key in chunk for p in (_encode_namespace(ns), key)]
+            # CROSS JOIN pins the VALUES list as the outer loop, so each key is a
+            # primary-key seek; a row-value IN (...) would scan the table instead.
+            rows = self._conn.execute(
+                "SELECT s.namespace, s.key, s.value, s.created_at, s.updated_at "
+                f"FROM (VALUES {placeholders}) AS v CROSS JOIN store AS s "
+                "ON s.namespace = v.column1 AND s.key = v.column2",
+                params,
+            )
+            for namespace, key, value, created_at, updated_at in rows:
+                ns = _decode_namespace(namespace)
+                found[(ns, key)] = Item(
+                    value=json.loads(value),
+                    key=key,
+                    namespace=ns,
+                    created_at=_timestamp(created_at),
+                    updated_at=_timestamp(updated_at),
+                )
+        return found
+
+    def _apply_puts(self, puts: list[PutOp], embedded: dict[int, list[float]]) -> None:
+        now = datetime.now(UTC)
+        upserts = []
+        deletes = []
+        vectors: dict[tuple[str, str], np.ndarray] = {}
+        for op in puts:
+            namespace = tuple(op.namespace)
+            row_id = (_encode_namespace(namespace), op.key)
+            if op.value is None:
+                deletes.append(row_id)
+                self._cache_set((namespace, op.key), None)
+            else:
+                upserts.append((*row_id, json.dumps(op.value), now.timestamp()))
+                # created_at is only known after the upsert; drop instead of caching.
+                self._cache.pop((namespace, op.key), None)
+                if id(op) in embedded:
+                    vectors[row_id] = np.asarray(embedded[id(op)], dtype=np.float32)
+        # Deleted items and items put with index=False lose any earlier vector.
+        unindexed = [
+            (_encode_namespace(tuple(op.namespace)), op.key)
+            for op in puts
+            if (_encode_namespace(tuple(op.namespace)), op.key) not in vectors
+        ]
+        self._conn.execute("BEGIN")
+        try:
+            if deletes:
+                self._conn.executemany(
+                    "DELETE FROM store WHERE namespace = ? AND key = ?", deletes
+                )
+            if self._vectors is not None:
+                if unindexed:
+                    self._conn.executemany(
+                        "DELETE FROM store_vectors WHERE namespace = ? AND key = ?", unindexed
+                    )
+                if vectors:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO store_vectors (namespace, key, embedding) "
+                        "VALUES (?, ?, ?)",
+                        [(*row_id, v.tobytes()) for row_id, v in vectors.items()],
+                    )
+            if upserts:
+                self._conn.executemany(
+                    "INSERT INTO store (namespace, key, value, created_at, updated_at) "
+                    "VALUES (?1, ?2, ?3, ?4, ?4) "
+                    "ON CONFLICT (namespace, key) DO UPDATE SET "
+                    "value = excluded.value, updated_at = excluded.updated_at",
+                    upserts,
+                )
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        if self._vectors is not None:
+            for row_id in unindexed:
+                self._vectors.remove(row_id)
+            self._vectors.add_many(list(vectors), list(vectors.values()))
+
+    def _prefix_rows(
+        self, namespace_prefix: Sequence[str], limit: int | None = None, offset: int = 0
+    ) -> sqlite3.Cursor:
+        sql = "SELECT namespace, key, value, created_at, updated_at FROM store"
+        params: list[Any] = []
+        if namespace_prefix:
+            low = _encode_namespace(namespace_prefix)
+            sql += " WHERE namespace >= ? AND namespace < ?"
+            params += [low, low[:-1] + _SEP_NEXT]
+        sql += " ORDER BY namespace, key"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit, offset]
+        return self._conn.execute(sql, params)
+
+    def _search(self, op: SearchOp) -> list[SearchItem]:
+        # Without a filter, pagination is pushed down into SQLite.
+        if op.filter:
+            rows: Iterable[Any] = self._prefix_rows(op.namespace_prefix)
+        else:
+            rows = self._prefix_rows(op.namespace_prefix, op.limit, op.offset)
+        matched: list[SearchItem] = []
+        skip = op.offset if op.filter else 0
+        for namespace, key, value, created_at, updated_at in rows:
+            data = json.loads(value)
+            if op.filter and not all(
+                _matches(data.get(field), condition) for field, condition in op.filter.items()
+            ):
+                continue
+            if skip:
+                skip -= 1
+                continue
+            matched.append(
+                SearchItem(
+                    namespace=_decode_namespace(namespace),
+                    key=key,
+                    value=data,
+                    created_at=_timestamp(created_at),
+                    updated_at=_timestamp(updated_at),
+                )
+            )
+            if len(matched) >= op.limit:
+                break
+        return matched
+
+    def _fetch_cached(
+        self, keys: list[tuple[tuple[str, ...], str]]
+    ) -> dict[tuple[tuple[str, ...], str], Item | None]:
+        items: dict[tuple[tuple[str, ...], str], Item | None] = {}
+        missing = []
+        for key in keys:
+            hit, item = self._cache_get(key)
+            if hit:
+                items[key] = item
+            else:
+                missing.append(key)
+        found = self._fetch(missing)
+        for key in missing:
+            items[key] = found.get(key)
+            self._cache_set(key, items[key])
+        return items
+
+    def _vector_search(self, op: SearchOp, query_vector: list[float]) -> list[SearchItem]:
+        assert self._vectors is not None
+        prefix = _encode_namespace(op.namespace_prefix)
+        wanted = op.offset + op.limit
+
+        def in_prefix(row_id: Hashable) -> bool:
+            return cast(tuple[str, str], row_id)[0].startswith(prefix)
+
+        # Without a predicate the index only partially sorts the top ``wanted``.
+        accept = in_prefix if prefix else None
+        if not op.filter:
+            ranked = self._vectors.search(query_vector, wanted, accept)[op.offset :]
+            keys = [
+                (_decode_namespace(ns), key)
+                for ns, key in (cast(tuple[str, str], row_id) for row_id, _ in ranked)
+            ]
+            found: dict[tuple[tuple[str, ...], str], Item | None] = dict(self._fetch(keys))
+        else:
+            # Filters need the values: fetch the best candidates in one query,
+            # and widen the window until enough of them match.
+            window = 4 * wanted
+            while True:
+                candidates = self._vectors.search(query_vector, window, accept)
+                candidate_keys = [
+                    (_decode_namespace(ns), key)
+                    for ns, key in (cast(tuple[str, str], row_id) for row_id, _ in candidates)
+                ]
+                found = self._fetch_cached(candidate_keys)
+                ranked, keys = [], []
+                for key, hit in zip(candidate_keys, candidates):
+                    item = found[key]
+                    if item is not None and all(
+                        _matches(item.value.get(field), condition) for field, condition in op.filter.items()
+                    ):
+                        ranked.append(hit)
+                        keys.append(key)
+                if len(ranked) >= wanted or len(candidates) < window:
+                    break
+                window *= 4
+            ranked, keys = ranked[op.offset : wanted], keys[op.offset : wanted]
+        results = []
+        for key, (_, score) in zip(keys, ranked):
+            item = found.get(key)
+            if item is not None:
+                results.append(
+                    SearchItem(
+                        namespace=item.namespace,
+                        key=item.key,
+                        value=item.value,
+                        created_at=item.created_at,
+                        updated_at=item.updated_at,
+                        score=score,
+                    )
+                )
+        return results
+
+    def _list_namespaces(self, op: ListNamespacesOp) -> list[tuple[str, ...]]:
+        # Skip-scan the primary key: each distinct namespace costs one seek,
+        # independent of how many items it holds.
+        namespaces: list[tuple[str, ...]] = []
+        cursor = ""
+        while True:
+            row = self._conn.execute(
+                "SELECT namespace FROM store WHERE namespace > ? ORDER BY namespace LIMIT 1",
+                (cursor,),
+            ).fetchone()
+            if row is None:
+                break
+            namespaces.append(_decode_namespace(row[0]))
+            cursor = row[0]
+
+        for condition in op.match_conditions or ():
+            path = tuple(condition.path)
+            if condition.match_type == "prefix":
+                namespaces = [ns for ns in namespaces if _path_matches(ns[: len(path)], path)]
+            else:
+                namespaces = [
+                    ns for ns in namespaces if len(ns) >= len(path)
+                    and _path_matches(ns[len(ns) - len(path) :], path)
+                ]
+        if op.max_depth is not None:
+            namespaces = sorted({ns[: op.max_depth] for ns in namespaces})
+        return namespaces[op.offset : op.offset + op.limit]
+
+
+def _path_matches(labels: tuple[str, ...], path: tuple[str, ...]) -> bool:
+    return len(labels) == len(path) and all(p in ("*", label) for label, p in zip(labels, path))
@@ -0,0 +1,249 @@
+"""Incremental rolling summarization for long-running agent threads.
+
+``SummarizationMiddleware`` re-summarizes the whole evicted prefix every time
+the token threshold is crossed. ``RollingSummaryMiddleware`` instead keeps a
+running summary in the agent state and only folds the messages evicted since
+the previous fold into it, so each summarization call is proportional to the
+new messages rather than to the history.
+
+Under ``ainvoke``/``astream`` the fold runs as a background task started when a
+turn ends, off the user-facing path; its result is applied at the start of the
+next model call. Only if the thread grows past ``max_tokens`` before the fold
+is done does the model call wait for it. Background folds are kept per
+``thread_id``; runs without one fold inline, and a failed background fold is
+retried inline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from langchain.agents.middleware import (
+    AgentMiddleware,
+    AgentState,
+    ModelRequest,
+    ModelResponse,
+)
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import (
+    AnyMessage,
+    HumanMessage,
+    RemoveMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import get_buffer_string
+from langgraph.config import get_config
+from langgraph.runtime import Runtime
+from typing_extensions import NotRequired
+
+from react_agent.tokens import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FOLD_PROMPT = """You maintain a running summary of a conversation between a user and an AI assistant.
+
+Update the summary with the new messages below. Keep every fact, decision, user preference and open task
+that may matter later; drop pleasantries and anything superseded. Reply with the updated summary only.
+
+<current_summary>
+{summary}
+</current_summary>
+
+<new_messages>
+{messages}
+</new_messages>"""
+
+
+class RollingSummaryState(AgentState):
+    """Agent state extended with the running summary."""
+
+    running_summary: NotRequired[str]
+
+
+@dataclass
+class _Fold:
+    summary: str
+    folded_ids: list[str]
+
+
+def _safe_cutoff(messages: Sequence[AnyMessage], cutoff: int) -> int:
+    """Move ``cutoff`` back so an AI message is never separated from its tool results."""
+    while 0 < cutoff < len(messages) and isinstance(messages[cutoff], ToolMessage):
+        cutoff -= 1
+    return cutoff
+
+
+class RollingSummaryMiddleware(AgentMiddleware[RollingSummaryState, Any, Any]):
+    """Fold evicted messages into a running summary, incrementally and in the background.
+
+    Example:
+        agent = create_agent(
+            model,
+            middleware=[RollingSummaryMiddleware(model, trigger_tokens=4000, keep_messages=20)],
+            checkpointer=InMemorySaver(),
+        )
+    """
+
+    state_schema = RollingSummaryState
+
+    def __init__(
+        self,
+        model: BaseChatModel,
+        *,
+        trigger_tokens: int = 4000,
+        keep_messages: int = 20,
+        max_tokens: int | None = None,
+        token_counter: Callable[[Sequence[AnyMessage]], int] | None = None,
+        fold_prompt: str = DEFAULT_FOLD_PROMPT,
+    ) -> None:
+        """Configure the summarizer.
+
+        Args:
+            model: The chat model used to update the summary.
+            trigger_tokens: Fold once the thread holds more tokens than this.
+            keep_messages: Number of recent messages never folded.
+            max_tokens: Hard limit; above it a model call waits for the pending
+                fold (or folds synchronously). Defaults to twice ``trigger_tokens``.
+            token_counter: Counts the tokens of a list of messages. A
+                ``TokenCounter`` is used as is; any other function is wrapped in
+                one, so each message is counted once. Defaults to ``TokenCounter()``.
+            fold_prompt: Prompt with ``{summary}`` and ``{messages}`` placeholders.
+        """
+        self.model = model
+        self.trigger_tokens = trigger_tokens
+        self.keep_messages = keep_messages
+        self.max_tokens = max_tokens if max_tokens is not None else 2 * trigger_tokens
+        if isinstance(token_counter, TokenCounter):
+            self.token_counter = token_counter
+        else:
+            self.token_counter = TokenCounter(message_counter=token_counter)
+        self.fold_prompt = fold_prompt
+        self._pending: dict[str, asyncio.Task[_Fold]] = {}
+
+    def _evictable(self, messages: Sequence[AnyMessage]) -> list[AnyMessage]:
+        """Return the messages to fold, or ``[]`` if the thread is under the trigger."""
+        if len(messages) <= self.keep_messages or self.token_counter(messages) <= self.trigger_tokens:
+            return []
+        cutoff = _safe_cutoff(messages, len(messages) - self.keep_messages)
+        return [m for m in messages[:cutoff] if m.id is not None]
+
+    def _fold_request(self, summary: str, messages: Sequence[AnyMessage]) -> list[AnyMessage]:
+        prompt = self.fold_prompt.format(
+            summary=summary or "(empty)", messages=get_buffer_string(messages)
+        )
+        return [HumanMessage(content=prompt)]
+
+    def _fold(self, summary: str, messages: Sequence[AnyMessage]) -> _Fold:
+        response = self.model.invoke(self._fold_request(summary, messages))
+        return _Fold(response.text, [m.id for m in messages if m.id is not None])
+
+    async def _afold(self, summary: str, messages: Sequence[AnyMessage]) -> _Fold:
+        response = await self.model.ainvoke(self._fold_request(summary, messages))
+        return _Fold(response.text, [m.id for m in messages if m.id is not None])
+
+    def _apply(self, fold: _Fold, messages: Sequence[AnyMessage]) -> dict[str, Any]:
+        present = {m.id for m in messages}
+        self.token_counter.forget(fold.folded_ids)
+        return {
+            "messages": [RemoveMessage(id=i) for i in fold.folded_ids if i in present],
+            "running_summary": fold.summary,
+        }
+
+    @staticmethod
+    def _thread_id() -> str:
+        try:
+            return str(get_config().get("configurable", {}).get("thread_id") or "")
+        except RuntimeError:
+            return ""
+
+    # Hooks
+
+    def before_model(
+        self, state: RollingSummaryState, runtime: Runtime[Any]
+    ) -> dict[str, Any] | None:
+        """Sync: fold evicted messages into the summary before calling the model."""
+        evicted = self._evictable(state["messages"])
+        if not evicted:
+            return None
+        fold = self._fold(state.get("running_summary", ""), evicted)
+        return self._apply(fold, state["messages"])
+
+    async def abefore_model(
+        self, state: RollingSummaryState, runtime: Runtime[Any]
+    ) -> dict[str, Any] | None:
+        """Async: apply a finished background fold; wait only above ``max_tokens``.
+
+        Without a ``thread_id``, or when the background fold failed, evicted
+        messages are folded inline as in ``before_model``.
+        """
+        messages = state["messages"]
+        thread_id = self._thread_id()
+        task = self._pending.get(thread_id) if thread_id else None
+        inline = not thread_id
+        if task is not None and (task.done() or self.token_counter(messages) > self.max_tokens):
+            del self._pending[thread_id]
+            try:
+                return self._apply(await task, messages)
+            except Exception:
+                logger.exception("Background summary fold failed; folding inline")
+                task, inline = None, True
+        if task is None and (inline or self.token_counter(messages) > self.max_tokens):
+            evicted = self._evictable(messages)
+            if evicted:
+                fold = await self._afold(state.get("running_summary", ""), evicted)
+                return self._apply(fold, messages)
+        return None
+
+    def after_agent(
+        self, state: RollingSummaryState, runtime: Runtime[Any]
+    ) -> dict[str, Any] | None:
+        """Sync: nothing to do; without an event loop, folding happens in ``before_model``."""
+        return None
+
+    async def aafter_agent(
+        self, state: RollingSummaryState, runtime: Runtime[Any]
+    ) -> dict[str, Any] | None:
+        """Async: start folding newly evicted messages once the turn's answer is out."""
+        thread_id = self._thread_id()
+        # Without a thread id, folds of unrelated runs would share one slot.
+        if not thread_id or thread_id in self._pending:
+            return None
+        evicted = self._evictable(state["messages"])
+        if evicted:
+            self._pending[thread_id] = asyncio.create_task(
+                self._afold(state.get("running_summary", ""), evicted)
+            )
+        return None
+
+    def _with_summary(self, request: ModelRequest) -> ModelRequest:
+        summary = request.state.get("running_summary")
+        if not summary:
+            return request
+        base = request.system_message
+        blocks: list[Any] = list(base.content_blocks) if base is not None else []
+        blocks.append(
+            {"type": "text", "text": f"\n\n## Summary of the earlier conversation\n\n{summary}"}
+        )
+        return request.override(system_message=SystemMessage(content=blocks))
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        """Sync: expose the running summary to the model through the system prompt."""
+        return handler(self._with_summary(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        """Async: expose the running summary to the model through the system prompt."""
+        return await handler(self._with_summary(request))
+
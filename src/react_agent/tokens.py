@@ -0,0 +1,170 @@
+"""Token accounting for message lists.
+
+Counting the whole conversation before every model call is wasteful: the
+history rarely changes and only the last few messages are new. ``TokenCounter``
+caches the count of each message by id, checked against a hash of its text, so
+a call costs one dictionary lookup per known message and tokenization only for
+new or edited ones.
+
+Counts are exact when ``tiktoken`` is installed and its encoding can be loaded.
+Otherwise a local approximation is used, calibrated on ``o200k_base``: about
+four characters per token for Latin text and one token per CJK character.
+
+Loading an encoding may read or download a file. Called from a thread with a
+running event loop, the counter loads it in a worker thread and approximates
+until it is ready, so the loop is never blocked; ``aload`` waits for it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+
+from langchain_core.messages import AIMessage, AnyMessage, BaseMessage
+
+_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uf900-\ufaff\uac00-\ud7af]")
+
+MESSAGE_OVERHEAD = 3
+"""Tokens added per message for the role and separators of the chat format."""
+
+
+def approximate_text_tokens(text: str) -> int:
+    """Estimate the number of tokens in ``text`` without a tokenizer."""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def _message_text(message: BaseMessage) -> str:
+    parts: list[str] = [message.text]
+    if isinstance(message, AIMessage) and message.tool_calls:
+        for call in message.tool_calls:
+            parts.append(call["name"])
+            parts.append(json.dumps(call["args"], ensure_ascii=False))
+    return "\n".join(parts)
+
+
+class TokenCounter:
+    """Count message tokens, caching each message's count by id.
+
+    Instances are callable on a list of messages, so they can be passed
+    wherever a ``token_counter`` function is expected.
+    """
+
+    def __init__(
+        self,
+        encoding: str | None = "o200k_base",
+        *,
+        message_counter: Callable[[Sequence[AnyMessage]], int] | None = None,
+        max_cached: int = 65_536,
+    ) -> None:
+        """Configure the counter.
+
+        Args:
+            encoding: ``tiktoken`` encoding used for exact counts. ``None``
+                always uses the approximation.
+            message_counter: Custom counter for a single-message list; replaces
+                both ``tiktoken`` and the approximation.
+            max_cached: Number of per-message counts kept, least recently used
+                first out.
+        """
+        self.encoding = encoding
+        self.message_counter = message_counter
+        self.max_cached = max_cached
+        self._counts: OrderedDict[str, tuple[int, int]] = OrderedDict()
+        """Count of each message by id, with the hash of the text it was counted on."""
+        self._encode: Callable[[str], list[int]] | None = None
+        self._encoder_loaded = encoding is None
+        self._loading: threading.Thread | None = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from a real tokenizer rather than the approximation.
+
+        ``False`` while the encoding is loading in the background.
+        """
+        return self._load_encoder() is not None
+
+    def _load(self) -> None:
+        with self._load_lock:
+            if self._encoder_loaded:
+                return
+            # Loading may download the encoding; try once and keep the outcome.
+            try:
+                import tiktoken
+
+                self._encode = tiktoken.get_encoding(self.encoding or "").encode
+            except Exception:
+                self._encode = None
+            self._encoder_loaded = True
+
+    def _load_encoder(self) -> Callable[[str], list[int]] | None:
+        if not self._encoder_loaded:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self._load()
+            else:
+                with self._load_lock:
+                    if self._loading is None and not self._encoder_loaded:
+                        self._loading = threading.Thread(target=self._load, name="tiktoken-load", daemon=True)
+                        self._loading.start()
+        return self._encode
+
+    async def aload(self) -> bool:
+        """Load the encoding in a worker thread, and return whether counts are exact."""
+        if not self._encoder_loaded:
+            await asyncio.to_thread(self._load)
+        return self._encode is not None
+
+    def count_text(self, text: str) -> int:
+        """Return the number of tokens in ``text``."""
+        encode = self._load_encoder()
+        if encode is None:
+            return approximate_text_tokens(text)
+        return len(encode(text))
+
+    def _count_uncached(self, message: AnyMessage) -> int:
+        if self.message_counter is not None:
+            return self.message_counter([message])
+        return MESSAGE_OVERHEAD + self.count_text(_message_text(message))
+
+    def count_message(self, message: AnyMessage) -> int:
+        """Return the token count of one message, from the cache when possible."""
+        if message.id is None:
+            return self._count_uncached(message)
+        # Messages can be replaced under the same id, so the count is only
+        # reused for the same text and tool calls.
+        version = hash(_message_text(message))
+        cached = self._counts.get(message.id)
+        if cached is not None and cached[0] == version:
+            self._counts.move_to_end(message.id)
+            return cached[1]
+        # Approximations made while the encoding loads are not kept.
+        final = self.message_counter is not None or self._encoder_loaded
+        count = self._count_uncached(message)
+        if final:
+            self._counts[message.id] = (version, count)
+            self._counts.move_to_end(message.id)
+            while len(self._counts) > self.max_cached:
+                self._counts.popitem(last=False)
+        return count
+
+    def count(self, messages: Sequence[AnyMessage]) -> int:
+        """Return the total token count of ``messages``."""
+        return sum(self.count_message(m) for m in messages)
+
+    def __call__(self, messages: Sequence[AnyMessage]) -> int:
+        """Alias of ``count``."""
+        return self.count(messages)
+
+    def forget(self, ids: Sequence[str]) -> None:
+        """Drop the cached counts of messages that left the conversation."""
+        for message_id in ids:
+            self._counts.pop(message_id, None)
+
@@ -6,21 +6,40 @@ These tools are intended as free examples to get started. For production use,
 consider implementing more robust and specialized tools tailored to your needs.
 """
 
+import asyncio
 import json
 import os
 import sys
 from pathlib import Path
 from typing import Any, Callable, List, Optional, cast
 
-from langchain_tavily import TavilySearch
 from langgraph.runtime import get_runtime
 
 from react_agent.context import Context
+from react_agent.ignore import IgnoreRules, workspace_rules
+from react_agent.sections import Section, section_index
+from react_agent.workspace import WorkspaceModel, scan_markdown_files, watch_workspace
 
 
 workspace_path="/Users/ailabuser7-1/Documents/cursor-workspace/react-agent-exp/data"
 #workspace_path="C:\\Users\\aaasj\\Documents\\cursor_workspace\\react-agent-exp\\data"
 
+
+def _workspace() -> tuple[Path, WorkspaceModel | None, IgnoreRules]:
+    """返回工作空间根目录、开启 watch_workspace 时的内存模型，以及扫描时的忽略规则.
+
+    在图的运行中使用运行时上下文的 workspace_path，否则使用模块级的 workspace_path。
+    """
+    try:
+        context = get_runtime(Context).context
+    except RuntimeError:
+        context = None
+    if not isinstance(context, Context):
+        return Path(workspace_path), None, IgnoreRules()
+    root = context.workspace_path
+    rules = workspace_rules(context)
+    return Path(root), watch_workspace(root, rules=rules) if context.watch_workspace else None, rules
+
 async def search(query: str) -> Optional[dict[str, Any]]:
     """Search for general web results.
 
@@ -28,6 +47,8 @@ async def search(query: str) -> Optional[dict[str, Any]]:
     to provide comprehensive, accurate, and trusted results. It's particularly useful
     for answering questions about current events.
     """
+    from langchain_tavily import TavilySearch
+
     runtime = get_runtime(Context)
     wrapped = TavilySearch(max_results=runtime.context.max_search_results)
     return cast(dict[str, Any], await wrapped.ainvoke({"query": query}))
@@ -48,21 +69,29 @@ async def find_directory(keyword: str) -> dict[str, Any]:
         - keyword: 搜索使用的关键词
         - workspace_path: 工作空间的根路径
     """
+    workspace_root, workspace, rules = _workspace()
     matching_dirs = []
-    # 遍历工作空间目录，查找包含关键词的目录
-    for root, dirs, files in os.walk(workspace_path):
-        # 检查当前目录名是否包含关键词
-        current_dir = Path(root)
-        if keyword.lower() in current_dir.name.lower():
-            # 获取相对于工作空间的路径
-            rel_path = current_dir.relative_to(workspace_path)
-            matching_dirs.append(str(rel_path))
+    if workspace is not None:
+        # 从内存中的工作空间模型查找，无需遍历目录
+        matching_dirs = workspace.find_directories(keyword)
+    else:
+        # 遍历工作空间目录，查找包含关键词的目录
+        for root, dirs, files in os.walk(workspace_root):
+            # 按忽略规则剪枝，被忽略的目录及其子目录不会被遍历
+            rel_root = os.path.relpath(root, workspace_root)
+            dirs[:] = [d for d in dirs if not rules.ignores(os.path.join(rel_root, d), True)]
+            # 检查当前目录名是否包含关键词
+            current_dir = Path(root)
+            if keyword.lower() in current_dir.name.lower():
+                # 获取相对于工作空间的路径
+                rel_path = current_dir.relative_to(workspace_root)
+                matching_dirs.append(str(rel_path))
     
     result = {
         "matching_directories": matching_dirs,
         "count": len(matching_dirs),
         "keyword": keyword,
-        "workspace_path": workspace_path
+        "workspace_path": str(workspace_root)
     }
     return result
 
@@ -103,26 +132,45 @@ async def list_directory_files(path: str) -> dict[str, Any]:
     """
     
     # 处理相对路径和绝对路径
-    workspace_path_obj = Path(workspace_path)
+    workspace_path_obj, workspace, rules = _workspace()
     if os.path.isabs(path):
         target_path = Path(path)
     else:
         target_path = workspace_path_obj / path
     
+    # 目录在内存中的工作空间模型中时，直接从模型列出文件
+    rel_target = os.path.relpath(target_path, workspace_path_obj)
+    if workspace is not None and workspace.is_directory(rel_target):
+        files = workspace.markdown_files(rel_target)
+        return {
+            "path": str(target_path.relative_to(workspace_path_obj)),
+            "files": files,
+            "file_count": len(files)
+        }
+    
     if not target_path.exists():
         return {"error": f"路径不存在: {path}", "files": []}
     
     if not target_path.is_dir():
         return {"error": f"路径不是目录: {path}", "files": []}
     
+    if rules.ignores_path(rel_target, True):
+        return {"error": f"目录已被工作空间忽略规则排除: {path}", "files": []}
+    
     files = []
     
     try:
-        # 递归遍历目录，查找所有 .md 文件
-        for item in target_path.rglob("*.md"):
-            if item.is_file():
-                rel_path = item.relative_to(workspace_path_obj)
-                files.append(str(rel_path))
+        # 递归遍历目录，查找所有 .md 文件；被忽略的子目录不会被遍历
+        for root, dirs, names in os.walk(target_path):
+            rel_root = os.path.relpath(root, workspace_path_obj)
+            dirs[:] = [d for d in dirs if not rules.ignores(os.path.join(rel_root, d), True)]
+            for name in names:
+                rel_path = os.path.normpath(os.path.join(rel_root, name))
+                if not rules.allows_name(name) or rules.ignores(rel_path, False):
+                    continue
+                if rules.max_file_size and not rules.allows_size(os.path.getsize(os.path.join(root, name))):
+                    continue
+                files.append(rel_path)
         
         # 按路径排序
         files.sort()
@@ -151,7 +199,7 @@ async def read_file(path: str) -> dict[str, Any]:
         包含文件内容的字典
     """    
     # 处理相对路径和绝对路径
-    workspace_path_obj = Path(workspace_path)
+    workspace_path_obj, _, rules = _workspace()
     if os.path.isabs(path):
         target_path = Path(path)
     else:
@@ -163,6 +211,13 @@ async def read_file(path: str) -> dict[str, Any]:
     if not target_path.is_file():
         return {"error": f"路径不是文件: {path}", "content": None}
     
+    rel_target = os.path.relpath(target_path, workspace_path_obj)
+    if not rel_target.startswith(os.pardir) and rules.ignores_path(rel_target, False):
+        return {"error": f"文件已被工作空间忽略规则排除: {path}", "content": None}
+    
+    if not rules.allows_size(target_path.stat().st_size):
+        return {"error": f"文件超过大小限制（{rules.max_file_size} 字节）: {path}", "content": None}
+    
     try:
         # 尝试以UTF-8编码读取，如果失败则尝试其他编码
         try:
@@ -191,4 +246,188 @@ async def read_file(path: str) -> dict[str, Any]:
         return {"error": f"读取文件时出错: {str(e)}", "content": None}
 
 
-TOOLS: List[Callable[..., Any]] = [search, find_directory, list_directory_files, read_file]
+def _markdown_files(workspace_root: Path, workspace: WorkspaceModel | None, rules: IgnoreRules) -> list[str]:
+    """返回工作空间内所有未被忽略的 markdown 文件的相对路径."""
+    if workspace is not None:
+        return workspace.markdown_files()
+    return scan_markdown_files(str(workspace_root), rules)
+
+
+max_section_bytes = 16000
+"""read_section 单次返回的最大字节数。"""
+
+
+def _relative_markdown_path(workspace_root: Path, path: str, rules: IgnoreRules) -> str | None:
+    """返回 markdown 文件相对于工作空间的路径；不在工作空间内或被忽略规则排除时返回 None."""
+    target_path = Path(path) if os.path.isabs(path) else workspace_root / path
+    rel_path = os.path.relpath(target_path, workspace_root)
+    if rel_path.startswith(os.pardir) or not rules.allows_name(rel_path) or rules.ignores_path(rel_path, False):
+        return None
+    return rel_path
+
+
+async def list_sections(path: str) -> dict[str, Any]:
+    """列出 markdown 文件按标题划分的章节.
+
+    返回每个章节的 id、标题路径、标题级别和字节数，可配合 read_section
+    只读取需要的章节，而不必读取整个文件。
+
+    Args:
+        path: markdown 文件路径（相对于工作空间根目录或绝对路径）
+
+    Returns:
+        包含章节列表的字典，每个章节包含 id、heading（以 " > " 连接的标题路径）、
+        level 和 bytes
+    """
+    workspace_root, _, rules = _workspace()
+    rel_path = _relative_markdown_path(workspace_root, path, rules)
+    if rel_path is None:
+        return {"error": f"不是工作空间内的 markdown 文件: {path}", "sections": []}
+    index = section_index(str(workspace_root))
+
+    def load() -> list[Section]:
+        sections = index.sections(rel_path)
+        index.save()
+        return sections
+
+    try:
+        # 切分文件并写回索引都需要磁盘读写，放到线程中执行，避免阻塞事件循环
+        sections = await asyncio.to_thread(load)
+    except FileNotFoundError:
+        return {"error": f"文件不存在: {path}", "sections": []}
+    except OSError as e:
+        return {"error": f"读取文件时出错: {str(e)}", "sections": []}
+    return {
+        "path": rel_path,
+        "sections": [
+            {
+                "id": section.id,
+                "heading": section.heading_path,
+                "level": section.level,
+                "bytes": section.end - section.start,
+            }
+            for section in sections
+        ],
+        "count": len(sections),
+    }
+
+
+async def read_section(section: str, path: str = "", include_subsections: bool = False) -> dict[str, Any]:
+    """读取 markdown 文件中的一个章节.
+
+    按章节 id（来自 list_sections）读取；或同时给出文件路径，按标题路径读取，
+    标题之间用 " > " 分隔，也可以只给出最后几级标题。只读取该章节所在的字节范围。
+
+    Args:
+        section: 章节 id，或标题路径，如 "Momentum > Time-series momentum"
+        path: 按标题路径读取时所在的 markdown 文件路径
+        include_subsections: 是否包含该章节下的子章节
+
+    Returns:
+        包含章节 id、标题路径和内容的字典
+    """
+    workspace_root, workspace, rules = _workspace()
+    index = section_index(str(workspace_root))
+    if not path:
+        found = index.get(section.strip())
+        if found is None and workspace_root.is_dir():
+            # id 可能来自尚未建立章节索引的文件（如 search_workspace 的结果），更新索引后重试；
+            # 更新需要遍历工作空间，放到线程中执行，避免阻塞事件循环
+            await asyncio.to_thread(lambda: index.update(_markdown_files(workspace_root, workspace, rules)))
+            found = index.get(section.strip())
+        if found is None:
+            return {"error": f"未找到章节 id: {section}，请先用 list_sections 获取章节 id", "content": None}
+    else:
+        rel_path = _relative_markdown_path(workspace_root, path, rules)
+        if rel_path is None:
+            return {"error": f"不是工作空间内的 markdown 文件: {path}", "content": None}
+        try:
+            matches = index.find(rel_path, section)
+        except FileNotFoundError:
+            return {"error": f"文件不存在: {path}", "content": None}
+        except OSError as e:
+            return {"error": f"读取文件时出错: {str(e)}", "content": None}
+        if not matches:
+            found = index.get(section.strip())
+            if found is None or found.path != rel_path:
+                return {"error": f"未找到章节: {section}", "content": None}
+        elif len(matches) > 1:
+            return {
+                "error": f"有多个章节匹配: {section}，请使用章节 id",
+                "content": None,
+                "matches": [{"id": s.id, "heading": s.heading_path} for s in matches],
+            }
+        else:
+            found = matches[0]
+    index.save()
+
+    end = found.subtree_end if include_subsections else found.end
+    try:
+        content = index.read(found, subsections=include_subsections, max_bytes=max_section_bytes)
+    except OSError as e:
+        return {"error": f"读取文件时出错: {str(e)}", "content": None}
+    return {
+        "id": found.id,
+        "path": found.path,
+        "heading": found.heading_path,
+        "content": content,
+        "bytes": end - found.start,
+        "truncated": end - found.start > max_section_bytes,
+    }
+
+
+async def search_workspace(query: str, k: int = 5) -> dict[str, Any]:
+    """在工作空间的所有 markdown 文档中检索与问题最相关的段落.
+
+    结合关键词（BM25）和语义向量两种检索方式，返回最相关的 k 个段落及其所在的
+    文件和章节。通常一次检索即可找到回答所需的内容；需要更多上下文时，
+    可用返回的章节 id 调用 read_section。
+
+    Args:
+        query: 检索的问题或关键词
+        k: 返回的段落数量
+
+    Returns:
+        包含段落列表的字典，每个段落包含 path、heading、section_id、score 和 text
+    """
+    from react_agent.retrieval import retrieval_index
+
+    workspace_root, workspace, rules = _workspace()
+    try:
+        embeddings = get_runtime(Context).context.retrieval_embeddings
+    except RuntimeError:
+        embeddings = "hashing"
+    if not workspace_root.is_dir():
+        return {"error": f"工作空间路径不存在: {workspace_root}", "results": []}
+
+    def retrieve() -> list[dict[str, Any]]:
+        index = retrieval_index(str(workspace_root), embeddings)
+        index.update(_markdown_files(workspace_root, workspace, rules))
+        return [
+            {
+                "path": passage.path,
+                "heading": passage.heading,
+                "section_id": passage.section_id,
+                "score": round(score, 4),
+                "text": passage.text,
+            }
+            for passage, score in index.search(query, max(1, min(k, 20)))
+        ]
+
+    try:
+        # 首次检索需要切分和向量化所有文档，放到线程中执行，避免阻塞事件循环
+        results = await asyncio.to_thread(retrieve)
+    except Exception as e:
+        return {"error": f"检索时出错: {str(e)}", "results": []}
+    return {"query": query, "results": results, "count": len(results)}
+
+
+TOOLS: List[Callable[..., Any]] = [
+    search,
+    find_directory,
+    list_directory_files,
+    read_file,
+    search_workspace,
+    list_sections,
+    read_section,
+]
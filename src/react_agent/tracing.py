@@ -0,0 +1,328 @@
+"""Lightweight latency tracing for the ReAct graph.
+
+When ``Context.trace`` is on, the graph records a span for every node, every
+tool call, every chat model call (with prompt and completion tokens, and the
+time to the first streamed token) and for the stages inside
+``workspace_index``. Each finished span is
+
+- appended as one JSON line to ``Context.trace_file``, in batches so that a
+  span costs tens of microseconds, and
+- added to an in-process latency histogram keyed by ``kind:name``, available
+  from ``get_tracer(path).histograms()``.
+
+Spans nest through a context variable, so a model call made inside a node
+records that node's span as its parent, under ``astream`` as well as
+``ainvoke``. When tracing is off, every hook is a single context variable
+lookup.
+"""
+
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+import weakref
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import LLMResult
+from langchain_core.tracers.context import register_configure_hook
+from langgraph.config import get_config
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from langgraph.runtime import Runtime
+from langgraph.types import Command
+
+from react_agent.context import Context
+
+
+@dataclass
+class Span:
+    """A timed operation."""
+
+    name: str
+    kind: str
+    """``node``, ``tool``, ``model`` or ``stage``."""
+    span_id: str = field(default_factory=lambda: os.urandom(8).hex())
+    parent_id: str | None = None
+    start: float = field(default_factory=time.time)
+    duration_ms: float = 0.0
+    error: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+
+class Histogram:
+    """Latency histogram with log-spaced buckets, about 12% wide."""
+
+    _BASE = 0.01
+    """Upper bound of the first bucket, in milliseconds."""
+    _GROWTH = 1.125
+
+    def __init__(self) -> None:
+        """Initialize an empty histogram."""
+        self.buckets: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, ms: float) -> None:
+        """Add a duration in milliseconds."""
+        index = max(0, math.ceil(math.log(max(ms, self._BASE) / self._BASE, self._GROWTH)))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q: float) -> float:
+        """Return an upper bound of the ``q`` quantile, in milliseconds."""
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self._BASE * self._GROWTH**index, self.max)
+        return self.max
+
+    def summary(self) -> dict[str, float]:
+        """Return the count, mean, p50, p95, p99 and max."""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "p99_ms": round(self.quantile(0.99), 3),
+            "max_ms": round(self.max, 3),
+        }
+
+
+class Tracer:
+    """Collects finished spans into histograms and a JSONL file."""
+
+    def __init__(self, path: str | Path | None = None, *, buffer_spans: int = 256) -> None:
+        """Initialize the tracer.
+
+        Args:
+            path: JSONL file spans are appended to. ``None`` keeps histograms only.
+            buffer_spans: Number of spans buffered before they are written.
+        """
+        self.path = Path(path) if path else None
+        self.buffer_spans = buffer_spans
+        self._buffer: list[Span] = []
+        self._histograms: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self.handler = _SpanCallbackHandler(self)
+        atexit.register(_flush_at_exit, weakref.ref(self))
+
+    def record(self, span: Span) -> None:
+        """Add a finished span."""
+        with self._lock:
+            key = f"{span.kind}:{span.name}"
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(span.duration_ms)
+            if self.path is not None:
+                self._buffer.append(span)
+                if len(self._buffer) >= self.buffer_spans:
+                    self._write()
+
+    def flush(self) -> None:
+        """Write buffered spans to the trace file."""
+        with self._lock:
+            self._write()
+
+    def _write(self) -> None:
+        if not self._buffer or self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lines = [json.dumps(vars(span), ensure_ascii=False, default=str) for span in self._buffer]
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self._buffer.clear()
+
+    def histograms(self) -> dict[str, dict[str, float]]:
+        """Return latency summaries keyed by ``kind:name``."""
+        with self._lock:
+            return {key: h.summary() for key, h in sorted(self._histograms.items())}
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """Record spans from the current context into this tracer."""
+        tracer_token = _tracer.set(self)
+        handler_token = _handler.set(self.handler)
+        try:
+            yield
+        finally:
+            _handler.reset(handler_token)
+            _tracer.reset(tracer_token)
+
+
+def _flush_at_exit(ref: weakref.ref[Tracer]) -> None:
+    tracer = ref()
+    if tracer is not None:
+        tracer.flush()
+
+
+_tracer: ContextVar[Tracer | None] = ContextVar("react_agent_tracer", default=None)
+_span: ContextVar[Span | None] = ContextVar("react_agent_span", default=None)
+_handler: ContextVar[_SpanCallbackHandler | None] = ContextVar("react_agent_span_handler", default=None)
+_tracers: dict[str, Tracer] = {}
+_tracers_lock = threading.Lock()
+
+
+def get_tracer(path: str | Path | None = None) -> Tracer:
+    """Return the process-wide tracer writing to ``path``."""
+    key = os.path.abspath(path) if path else ""
+    with _tracers_lock:
+        tracer = _tracers.get(key)
+        if tracer is None:
+            tracer = _tracers[key] = Tracer(key or None)
+        return tracer
+
+
+def _tracer_for(context: object) -> Tracer | None:
+    if isinstance(context, Context) and context.trace:
+        return get_tracer(context.trace_file)
+    return None
+
+
+@contextmanager
+def _open(tracer: Tracer, name: str, kind: str, attributes: dict[str, Any]) -> Iterator[Span]:
+    parent = _span.get()
+    span = Span(name, kind, parent_id=parent.span_id if parent else None, attributes=attributes)
+    token = _span.set(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        _span.reset(token)
+        tracer.record(span)
+
+
+@contextmanager
+def span(name: str, kind: str = "stage", **attributes: Any) -> Iterator[Span | None]:
+    """Time a block as a child of the current span, if tracing is active."""
+    tracer = _tracer.get()
+    if tracer is None:
+        yield None
+        return
+    with _open(tracer, name, kind, attributes) as current:
+        yield current
+
+
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def traced_node(node: F) -> F:
+    """Record a span for each run of an async ``(state, runtime)`` graph node."""
+
+    @functools.wraps(node)
+    async def wrapper(state: Any, runtime: Runtime[Context]) -> Any:
+        tracer = _tracer_for(runtime.context)
+        if tracer is None:
+            return await node(state, runtime)
+        metadata = get_config().get("metadata", {})
+        attributes = {"step": metadata.get("langgraph_step"), "thread_id": metadata.get("thread_id")}
+        with tracer.activate(), _open(tracer, node.__name__, "node", attributes):
+            return await node(state, runtime)
+
+    return wrapper  # type: ignore[return-value]
+
+
+async def trace_tool_call(
+    request: ToolCallRequest,
+    execute: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command[Any]]],
+) -> ToolMessage | Command[Any]:
+    """``ToolNode`` wrapper recording a span for each tool call."""
+    tracer = _tracer_for(getattr(request.runtime, "context", None))
+    if tracer is None:
+        return await execute(request)
+    with tracer.activate(), _open(tracer, request.tool_call["name"], "tool", {}) as current:
+        result = await execute(request)
+        if isinstance(result, ToolMessage) and result.status == "error":
+            current.error = result.text[:200]
+        return result
+
+
+@dataclass
+class _ModelRun:
+    span: Span
+    started: float
+    first_token: float | None = None
+
+
+class _SpanCallbackHandler(BaseCallbackHandler):
+    """Turns chat model callbacks into ``model`` spans."""
+
+    run_inline = True
+
+    def __init__(self, tracer: Tracer) -> None:
+        self.tracer = tracer
+        self._runs: dict[UUID, _ModelRun] = {}
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[BaseMessage]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        parent = _span.get()
+        name = (metadata or {}).get("ls_model_name") or serialized.get("name") or "chat_model"
+        span = Span(str(name), "model", parent_id=parent.span_id if parent else None)
+        self._runs[run_id] = _ModelRun(span, time.perf_counter())
+
+    def on_llm_new_token(
+        self,
+        token: Any,
+        *,
+        run_id: UUID,
+        **kwargs: Any,
+    ) -> None:
+        run = self._runs.get(run_id)
+        if run is not None and run.first_token is None:
+            run.first_token = time.perf_counter()
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if isinstance(message, AIMessage) and message.usage_metadata:
+                    run.span.attributes["prompt_tokens"] = message.usage_metadata["input_tokens"]
+                    run.span.attributes["completion_tokens"] = message.usage_metadata["output_tokens"]
+        self._finish(run)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is not None:
+            run.span.error = f"{type(error).__name__}: {error}"
+            self._finish(run)
+
+    def _finish(self, run: _ModelRun) -> None:
+        now = time.perf_counter()
+        run.span.duration_ms = round((now - run.started) * 1000, 3)
+        if run.first_token is not None:
+            run.span.attributes["ttft_ms"] = round((run.first_token - run.started) * 1000, 3)
+        self.tracer.record(run.span)
+
+
+register_configure_hook(_handler, inheritable=True)
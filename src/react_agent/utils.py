@@ -1,12 +1,23 @@
 """Utility & helper functions."""
 
-from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
-from langchain_core.messages import BaseMessage
-from langchain_openai import ChatOpenAI
-from dotenv import load_dotenv
+from __future__ import annotations
+
+import functools
 import os
-load_dotenv()
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.messages import BaseMessage
+
+
+@functools.cache
+def load_env() -> None:
+    """Load ``.env`` into the environment, once, on first use."""
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
 
 def get_message_text(msg: BaseMessage) -> str:
     """Get the text content of a message."""
@@ -31,10 +42,21 @@ def load_chat_model(fully_specified_name: str) -> BaseChatModel:
     provider, model = fully_specified_name.split("/", maxsplit=1)
     return init_chat_model(model, model_provider=provider)
     """
-    model = ChatOpenAI(
-        model=os.getenv("MODEL"),  
-        api_key=os.getenv("API_KEY"),
-        base_url=os.getenv("BASE_URL"),
+    load_env()
+    return _openai_model(os.getenv("MODEL"), os.getenv("API_KEY"), os.getenv("BASE_URL"))
+
+
+@functools.lru_cache(maxsize=8)
+def _openai_model(model: str | None, api_key: str | None, base_url: str | None) -> BaseChatModel:
+    # One client per configuration, so that every run in the process shares
+    # its HTTP connection pool instead of opening new connections. Retries are
+    # left to ``react_agent.ratelimit``, which also rate limits them.
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        model=model,  # type: ignore[arg-type]
+        api_key=api_key,  # type: ignore[arg-type]
+        base_url=base_url,
+        max_retries=0,
         extra_body={"chat_template_kwargs": {"enable_thinking": False}}
-    )
-    return model
\ No newline at end of file
+    )
\ No newline at end of file
@@ -0,0 +1,220 @@
+"""Local embeddings and an in-process vector index.
+
+``HashingEmbeddings`` turns text into fixed-size vectors by feature hashing the
+tokens produced by ``react_agent.lexical.tokenize``. It needs no model or
+network access, which makes it a reasonable default for recall over short
+memories; any LangChain ``Embeddings`` can be used instead.
+
+``VectorIndex`` is a brute-force cosine index over a NumPy matrix. For large
+collections it can partition vectors with k-means (IVF) and only score the
+partitions closest to the query.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections.abc import Callable, Hashable, Sequence
+
+import numpy as np
+import numpy.typing as npt
+from langchain_core.embeddings import Embeddings
+
+from react_agent.lexical import tokenize
+
+
+class HashingEmbeddings(Embeddings):
+    """Feature-hashed bag-of-tokens embeddings, L2-normalized."""
+
+    def __init__(self, dims: int = 512) -> None:
+        """Create an embedder producing ``dims``-dimensional vectors."""
+        self.dims = dims
+
+    def _embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for token in tokenize(text):
+            # crc32 is stable across processes, unlike the built-in hash().
+            h = zlib.crc32(token.encode("utf-8"))
+            vector[h % self.dims] += 1.0 if h & 0x80000000 else -1.0
+        norm = float(np.linalg.norm(vector))
+        if norm:
+            vector /= norm
+        return [float(x) for x in vector]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a list of documents."""
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a query."""
+        return self._embed(text)
+
+
+class VectorIndex:
+    """Cosine-similarity index mapping ids to vectors.
+
+    Vectors are normalized on insert and kept in one contiguous matrix.
+    Replacing or removing an id leaves a tombstone that is compacted once
+    tombstones make up half the matrix.
+    """
+
+    def __init__(
+        self,
+        dims: int,
+        *,
+        ivf_lists: int = 0,
+        n_probe: int = 8,
+        train_threshold: int | None = None,
+    ) -> None:
+        """Create an empty index.
+
+        Args:
+            dims: Vector dimensionality.
+            ivf_lists: Number of k-means partitions. ``0`` keeps brute force.
+            n_probe: Number of partitions scored per query when IVF is on.
+            train_threshold: Number of vectors at which partitions are first
+                trained; defaults to ``40 * ivf_lists``. Partitions are
+                retrained whenever the index doubles in size.
+        """
+        self.dims = dims
+        self.ivf_lists = ivf_lists
+        self.n_probe = n_probe
+        self.train_threshold = train_threshold or 40 * ivf_lists
+        self._matrix = np.zeros((0, dims), dtype=np.float32)
+        self._size = 0
+        self._ids: list[Hashable] = []
+        self._alive = np.zeros(0, dtype=bool)
+        self._rows: dict[Hashable, int] = {}
+        self._centroids: np.ndarray | None = None
+        self._assignments = np.zeros(0, dtype=np.int32)
+        self._trained_at = 0
+
+    def __len__(self) -> int:
+        """Return the number of live vectors."""
+        return len(self._rows)
+
+    def __contains__(self, id: object) -> bool:
+        """Return whether ``id`` is indexed."""
+        return id in self._rows
+
+    def add(self, id: Hashable, vector: npt.ArrayLike) -> None:
+        """Insert or replace the vector for ``id``."""
+        self.add_many([id], np.asarray(vector, dtype=np.float32)[None, :])
+
+    def add_many(self, ids: Sequence[Hashable], vectors: npt.ArrayLike) -> None:
+        """Insert or replace several vectors at once."""
+        if not ids:
+            return
+        block = np.array(vectors, dtype=np.float32).reshape(len(ids), self.dims)
+        if len(set(ids)) != len(ids):
+            last = {id: i for i, id in enumerate(ids)}
+            ids, block = list(last), block[list(last.values())]
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        block /= np.where(norms == 0, 1, norms)
+        for id in ids:
+            self.remove(id)
+        needed = self._size + len(ids)
+        if needed > len(self._matrix):
+            capacity = max(needed, 2 * len(self._matrix), 1024)
+            matrix = np.zeros((capacity, self.dims), dtype=np.float32)
+            matrix[: self._size] = self._matrix[: self._size]
+            self._matrix = matrix
+            self._alive = np.concatenate([self._alive, np.zeros(capacity - len(self._alive), bool)])
+            self._assignments = np.concatenate(
+                [self._assignments, np.zeros(capacity - len(self._assignments), np.int32)]
+            )
+        start = self._size
+        self._matrix[start:needed] = block
+        self._alive[start:needed] = True
+        for offset, id in enumerate(ids):
+            self._rows[id] = start + offset
+        self._ids.extend(ids)
+        self._size = needed
+        if self._centroids is not None:
+            self._assignments[start:needed] = np.argmax(block @ self._centroids.T, axis=1)
+        if self.ivf_lists and len(self) >= max(self.train_threshold, 2 * self._trained_at):
+            self.train()
+
+    def remove(self, id: Hashable) -> None:
+        """Remove ``id`` from the index if present."""
+        row = self._rows.pop(id, None)
+        if row is None:
+            return
+        self._alive[row] = False
+        if self._size - len(self._rows) > max(len(self._rows), 1024):
+            self._compact()
+
+    def _compact(self) -> None:
+        live = np.flatnonzero(self._alive[: self._size])
+        self._matrix = self._matrix[live].copy()
+        self._assignments = self._assignments[live].copy()
+        self._ids = [self._ids[i] for i in live]
+        self._alive = np.ones(len(live), dtype=bool)
+        self._size = len(live)
+        self._rows = {id: row for row, id in enumerate(self._ids)}
+
+    def train(self, iterations: int = 10, seed: int = 0) -> None:
+        """Partition the live vectors into ``ivf_lists`` clusters with spherical k-means."""
+        live = np.flatnonzero(self._alive[: self._size])
+        n_lists = min(self.ivf_lists, len(live))
+        if n_lists == 0:
+            return
+        data = self._matrix[live]
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(len(live), n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            for c in range(n_lists):
+                members = data[labels == c]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[c] = centroid / (np.linalg.norm(centroid) or 1)
+        self._centroids = centroids
+        self._assignments[: self._size] = np.argmax(self._matrix[: self._size] @ centroids.T, axis=1)
+        self._trained_at = len(live)
+
+    def search(
+        self,
+        query: npt.ArrayLike,
+        k: int,
+        predicate: Callable[[Hashable], bool] | None = None,
+    ) -> list[tuple[Hashable, float]]:
+        """Return up to ``k`` ``(id, cosine similarity)`` pairs, best first.
+
+        Args:
+            query: The query vector.
+            k: Maximum number of results.
+            predicate: Optional filter on ids, evaluated in rank order until
+                ``k`` ids are accepted.
+        """
+        if not self._rows or k <= 0:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1)
+        if self._centroids is not None:
+            probes = np.argsort(-(self._centroids @ q))[: self.n_probe]
+            rows = np.flatnonzero(
+                self._alive[: self._size] & np.isin(self._assignments[: self._size], probes)
+            )
+            scores = self._matrix[rows] @ q
+        else:
+            # Score the whole matrix in place rather than gathering live rows,
+            # which would copy it; tombstones are pushed to the bottom instead.
+            rows = np.arange(self._size)
+            scores = self._matrix[: self._size] @ q
+            scores[~self._alive[: self._size]] = -np.inf
+        live = len(self._rows) if self._centroids is None else len(rows)
+        if predicate is None and k < len(rows):
+            top = np.argpartition(-scores, k)[:k]
+            order = top[np.argsort(-scores[top])]
+        else:
+            order = np.argsort(-scores)[:live]
+        results: list[tuple[Hashable, float]] = []
+        for i in order:
+            if not self._alive[rows[i]]:
+                continue
+            id = self._ids[rows[i]]
+            if predicate is None or predicate(id):
+                results.append((id, float(scores[i])))
+                if len(results) >= k:
+                    break
+        return results
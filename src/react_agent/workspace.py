@@ -0,0 +1,510 @@
+"""Workspace listings shared between runs.
+
+Indexing a workspace scans its directory tree and asks the model to analyze
+it, which takes seconds. When many runs start on the same workspace at once,
+``SingleFlight`` lets the first one do that work and the others await its
+result, instead of each repeating it.
+
+Runs only share a result while the workspace is unchanged: jobs are keyed by
+``workspace_fingerprint``, which changes whenever a directory or markdown file
+under the workspace is added, removed, resized or modified.
+
+Every traversal here skips what an ``IgnoreRules`` excludes (see
+``react_agent.ignore``), pruning ignored directories as it goes.
+
+In a long-running server, ``watch_workspace`` keeps a ``WorkspaceModel`` of a
+workspace's directories and markdown files in memory and up to date, so the
+index and the workspace tools read it instead of walking the filesystem on
+every call. Changes are picked up by ``watchfiles`` (inotify and its
+equivalents) when it is installed, and otherwise by polling modification
+times: a directory's mtime changes when entries are added to or removed from
+it, so a poll stats each directory and markdown file but only lists the
+directories that changed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Generic, TypeVar
+
+from react_agent.ignore import IgnoreRules
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DEFAULT_RULES = IgnoreRules()
+
+
+def workspace_cache_dir(workspace_path: str) -> Path:
+    """Return the directory where indexes derived from a workspace are persisted.
+
+    It lives under the user cache directory rather than in the workspace, which
+    may be read-only or shared, and is keyed by the workspace's absolute path.
+    """
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    key = hashlib.sha256(os.path.abspath(workspace_path).encode()).hexdigest()[:16]
+    return Path(base) / "react_agent" / "workspaces" / key
+
+
+def workspace_fingerprint(workspace_path: str, max_depth: int = 5, rules: IgnoreRules | None = None) -> str:
+    """Return a digest of the parts of a workspace the index depends on.
+
+    Only directory entries are read, never file contents, so this costs a small
+    fraction of building the index. It covers the same tree the index scans:
+    directories that ``rules`` do not ignore, up to ``max_depth`` deep, and the
+    files in them that the rules allow, with their sizes and modification times.
+    """
+    rules = rules or _DEFAULT_RULES
+    digest = hashlib.blake2b(os.path.abspath(workspace_path).encode(), digest_size=16)
+    digest.update(repr(rules.key).encode())
+    model = watched_workspace(workspace_path, rules)
+    if model is not None:
+        # The watcher already tracks every change; no need to walk the tree.
+        digest.update(f"\0watched{id(model)}\0{model.generation}".encode())
+        return digest.hexdigest()
+    if not os.path.isdir(workspace_path):
+        digest.update(b"\0missing")
+        return digest.hexdigest()
+    stack = [("", 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(os.path.join(workspace_path, directory)) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            rel = os.path.join(directory, entry.name)
+            try:
+                if entry.is_dir():
+                    if rules.ignores(rel, True):
+                        continue
+                    digest.update(f"\0d{rel}".encode())
+                    if depth + 1 < max_depth:
+                        stack.append((rel, depth + 1))
+                elif rules.allows_name(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    if rules.includes_file(rel, stat.st_size):
+                        digest.update(f"\0f{rel}\0{stat.st_size}\0{stat.st_mtime_ns}".encode())
+            except OSError:
+                continue
+    return digest.hexdigest()
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one job per key at a time, and optionally keep its result."""
+
+    def __init__(self, max_results: int = 32) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_results: Number of kept results; the least recently used are
+                dropped first.
+        """
+        self.max_results = max_results
+        self._results: OrderedDict[Hashable, T] = OrderedDict()
+        self._running: dict[Hashable, asyncio.Task[T]] = {}
+
+    async def run(
+        self,
+        key: Hashable,
+        job: Callable[[], Awaitable[T]],
+        *,
+        reuse: bool = True,
+        keep: Callable[[T], bool] = lambda result: True,
+    ) -> T:
+        """Return ``job()``'s result, sharing it with concurrent calls for ``key``.
+
+        Args:
+            key: Identifies the work; calls with equal keys share one job.
+            job: Does the work. Called only if no job for ``key`` is running
+                and no result for it was kept.
+            reuse: Return a kept result for ``key`` if there is one. Otherwise
+                only a job that is still running is shared.
+            keep: Whether a finished result is kept for later calls. Results
+                that are not kept are still shared with the calls that were
+                waiting for them.
+        """
+        if reuse and key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+        task = self._running.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+
+            async def run_and_keep() -> T:
+                try:
+                    result = await job()
+                finally:
+                    if self._running.get(key) is asyncio.current_task():
+                        del self._running[key]
+                if keep(result):
+                    self._results[key] = result
+                    while len(self._results) > self.max_results:
+                        self._results.popitem(last=False)
+                return result
+
+            task = self._running[key] = asyncio.ensure_future(run_and_keep())
+        # The job runs in its own task, so a caller that is cancelled or times
+        # out does not cancel it for the others.
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        """Drop every kept result."""
+        self._results.clear()
+
+
+def scan_markdown_files(root: str, rules: IgnoreRules | None = None) -> list[str]:
+    """Return the files of a workspace that ``rules`` allow, sorted, by walking its tree.
+
+    Covers the same files as ``WorkspaceModel.markdown_files``; use that instead
+    when the workspace is watched.
+    """
+    rules = rules or _DEFAULT_RULES
+    files: list[str] = []
+    for directory, dirs, names in os.walk(root):
+        rel = os.path.relpath(directory, root)
+        rel = "" if rel == os.curdir else rel
+        dirs[:] = [name for name in dirs if not rules.ignores(os.path.join(rel, name), True)]
+        for name in names:
+            path = os.path.join(rel, name)
+            if not rules.allows_name(name) or rules.ignores(path, False):
+                continue
+            try:
+                if rules.max_file_size and not rules.allows_size(os.stat(os.path.join(root, path)).st_size):
+                    continue
+            except OSError:
+                continue
+            files.append(path)
+    return sorted(files)
+
+
+@dataclass
+class _Directory:
+    mtime_ns: int
+    dirs: set[str] = field(default_factory=set)
+    """Names of the indexed subdirectories."""
+    files: dict[str, tuple[int, int]] = field(default_factory=dict)
+    """Size and mtime of each allowed file, by name, including ones over the size limit."""
+
+
+class WorkspaceModel:
+    """An in-memory listing of a workspace's directories and markdown files.
+
+    Paths are relative to the root, as ``os.path.relpath`` returns them. What
+    the ``IgnoreRules`` exclude is not included.
+    """
+
+    def __init__(self, root: str, rules: IgnoreRules | None = None) -> None:
+        """Build the listing of the workspace at ``root``."""
+        self.root = os.path.abspath(root)
+        self.rules = rules or _DEFAULT_RULES
+        self.generation = 0
+        """Incremented whenever the listing changes."""
+        self._dirs: dict[str, _Directory] = {}
+        self._lock = threading.RLock()
+        self.rescan()
+
+    def _abs(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def _list(self, rel: str) -> _Directory | None:
+        path = self._abs(rel)
+        try:
+            # Taken before listing, so a change made meanwhile is seen by the next poll.
+            directory = _Directory(os.stat(path).st_mtime_ns)
+            with os.scandir(path) as it:
+                for entry in it:
+                    entry_rel = os.path.join(rel, entry.name)
+                    try:
+                        if entry.is_dir():
+                            if not self.rules.ignores(entry_rel, True):
+                                directory.dirs.add(entry.name)
+                        elif (
+                            self.rules.allows_name(entry.name)
+                            and not self.rules.ignores(entry_rel, False)
+                            and entry.is_file()
+                        ):
+                            stat = entry.stat()
+                            directory.files[entry.name] = (stat.st_size, stat.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            return None
+        return directory
+
+    def _load(self, rel: str) -> None:
+        stack = [rel]
+        while stack:
+            current = stack.pop()
+            directory = self._list(current)
+            if directory is None:
+                continue
+            self._dirs[current] = directory
+            stack.extend(os.path.join(current, name) for name in directory.dirs)
+
+    def _drop(self, rel: str) -> None:
+        prefix = rel + os.sep
+        for key in [k for k in self._dirs if k == rel or k.startswith(prefix)]:
+            del self._dirs[key]
+
+    def _sync(self, rel: str) -> bool:
+        # Relist one directory, loading new subdirectories and dropping removed ones.
+        old = self._dirs.get(rel)
+        new = self._list(rel)
+        if new is None:
+            if old is None:
+                return False
+            self._drop(rel)
+            parent = os.path.dirname(rel)
+            if parent in self._dirs:
+                self._dirs[parent].dirs.discard(os.path.basename(rel))
+            return True
+        self._dirs[rel] = new
+        old_dirs = old.dirs if old else set()
+        for name in old_dirs - new.dirs:
+            self._drop(os.path.join(rel, name))
+        for name in new.dirs - old_dirs:
+            self._load(os.path.join(rel, name))
+        return old is None or old.dirs != new.dirs or old.files != new.files
+
+    def _changed(self) -> None:
+        self.generation += 1
+
+    def rescan(self) -> None:
+        """Rebuild the listing from scratch."""
+        with self._lock:
+            self._dirs.clear()
+            self._load("")
+            self._changed()
+
+    def refresh(self) -> bool:
+        """Pick up changes by comparing modification times, and return whether there were any."""
+        changed = False
+        with self._lock:
+            for rel in list(self._dirs):
+                directory = self._dirs.get(rel)
+                if directory is None:
+                    continue
+                try:
+                    mtime_ns = os.stat(self._abs(rel)).st_mtime_ns
+                except OSError:
+                    changed |= self._sync(rel)
+                    continue
+                if mtime_ns != directory.mtime_ns:
+                    changed |= self._sync(rel)
+                    continue
+                for name, (size, mtime) in list(directory.files.items()):
+                    try:
+                        stat = os.stat(os.path.join(self._abs(rel), name))
+                    except OSError:
+                        changed |= self._sync(rel)
+                        break
+                    if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+                        directory.files[name] = (stat.st_size, stat.st_mtime_ns)
+                        changed = True
+            if changed:
+                self._changed()
+        return changed
+
+    def apply(self, paths: Iterable[str]) -> bool:
+        """Update the listing for changes reported at absolute ``paths``, and return whether it changed."""
+        changed = False
+        with self._lock:
+            for path in paths:
+                rel = os.path.relpath(path, self.root)
+                if rel == os.curdir:
+                    changed |= self._sync("")
+                    continue
+                if rel.startswith(os.pardir):
+                    continue
+                parent = os.path.dirname(rel)
+                if parent in self._dirs:
+                    changed |= self._sync(parent)
+                if rel in self._dirs:
+                    changed |= self._sync(rel)
+            if changed:
+                self._changed()
+        return changed
+
+    # Queries
+
+    @staticmethod
+    def _key(rel: str) -> str:
+        rel = os.path.normpath(rel)
+        return "" if rel == os.curdir else rel
+
+    def is_directory(self, rel: str) -> bool:
+        """Return whether ``rel`` is an indexed directory."""
+        return self._key(rel) in self._dirs
+
+    def find_directories(self, keyword: str) -> list[str]:
+        """Return the directories whose name contains ``keyword``, ignoring case."""
+        keyword = keyword.lower()
+        with self._lock:
+            names = {rel: os.path.basename(rel) if rel else os.path.basename(self.root) for rel in self._dirs}
+        return sorted(rel or os.curdir for rel, name in names.items() if keyword in name.lower())
+
+    def markdown_files(self, rel: str = "") -> list[str]:
+        """Return the markdown files under directory ``rel``, recursively, sorted."""
+        rel = self._key(rel)
+        prefix = rel + os.sep
+        with self._lock:
+            return sorted(
+                os.path.join(key, name)
+                for key, directory in self._dirs.items()
+                if not rel or key == rel or key.startswith(prefix)
+                for name, (size, _) in directory.files.items()
+                if self.rules.allows_size(size)
+            )
+
+    def tree(self, max_depth: int = 5) -> tuple[dict[str, Any], list[str], list[str]]:
+        """Return the directory tree, directory paths and markdown files the workspace index builds."""
+        directory_paths: list[str] = []
+        markdown_files: list[str] = []
+
+        def build(rel: str, depth: int) -> dict[str, Any]:
+            if depth >= max_depth:
+                return {"type": "directory", "truncated": True}
+            if depth > 0:
+                directory_paths.append(rel)
+            directory = self._dirs.get(rel) or _Directory(0)
+            name = os.path.basename(rel) if rel else os.path.basename(self.root)
+            children = [build(os.path.join(rel, child), depth + 1) for child in sorted(directory.dirs)]
+            for file_name, (size, _) in sorted(directory.files.items()):
+                if not self.rules.allows_size(size):
+                    continue
+                path = os.path.join(rel, file_name)
+                markdown_files.append(path)
+                children.append({"type": "file", "name": file_name, "path": path, "size": size})
+            return {"type": "directory", "name": name, "path": rel or os.curdir, "children": children}
+
+        with self._lock:
+            tree = build("", 0)
+        return tree, directory_paths, markdown_files
+
+
+class WorkspaceWatcher:
+    """Keeps a ``WorkspaceModel`` up to date from a background thread."""
+
+    def __init__(
+        self,
+        root: str,
+        *,
+        rules: IgnoreRules | None = None,
+        interval: float = 1.0,
+        use_watchfiles: bool | None = None,
+    ) -> None:
+        """Build the model of ``root``; call ``start`` to begin watching it.
+
+        Args:
+            root: Workspace directory.
+            rules: What the model leaves out. Defaults to ``IgnoreRules()``.
+            interval: Seconds between polls when polling.
+            use_watchfiles: Use ``watchfiles`` for change notifications.
+                Defaults to using it when it is installed.
+        """
+        self.model = WorkspaceModel(root, rules)
+        self.interval = interval
+        if use_watchfiles is None:
+            try:
+                import watchfiles  # type: ignore[import-not-found, unused-ignore]  # noqa: F401
+            except ImportError:
+                use_watchfiles = False
+            else:
+                use_watchfiles = True
+        self.backend = "watchfiles" if use_watchfiles else "polling"
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        """Return whether the watcher thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start watching in a daemon thread."""
+        if not self.running:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=f"workspace-watcher:{self.model.root}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float | None = 5) -> None:
+        """Stop watching."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self) -> None:
+        if self.backend == "watchfiles":
+            try:
+                self._watch()
+                return
+            except Exception:
+                logger.exception("Watching %s failed; polling instead", self.model.root)
+                self.backend = "polling"
+                self.model.rescan()
+        while not self._stop.wait(self.interval):
+            try:
+                self.model.refresh()
+            except Exception:
+                logger.exception("Polling %s failed", self.model.root)
+
+    def _watch(self) -> None:
+        import watchfiles  # type: ignore[import-not-found, unused-ignore]
+
+        for changes in watchfiles.watch(self.model.root, stop_event=self._stop, rust_timeout=0):
+            self.model.apply(path for _, path in changes)
+
+
+_watchers: dict[str, WorkspaceWatcher] = {}
+_watchers_lock = threading.Lock()
+
+
+def watch_workspace(root: str, interval: float = 1.0, rules: IgnoreRules | None = None) -> WorkspaceModel:
+    """Return the process-wide model of ``root`` under ``rules``, watching it from now on.
+
+    A root has one watcher at a time. Asking for it under other rules, as after
+    an edit of its ``.agentignore``, replaces its watcher.
+    """
+    path, rules = os.path.abspath(root), rules or _DEFAULT_RULES
+    with _watchers_lock:
+        watcher = _watchers.get(path)
+        if watcher is not None and watcher.running and watcher.model.rules == rules:
+            return watcher.model
+        if watcher is not None:
+            # Not joined: callers may be on an event loop, and the thread exits
+            # by itself once it sees the stop event.
+            watcher.stop(timeout=0)
+        watcher = _watchers[path] = WorkspaceWatcher(path, rules=rules, interval=interval)
+        watcher.start()
+        return watcher.model
+
+
+def watched_workspace(root: str, rules: IgnoreRules | None = None) -> WorkspaceModel | None:
+    """Return the model of ``root`` under ``rules`` if it is being watched."""
+    watcher = _watchers.get(os.path.abspath(root))
+    if watcher is None or not watcher.running or watcher.model.rules != (rules or _DEFAULT_RULES):
+        return None
+    return watcher.model
+
+
+def stop_watching(root: str | None = None) -> None:
+    """Stop watching ``root``, or every workspace."""
+    with _watchers_lock:
+        paths = [os.path.abspath(root)] if root is not None else list(_watchers)
+        for path in paths:
+            watcher = _watchers.pop(path, None)
+            if watcher is not None:
+                watcher.stop()
@@ -0,0 +1,70 @@
+"""Benchmark trimming a long thread with RemoveMessage vs TrimMessages.
+
+Usage: python test/bench_messages.py [num_messages]   (default: 10,000)
+"""
+import sys
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage
+from langgraph.graph import add_messages
+
+from react_agent.state import TrimMessages, merge_messages
+
+NUM_MESSAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+KEEP = 20
+STEPS = 200
+
+
+def thread(n: int) -> list:
+    return [
+        (HumanMessage if i % 2 == 0 else AIMessage)(content=f"message {i}", id=f"m{i}")
+        for i in range(n)
+    ]
+
+
+def timed(label: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<44} {elapsed * 1000:9.1f}ms")
+    return elapsed
+
+
+def trim_once() -> None:
+    messages = thread(NUM_MESSAGES)
+    print(f"Trim a {NUM_MESSAGES:,}-message thread to the last {KEEP}")
+    timed(
+        "add_messages + RemoveMessage per message",
+        lambda: add_messages(messages, [RemoveMessage(id=m.id) for m in messages[:-KEEP]]),
+    )
+    timed(
+        "merge_messages + TrimMessages.keep_last",
+        lambda: merge_messages(messages, [TrimMessages.keep_last(KEEP)]),
+    )
+
+
+def sliding_window() -> None:
+    # Each step appends a message and drops the oldest, as a windowed agent does.
+    print(f"{STEPS} steps of append + drop oldest on a {NUM_MESSAGES:,}-message thread")
+
+    initial = thread(NUM_MESSAGES)
+
+    def with_remove() -> None:
+        messages = initial
+        for i in range(STEPS):
+            new = HumanMessage(content="new", id=f"n{i}")
+            messages = add_messages(messages, [new, RemoveMessage(id=messages[0].id)])
+
+    def with_trim() -> None:
+        messages = initial
+        for i in range(STEPS):
+            new = HumanMessage(content="new", id=f"n{i}")
+            messages = merge_messages(messages, [new, TrimMessages.drop_range(0, 1)])
+
+    timed("add_messages + RemoveMessage", with_remove)
+    timed("merge_messages + TrimMessages.drop_range", with_trim)
+
+
+if __name__ == "__main__":
+    trim_once()
+    sliding_window()
@@ -0,0 +1,66 @@
+"""Benchmark SQLiteStore against InMemoryStore.
+
+Usage: python test/bench_store.py [num_keys]   (default: 1,000,000)
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from langgraph.store.base import GetOp, PutOp
+from langgraph.store.memory import InMemoryStore
+
+from react_agent.store import SQLiteStore
+
+NUM_KEYS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+NUM_NAMESPACES = 100
+BATCH = 10_000
+LOOKUPS = 100_000
+
+
+def namespace(i: int) -> tuple[str, ...]:
+    return ("users", f"shard_{i % NUM_NAMESPACES}")
+
+
+def timed(label: str, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:8.3f}s")
+    return elapsed
+
+
+def run(name: str, store) -> None:
+    print(f"{name} ({NUM_KEYS:,} keys)")
+
+    def load() -> None:
+        for start in range(0, NUM_KEYS, BATCH):
+            store.batch(
+                PutOp(namespace(i), f"user_{i}", {"name": f"user {i}", "age": i % 90})
+                for i in range(start, min(start + BATCH, NUM_KEYS))
+            )
+
+    rng = random.Random(0)
+    keys = [rng.randrange(NUM_KEYS) for _ in range(LOOKUPS)]
+
+    def get_one_by_one() -> None:
+        for i in keys:
+            store.get(namespace(i), f"user_{i}")
+
+    def get_batched() -> None:
+        for start in range(0, LOOKUPS, 100):
+            store.batch(GetOp(namespace(i), f"user_{i}") for i in keys[start : start + 100])
+
+    timed("put (batches of 10k)", load)
+    timed(f"get x{LOOKUPS:,} (single)", get_one_by_one)
+    timed(f"get x{LOOKUPS:,} (batches of 100)", get_batched)
+    timed("list_namespaces", lambda: store.list_namespaces(limit=1000))
+    timed("search prefix, limit 10", lambda: store.search(("users", "shard_7"), limit=10))
+
+
+if __name__ == "__main__":
+    run("InMemoryStore", InMemoryStore())
+    with tempfile.TemporaryDirectory() as tmp:
+        # A small cache so most lookups hit SQLite rather than the LRU.
+        run("SQLiteStore", SQLiteStore(Path(tmp) / "bench.db", cache_size=1_000))
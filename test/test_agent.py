@@ -1,6 +1,7 @@
 from langchain.agents import create_agent
 from langchain_openai import ChatOpenAI
-from langchain.agents.middleware import wrap_model_call, ModelRequest, ModelResponse, wrap_tool_call
+from langchain.agents.middleware import wrap_tool_call
+from react_agent.routing import ModelPool, ModelRouterMiddleware
 
 
 from langchain.messages import ToolMessage, HumanMessage
@@ -15,31 +16,18 @@ load_dotenv()
 
 
 
-basic_model = ChatOpenAI(
-    model=os.getenv("MODEL"), 
-    api_key=os.getenv("API_KEY"), 
-    base_url=os.getenv("BASE_URL"),
-    extra_body={"chat_template_kwargs": {"enable_thinking": False}}
-)
-advanced_model = ChatOpenAI(
-    model=os.getenv("MODEL"), 
-    api_key=os.getenv("API_KEY"), 
-    base_url=os.getenv("BASE_URL"),
-    extra_body={"chat_template_kwargs": {"enable_thinking": True}}
-)
-
-@wrap_model_call
-async def dynamic_model_selection(request: ModelRequest, handler) -> ModelResponse:
-    """Choose model based on conversation complexity."""
-    message_count = len(request.state["messages"])
-
-    if message_count > 10:
-        # Use an advanced model for longer conversations
-        model = advanced_model
-    else:
-        model = basic_model
+def chat_model(enable_thinking: bool):
+    return lambda: ChatOpenAI(
+        model=os.getenv("MODEL"), 
+        api_key=os.getenv("API_KEY"), 
+        base_url=os.getenv("BASE_URL"),
+        extra_body={"chat_template_kwargs": {"enable_thinking": enable_thinking}}
+    )
 
-    return await handler(request.override(model=model))
+# The thinking model is only built and used for steps that need it:
+# a failed tool call, a long prompt, or many tool results to combine.
+models = ModelPool({"basic": chat_model(False), "advanced": chat_model(True)})
+model_router = ModelRouterMiddleware(models)
 
 
 @tool
@@ -87,9 +75,9 @@ async def handle_tool_errors(request, handler):
 
 
 agent = create_agent(
-    model=basic_model,  # Default model
+    model=models.get("basic"),  # Default model
     tools=tools,
-    middleware=[dynamic_model_selection, handle_tool_errors],
+    middleware=[model_router, handle_tool_errors],
     system_prompt="You are a helpful assistant. Your answer must be accurate. before you answer,you should think carefully!"
 )
 
@@ -105,4 +93,5 @@ for msg in result["messages"]:
     print(type(msg))
     print(msg)
     print("-"*150)
+print(model_router.metrics())
 '''
\ No newline at end of file
@@ -3,7 +3,8 @@ from langchain.tools import tool
 from typing import Any, Optional, cast
 from langchain_core.runnables.config import P
 from langchain_openai import ChatOpenAI
-from deepagents.backends.filesystem import FilesystemBackend
+from react_agent.blobs import BlobStore
+from react_agent.filesystem import CachedFilesystemBackend
 
 import os
 from dotenv import load_dotenv
@@ -23,27 +24,11 @@ llm = ChatOpenAI(
     extra_body={"chat_template_kwargs": {"enable_thinking": False}}
 )
 
-import os
-from typing import Literal
-from tavily import TavilyClient
+import asyncio
 from deepagents import create_deep_agent
+from react_agent.research import SubAgentScheduler, create_research_subagent, internet_search
 
-tavily_client = TavilyClient(api_key=os.environ["TAVILY_API_KEY"])
-
-@tool
-def internet_search(
-    query: str,
-    max_results: int = 5,
-    topic: Literal["general", "news", "finance"] = "general",
-    include_raw_content: bool = False,
-):
-    """Search the internet for information"""
-    return tavily_client.search(
-        query,
-        max_results=max_results,
-        include_raw_content=include_raw_content,
-        topic=topic,
-    )
+scheduler = SubAgentScheduler(create_research_subagent(llm), max_concurrency=4)
 
 
 # System prompt to steer the agent to be an expert researcher
@@ -54,18 +39,31 @@ You have access to an internet search tool as your primary means of gathering in
 ## `internet_search`
 
 Use this to run an internet search for a given query. You can specify the max number of results to return, the topic, and whether raw content should be included.
+
+## `parallel_research`
+
+When the report needs several independent topics researched, split the work into self-contained sub-tasks and pass them all to one `parallel_research` call instead of searching for each topic in turn.
 """
 
 agent = create_deep_agent(
     model=llm,
-    tools=[internet_search],
-    backend=FilesystemBackend(root_dir="/Users/ailabuser7-1/Documents/cursor-workspace/react-agent-exp/agent-files/",virtual_mode=True),
+    tools=[internet_search, scheduler.as_tool()],
+    backend=CachedFilesystemBackend(
+        root_dir="/Users/ailabuser7-1/Documents/cursor-workspace/react-agent-exp/agent-files/",
+        virtual_mode=True,
+        blob_store=BlobStore("/Users/ailabuser7-1/Documents/cursor-workspace/react-agent-exp/.agent-blobs/", compression="gzip"),
+    ),
     system_prompt=research_instructions
 )
 
 
 
-result = agent.stream({"messages": [{"role": "user", "content": "给我写一篇关于deepagents的文档"}]})
-for i,chunk in enumerate(result):
-    print(f"=============chunk {i}")
-    print(f"chunk: {chunk}")
\ No newline at end of file
+async def main():
+    result = agent.astream({"messages": [{"role": "user", "content": "给我写一篇关于deepagents的文档"}]})
+    i = 0
+    async for chunk in result:
+        print(f"=============chunk {i}")
+        print(f"chunk: {chunk}")
+        i += 1
+
+asyncio.run(main())
\ No newline at end of file
@@ -54,11 +54,15 @@ from langchain_core.runnables import RunnableConfig
 from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.prebuilt import ToolNode
 
+from react_agent.sql_guard import SQLQueryGuard
+
 
 get_schema_tool = next(tool for tool in tools if tool.name == "sql_db_schema")
 get_schema_node = ToolNode([get_schema_tool], name="get_schema")
 
-run_query_tool = next(tool for tool in tools if tool.name == "sql_db_query")
+# Run generated queries through the guard so cartesian joins are rejected or
+# interrupted instead of blocking the graph.
+run_query_tool = SQLQueryGuard(local_path, timeout_seconds=10).as_tool()
 run_query_node = ToolNode([run_query_tool], name="run_query")
 
 #print(f"get_schema_tool: {get_schema_tool}")
@@ -109,6 +113,9 @@ examples in the database. Never query for all the columns from a specific table,
 only ask for the relevant columns given the question.
 
 DO NOT make any DML statements (INSERT, UPDATE, DELETE, DROP etc.) to the database.
+
+If a query returns a "query_too_expensive" or "query_timeout" error, rewrite it
+using the returned plan (add join conditions, filters or a LIMIT) and try again.
 """.format(
     dialect=db.dialect,
     top_k=5,
@@ -1,8 +1,10 @@
-from langchain_mcp_adapters.client import MultiServerMCPClient  
 from langchain.agents import create_agent
 
+from react_agent.mcp_tools import MCPToolProvider
+
 import asyncio
 import os
+from pathlib import Path
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 load_dotenv()
@@ -13,13 +15,14 @@ llm = ChatOpenAI(
     base_url=os.getenv("BASE_URL"),
     extra_body={"chat_template_kwargs": {"enable_thinking": False}}
 )
-client = MultiServerMCPClient(  
+# Tool schemas are cached on disk after the first run, and servers are only
+# connected when one of their tools is first called.
+provider = MCPToolProvider(
     {
         "math": {
             "transport": "stdio",  # Local subprocess communication
             "command": "python",
-            # Absolute path to your math_server.py file
-            "args": ["/path/to/math_server.py"],
+            "args": [str(Path(__file__).parent / "math_server.py")],
         },
         "weather": {
             "transport": "http",  # HTTP-based remote server
@@ -29,19 +32,22 @@ client = MultiServerMCPClient(
     }
 )
 
-tools = client.get_tools()  
+tools = provider.get_tools()
 agent = create_agent(
     llm,
     tools  
 )
 
 async def main():
-    math_response = await agent.ainvoke(
-        {"messages": [{"role": "user", "content": "what's (3 + 5) x 12?"}]}
-    )
-    weather_response = await agent.ainvoke(
-        {"messages": [{"role": "user", "content": "what is the weather in nyc?"}]}
-    )
+    async with provider:
+        math_response = await agent.ainvoke(
+            {"messages": [{"role": "user", "content": "what's (3 + 5) x 12?"}]}
+        )
+        weather_response = await agent.ainvoke(
+            {"messages": [{"role": "user", "content": "what is the weather in nyc?"}]}
+        )
+        # If the weather server is down, only its tools fail; see the per-server health.
+        print(provider.metrics())
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -1,5 +1,7 @@
-from langchain.messages import RemoveMessage
+from typing import Annotated
+
 from langchain.agents import create_agent, AgentState
+from langchain.messages import AnyMessage
 from langchain.agents.middleware import after_model
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.runtime import Runtime
@@ -9,6 +11,8 @@ import os
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 
+from react_agent.state import TrimMessages, merge_messages
+
 load_dotenv()
 
 llm = ChatOpenAI(
@@ -18,13 +22,18 @@ llm = ChatOpenAI(
     extra_body={"chat_template_kwargs": {"enable_thinking": False}}
 )
 
+class TrimmableState(AgentState):
+    # merge_messages understands TrimMessages in addition to ordinary updates.
+    messages: Annotated[list[AnyMessage], merge_messages]
+
+
 @after_model
 def delete_old_messages(state: AgentState, runtime: Runtime) -> dict | None:
     """Remove old messages to keep conversation manageable."""
     messages = state["messages"]
     if len(messages) > 2:
         # remove the earliest two messages
-        return {"messages": [RemoveMessage(id=m.id) for m in messages[:2]]}
+        return {"messages": [TrimMessages.drop_range(0, 2)]}
     return None
 
 
@@ -33,6 +42,7 @@ agent = create_agent(
     tools=[],
     system_prompt="Please be concise and to the point.",
     middleware=[delete_old_messages],
+    state_schema=TrimmableState,
     checkpointer=InMemorySaver(),
 )
 
@@ -1,5 +1,5 @@
 from langchain.agents import create_agent
-from langchain.agents.middleware import SummarizationMiddleware
+from react_agent.summarization import RollingSummaryMiddleware
 from langgraph.checkpoint.memory import InMemorySaver
 from langchain_core.runnables import RunnableConfig
 
@@ -21,10 +21,10 @@ agent = create_agent(
     llm,
     tools=[],
     middleware=[
-        SummarizationMiddleware(
-            model=llm,
-            trigger=("tokens", 100),
-            keep=("messages", 3)
+        RollingSummaryMiddleware(
+            llm,
+            trigger_tokens=100,
+            keep_messages=3,
         )
     ],
     checkpointer=checkpointer,
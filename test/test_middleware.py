@@ -1,5 +1,5 @@
 from langchain.agents import create_agent
-from langchain.agents.middleware import SummarizationMiddleware
+from react_agent.summarization import RollingSummaryMiddleware
 from langchain.tools import tool
 from langchain_openai import ChatOpenAI
 import os
@@ -27,10 +27,10 @@ agent = create_agent(
     model=model,
     tools=[weather_tool, calculator_tool],
     middleware=[
-        SummarizationMiddleware(
-            model=model,
-            trigger=("tokens", 4000),
-            keep=("messages", 20),
+        RollingSummaryMiddleware(
+            model,
+            trigger_tokens=4000,
+            keep_messages=20,
         ),
     ],
 )
@@ -6,7 +6,9 @@ from dotenv import load_dotenv
 from langchain_core.runnables import RunnableConfig
 from langchain.agents import create_agent
 from langchain.tools import tool, ToolRuntime
-from langgraph.store.memory import InMemoryStore
+
+from react_agent.store import SQLiteStore
+from react_agent.vectors import HashingEmbeddings
 
 load_dotenv()
 llm = ChatOpenAI(
@@ -20,8 +22,12 @@ llm = ChatOpenAI(
 class Context:
     user_id: str
 
-# InMemoryStore saves data to an in-memory dictionary. Use a DB-backed store in production.
-store = InMemoryStore() 
+# SQLiteStore persists data to a local SQLite file, with an in-process LRU for reads.
+# The index enables semantic search over the "text" field with a local embedder.
+store = SQLiteStore(
+    "store.db",
+    index={"dims": 512, "embed": HashingEmbeddings(512), "fields": ["text"]},
+)
 
 # Write sample data to the store using the put method
 store.put( 
@@ -33,6 +39,15 @@ store.put(
     }  # Data to store for the given user
 )
 
+store.put(("memories", "user_123"), "m1", {"text": "Prefers answers in bullet points"})
+store.put(("memories", "user_123"), "m2", {"text": "Is learning empirical finance"})
+
+@tool
+def recall_memories(query: str, runtime: ToolRuntime[Context]) -> str:
+    """Recall stored facts about the user that are relevant to the query."""
+    items = runtime.store.search(("memories", runtime.context.user_id), query=query, limit=3)
+    return "\n".join(item.value["text"] for item in items) or "No memories found"
+
 @tool
 def get_user_info(runtime: ToolRuntime[Context]) -> str:
     """Look up user info."""
@@ -45,7 +60,7 @@ def get_user_info(runtime: ToolRuntime[Context]) -> str:
 
 agent = create_agent(
     llm,
-    tools=[get_user_info],
+    tools=[get_user_info, recall_memories],
     # Pass store to agent - enables agent to access store when running tools
     store=store, 
     context_schema=Context
@@ -5,3 +5,11 @@ import pytest
 def anyio_backend():
     return "asyncio"
 
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path_factory, monkeypatch):
+    """Keep indexes persisted by tests out of the user's cache directory."""
+    path = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(path))
+    return path
@@ -0,0 +1,65 @@
+"""A local OpenAI-compatible chat completions endpoint for tests.
+
+Each request takes the next scripted response, ``{"status": ..., "delay": ...}``,
+and answers 200 at once when the script is empty.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+
+class FakeOpenAIServer:
+    def __init__(self) -> None:
+        self.script: list[dict[str, Any]] = []
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("content-length", 0)))
+                with server._lock:
+                    server.requests += 1
+                    number = server.requests
+                    step = server.script.pop(0) if server.script else {}
+                time.sleep(step.get("delay", 0))
+                status = step.get("status", 200)
+                if status == 200:
+                    body = {
+                        "id": f"chatcmpl-{number}",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": "fake",
+                        "choices": [
+                            {"index": 0, "message": {"role": "assistant", "content": f"reply {number}"}, "finish_reason": "stop"}
+                        ],
+                        "usage": {"prompt_tokens": 7, "completion_tokens": 2, "total_tokens": 9},
+                    }
+                else:
+                    body = {"error": {"message": f"status {status}", "type": "test", "code": status}}
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("content-type", "application/json")
+                    self.send_header("content-length", str(len(data)))
+                    if status == 429:
+                        self.send_header("retry-after", "0")
+                    self.end_headers()
+                    self.wfile.write(data)
+                except OSError:
+                    pass  # The client gave up on this request.
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_port}/v1"
+        threading.Thread(target=self.httpd.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
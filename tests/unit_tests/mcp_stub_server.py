@@ -0,0 +1,35 @@
+"""A stdio MCP server for tests, with tools that misbehave on request.
+
+Set STUB_STARTUP_DELAY to delay the server's startup by that many seconds.
+"""
+
+import os
+import time
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("Stub")
+
+
+@mcp.tool()
+def add(a: int, b: int) -> int:
+    """Add two numbers"""
+    return a + b
+
+
+@mcp.tool()
+def sleep(seconds: float) -> str:
+    """Sleep before answering"""
+    time.sleep(seconds)
+    return "done"
+
+
+@mcp.tool()
+def crash() -> str:
+    """Exit the server process"""
+    os._exit(1)
+
+
+if __name__ == "__main__":
+    time.sleep(float(os.environ.get("STUB_STARTUP_DELAY", "0")))
+    mcp.run(transport="stdio")
@@ -0,0 +1,94 @@
+import importlib
+from pathlib import Path
+from typing import Any
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent.answer_cache import AnswerCache, normalize_question
+from react_agent.context import Context
+from react_agent.workspace import SingleFlight
+
+graph_module = importlib.import_module("react_agent.graph")
+
+
+def test_exact_and_similar_hits() -> None:
+    cache = AnswerCache()
+    cache.put("金融实证方法考试要点？", "ws1", "要点列表")
+    assert normalize_question(" 金融实证方法考试要点 ") == normalize_question("金融实证方法考试要点？")
+
+    hit = cache.get("金融实证方法考试要点", "ws1")
+    assert hit is not None and (hit.answer, hit.match) == ("要点列表", "exact")
+    assert cache.get("请总结金融实证方法考试要点", "ws1") is None
+    hit = cache.get("请总结金融实证方法考试要点", "ws1", threshold=0.85)
+    assert hit is not None and hit.match == "similar" and 0.85 <= hit.similarity < 1
+    assert cache.get("动量因子的定义是什么", "ws1", threshold=0.85) is None
+    assert cache.get("金融实证方法考试要点", "ws2", threshold=0.5) is None
+    assert cache.metrics()["exact_hits"] == 1
+
+
+def test_entries_expire_and_are_evicted() -> None:
+    cache = AnswerCache(max_entries=2)
+    cache.put("old", "ws", "a", ttl=0)
+    assert cache.get("old", "ws") is None
+    for question in ["one", "two", "three"]:
+        cache.put(question, "ws", question.upper())
+    assert cache.get("one", "ws") is None
+    assert cache.get("three", "ws", threshold=0.5).answer == "THREE"  # type: ignore[union-attr]
+    assert len(cache) == 2
+
+
+class CountingModel(GenericFakeChatModel):
+    calls: int = 0
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        return self
+
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(f"answer {self.calls}"))])
+
+
+@pytest.mark.anyio
+async def test_graph_answers_repeated_questions_from_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    model = CountingModel(messages=iter([]))
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda name: model)
+    monkeypatch.setattr(graph_module, "answer_cache", AnswerCache())
+    monkeypatch.setattr(graph_module, "_workspace_reports", SingleFlight())
+    (tmp_path / "notes.md").write_text("# Alpha\n")
+    context = Context(workspace_path=str(tmp_path), answer_cache=True)
+
+    async def ask(question: str, context: Context = context) -> AIMessage:
+        state = await graph_module.graph.ainvoke({"messages": [("user", question)]}, context=context)
+        return state["messages"][-1]
+
+    first = await ask("金融实证方法考试要点？")
+    assert (first.text, model.calls) == ("answer 2", 2)
+    again = await ask("金融实证方法考试要点")
+    assert again.text == "answer 2" and again.response_metadata["answer_cache"]["match"] == "exact"
+    assert model.calls == 2
+
+    assert (await ask("金融实证方法考试要点", Context(workspace_path=str(tmp_path)))).text == "answer 4"
+    (tmp_path / "notes.md").write_text("# Alpha\n\nUpdated.\n")
+    assert (await ask("金融实证方法考试要点")).text == "answer 6"
+
+
+@pytest.mark.anyio
+async def test_graph_fingerprints_workspace_once_per_run(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    model = CountingModel(messages=iter([]))
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda name: model)
+    monkeypatch.setattr(graph_module, "answer_cache", AnswerCache())
+    monkeypatch.setattr(graph_module, "_workspace_reports", SingleFlight())
+    walks: list[str] = []
+
+    def fingerprint(path: str, rules: Any = None) -> str:
+        walks.append(path)
+        return "fp"
+
+    monkeypatch.setattr(graph_module, "workspace_fingerprint", fingerprint)
+    context = Context(workspace_path=str(tmp_path), answer_cache=True)
+    state = await graph_module.graph.ainvoke({"messages": [("user", "question")]}, context=context)
+    assert state["workspace_fingerprint"] == "fp"
+    assert walks == [str(tmp_path)]
@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from react_agent.batch import BatchRunner, completed_ids, main, read_queries
+from react_agent.workspace import SingleFlight
+
+graph_module = importlib.import_module("react_agent.graph")
+
+
+class EchoModel(GenericFakeChatModel):
+    """Answers with the last human message; tracks concurrent calls."""
+
+    analyses: int = 0
+    active: int = 0
+    peak: int = 0
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        return self
+
+    def _generate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text = [m for m in messages if m.type == "human"][-1].text
+        if "boom" in text:
+            raise ValueError("model exploded")
+        if "工作空间" in text:
+            self.analyses += 1
+            return ChatResult(generations=[ChatGeneration(message=AIMessage("workspace report"))])
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(f"answer: {text}"))])
+
+    async def _agenerate(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+            return self._generate(messages)
+        finally:
+            self.active -= 1
+
+
+@pytest.fixture
+def model(monkeypatch: pytest.MonkeyPatch) -> EchoModel:
+    model = EchoModel(messages=iter([]))
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda name: model)
+    monkeypatch.setattr(graph_module, "_workspace_reports", SingleFlight())
+    return model
+
+
+def write_queries(path: Path, queries: list[dict[str, Any]]) -> None:
+    path.write_text("".join(json.dumps(q, ensure_ascii=False) + "\n" for q in queries))
+
+
+@pytest.mark.anyio
+async def test_runs_queries_concurrently_and_resumes(tmp_path: Path, model: EchoModel) -> None:
+    queries = tmp_path / "queries.jsonl"
+    output = tmp_path / "out" / "results.jsonl"
+    write_queries(queries, [{"id": i, "query": f"q{i}"} for i in range(8)] + [{"id": "bad", "query": "boom"}])
+    runner = BatchRunner(concurrency=3, context_defaults={"workspace_path": str(tmp_path)})
+
+    summary = await runner.arun(read_queries(queries), output)
+    assert (summary.total, summary.succeeded, summary.failed) == (9, 8, 1)
+    assert 1 < model.peak <= 3
+    assert model.analyses == 1
+    results = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+    assert results["5"]["answer"] == "answer: q5"
+    assert "model exploded" in results["bad"]["error"]
+
+    # An interrupted write leaves a partial line; it is dropped on resume.
+    with open(output, "a") as f:
+        f.write('{"id": "8", "ans')
+    write_queries(queries, [{"id": i, "query": f"q{i}"} for i in range(10)] + [{"id": "bad", "query": "boom"}])
+    analyses = model.analyses
+    summary = await runner.arun(read_queries(queries), output)
+    assert (summary.skipped, summary.succeeded, summary.failed) == (9, 2, 0)
+    assert model.analyses == analyses
+    assert completed_ids(output, include_errors=False) == {str(i) for i in range(10)}
+
+    summary = await runner.arun(read_queries(queries), output, retry_errors=True)
+    assert (summary.skipped, summary.failed) == (10, 1)
+    assert len(output.read_text().splitlines()) == 12
+
+
+def test_invalid_lines_are_reported(tmp_path: Path) -> None:
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text('{"query": "ok"}\n\nnot json\n[1]\n{"id": 7}\n')
+    records = list(read_queries(queries))
+    assert [("error" in r) for r in records] == [False, True, True, True]
+    assert records[0]["id"] == list(read_queries(queries))[0]["id"]
+    assert records[3]["id"] == "7"
+
+
+def test_command_line(tmp_path: Path, model: EchoModel, capsys: pytest.CaptureFixture[str]) -> None:
+    queries = tmp_path / "queries.jsonl"
+    write_queries(queries, [{"query": "hello", "workspace_path": str(tmp_path)}])
+    output = tmp_path / "results.jsonl"
+    assert main([str(queries), str(output), "-c", "2"]) == 0
+    assert json.loads(capsys.readouterr().out)["succeeded"] == 1
+    assert json.loads(output.read_text())["answer"] == "answer: hello"
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from react_agent.blobs import BlobStore
+
+
+def test_identical_files_share_one_refcounted_blob(tmp_path: Path) -> None:
+    store = BlobStore(tmp_path / "blobs")
+    a, b = tmp_path / "a.md", tmp_path / "b.md"
+    digest = store.put(b"same")
+    assert store.put(b"same") == digest
+    store.link(digest, a)
+    store.link(digest, b)
+    store.link(digest, b)
+    assert a.read_bytes() == b.read_bytes() == b"same"
+    assert a.stat().st_ino == b.stat().st_ino
+    assert store.refcount(digest) == 2
+    assert store.stats()["blobs"] == 1
+
+    store.link(store.put(b"other"), b)
+    assert a.read_bytes() == b"same" and b.read_bytes() == b"other"
+    store.unlink(a)
+    assert store.refcount(digest) == 0
+    assert store.stats()["blobs"] == 1
+
+    store.detach(b)
+    b.write_bytes(b"edited in place")
+    assert store.stats()["blobs"] == 0
+
+    # A file removed behind the store's back leaves an orphan for gc.
+    store.link(store.put(b"orphan"), a)
+    a.unlink()
+    assert store.gc() == 1
+    assert store.stats()["blobs"] == 0
+
+
+def test_archive_survives_reopening(tmp_path: Path) -> None:
+    store = BlobStore(tmp_path, compression="gzip")
+    data = b"x" * 10_000
+    digest = store.archive("/large_tool_results/1", data)
+    assert store.archive("/large_tool_results/2", data) == digest
+    assert store.refcount(digest) == 2
+    assert store.stats()["bytes"] < 1000
+
+    store = BlobStore(tmp_path, compression="gzip")
+    assert store.restore("/large_tool_results/1") == data
+    store.forget("/large_tool_results/1")
+    assert store.restore("/large_tool_results/2") == data
+    store.forget("/large_tool_results/2")
+    assert store.restore("/large_tool_results/2") is None
+    assert store.stats() == {"blobs": 0, "archived": 0, "bytes": 0}
@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 from react_agent.context import Context
 
 
@@ -18,3 +20,13 @@ def test_context_init_with_env_vars_and_passed_values() -> None:
     os.environ["MODEL"] = "openai/gpt-4o-mini"
     context = Context(model="openai/gpt-5o-mini")
     assert context.model == "openai/gpt-5o-mini"
+
+
+def test_context_parses_typed_env_vars(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TRACE", "false")
+    monkeypatch.setenv("MAX_SEARCH_RESULTS", "3")
+    context = Context()
+    assert context.trace is False
+    assert context.max_search_results == 3
+    monkeypatch.setenv("TRACE", "1")
+    assert Context().trace is True
@@ -0,0 +1,113 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("deepagents")
+
+from deepagents.backends.filesystem import FilesystemBackend  # noqa: E402
+
+from react_agent.blobs import BlobStore  # noqa: E402
+from react_agent.filesystem import CachedFilesystemBackend  # noqa: E402
+
+
+def window(result: object) -> tuple:
+    return (
+        getattr(result, "error"),
+        (getattr(result, "file_data") or {}).get("content"),
+        getattr(result, "total_lines"),
+        getattr(result, "start_line"),
+        getattr(result, "end_line"),
+        getattr(result, "next_offset"),
+    )
+
+
+@pytest.mark.parametrize("max_cached_file_bytes", [1 << 20, 0])
+def test_reads_match_filesystem_backend(tmp_path: Path, max_cached_file_bytes: int) -> None:
+    text = "".join(f"line {i}\r\n" if i % 7 == 0 else f"line {i}\n" for i in range(5000)) + "tail"
+    (tmp_path / "doc.md").write_bytes(text.encode())
+    (tmp_path / "empty.md").write_text("")
+    plain = FilesystemBackend(root_dir=tmp_path, virtual_mode=True)
+    cached = CachedFilesystemBackend(
+        root_dir=tmp_path, virtual_mode=True, max_cached_file_bytes=max_cached_file_bytes
+    )
+    for offset, limit in [(0, 10), (1020, 10), (2047, 3000), (4999, 5), (5000, 1), (6000, 1), (-1, 5), (3, 0)]:
+        for _ in range(2):
+            assert window(cached.read("/doc.md", offset, limit)) == window(plain.read("/doc.md", offset, limit))
+    assert window(cached.read("/empty.md")) == window(plain.read("/empty.md"))
+    assert window(cached.read("/missing.md")) == window(plain.read("/missing.md"))
+
+
+def test_reads_are_cached_until_the_file_changes(tmp_path: Path) -> None:
+    path = tmp_path / "doc.md"
+    path.write_text("one\ntwo\n")
+    backend = CachedFilesystemBackend(root_dir=tmp_path, virtual_mode=True)
+    assert backend.read("/doc.md").file_data["content"] == "one\ntwo\n"  # type: ignore[index]
+    assert len(backend._cache) == 1
+    path.write_text("three\n")
+    assert backend.read("/doc.md").file_data["content"] == "three\n"  # type: ignore[index]
+
+
+def test_writes_are_coalesced_and_visible(tmp_path: Path) -> None:
+    backend = CachedFilesystemBackend(root_dir=tmp_path, virtual_mode=True, write_delay=60)
+    backend.write("/report.md", "draft 1\n")
+    backend.write("/report.md", "draft 2\n")
+    assert backend.edit("/report.md", "draft 2", "final").occurrences == 1
+    assert not (tmp_path / "report.md").exists()
+    assert backend.read("/report.md").file_data["content"] == "final\n"  # type: ignore[index]
+    assert [f["path"] for f in backend.ls("/").entries or []] == ["/report.md"]
+    assert (tmp_path / "report.md").read_text() == "final\n"
+
+
+
+def test_buffered_write_errors_are_reported(tmp_path: Path) -> None:
+    backend = CachedFilesystemBackend(root_dir=tmp_path, virtual_mode=False, write_delay=60)
+    (tmp_path / "real.md").write_text("real\n")
+    (tmp_path / "link.md").symlink_to(tmp_path / "real.md")
+    assert "symbolic link" in (backend.write(str(tmp_path / "link.md"), "x").error or "")
+
+    report = str(tmp_path / "out" / "report.md")
+    assert backend.write(report, "draft\n").error is None
+    (tmp_path / "out").write_text("now a file")
+    failed = backend.flush()
+    assert [r.error for r in failed] == [backend.read(report).error]
+    assert "Error writing file" in (failed[0].error or "")
+    assert backend.flush() == []
+
+def test_large_tool_results_are_capped(tmp_path: Path) -> None:
+    backend = CachedFilesystemBackend(
+        root_dir=tmp_path, virtual_mode=True, write_delay=0, max_large_results=3, max_large_results_bytes=250
+    )
+    for i in range(5):
+        backend.write(f"/large_tool_results/call_{i}", "x" * 100)
+    remaining = sorted(p.name for p in (tmp_path / "large_tool_results").iterdir())
+    assert remaining == ["call_3", "call_4"]
+    backend.write("/notes.md", "y" * 1000)
+    assert (tmp_path / "notes.md").exists()
+
+
+def test_blob_store_dedups_and_archives_evicted_results(tmp_path: Path) -> None:
+    root = tmp_path / "files"
+    store = BlobStore(tmp_path / "blobs", compression="gzip")
+    backend = CachedFilesystemBackend(
+        root_dir=root, virtual_mode=True, write_delay=0, max_large_results=1, blob_store=store
+    )
+    for name in ["a.md", "b.md"]:
+        backend.write(f"/{name}", "same\n" * 100)
+    assert (root / "a.md").stat().st_ino == (root / "b.md").stat().st_ino
+    backend.read("/a.md")
+    backend.read("/b.md")
+    assert len(backend._cache) == 1
+    assert backend.edit("/b.md", "same", "diff", replace_all=True).occurrences == 100
+    assert (root / "a.md").read_text() == "same\n" * 100
+
+    payload = '{"rows": [1, 2, 3]}\n' * 500
+    backend.write("/large_tool_results/call_1", payload)
+    backend.write("/large_tool_results/call_2", payload + "tail")
+    assert not (root / "large_tool_results" / "call_1").exists()
+    assert backend.read("/large_tool_results/call_1", 0, 2).file_data["content"] == '{"rows": [1, 2, 3]}\n' * 2  # type: ignore[index]
+    assert store.stats()["archived"] == 1
+
+    assert backend.delete("/large_tool_results/call_1").error is None
+    assert backend.delete("/a.md").error is None
+    assert backend.delete("/large_tool_results").error is None
+    assert store.stats() == {"blobs": 1, "archived": 0, "bytes": len("diff\n" * 100)}
@@ -0,0 +1,106 @@
+import importlib
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from react_agent.context import Context
+from react_agent.ignore import IgnoreRules, workspace_rules
+from react_agent.workspace import (
+    WorkspaceModel,
+    scan_markdown_files,
+    workspace_fingerprint,
+)
+
+
+@pytest.mark.parametrize(
+    ("pattern", "path", "is_dir", "ignored"),
+    [
+        ("images/", "01 alpha/images", True, True),
+        ("images/", "01 alpha/images", False, False),
+        ("*.jpg", "a/b/c.JPG", False, False),
+        ("*.jpg", "a/b/c.jpg", False, True),
+        ("/drafts", "drafts", True, True),
+        ("/drafts", "notes/drafts", True, False),
+        ("notes/*.md", "notes/a.md", False, True),
+        ("notes/*.md", "notes/sub/a.md", False, False),
+        ("notes/**/a.md", "notes/x/y/a.md", False, True),
+        ("notes/**/a.md", "notes/a.md", False, True),
+        ("**/build", "x/build", True, True),
+        ("lecture?", "lecture7", True, True),
+        ("[0-9][0-9] *", "08 Momentum", True, True),
+        ("[!0-9]*", "08 Momentum", True, False),
+        ("# comment", "# comment", False, False),
+        ("\\#hash.md", "#hash.md", False, True),
+    ],
+)
+def test_gitignore_patterns(pattern: str, path: str, is_dir: bool, ignored: bool) -> None:
+    assert IgnoreRules([pattern]).ignores(path, is_dir) is ignored
+
+
+def test_last_match_wins_and_ignored_parents_stay_ignored() -> None:
+    rules = IgnoreRules(["*.md", "!keep.md", "drafts/", "!drafts/keep.md"])
+    assert rules.ignores("notes/a.md", False)
+    assert not rules.ignores("notes/keep.md", False)
+    assert rules.ignores_path("drafts/keep.md", False)
+    assert not rules.ignores_path(".", True)
+    assert IgnoreRules(extensions=["MD", ".txt"]).allows_name("a.txt")
+    assert not IgnoreRules(max_file_size=10).allows_size(11)
+
+
+def make_workspace(root: Path) -> None:
+    for lecture in ["01 alpha", "08 Momentum"]:
+        (root / lecture / "images").mkdir(parents=True)
+        (root / lecture / f"{lecture}.md").write_text(f"# {lecture}\n")
+        for i in range(3):
+            (root / lecture / "images" / f"{i:032x}.jpg").write_bytes(b"\xff")
+    (root / "drafts").mkdir()
+    (root / "drafts" / "draft.md").write_text("draft")
+    (root / "big.md").write_text("x" * 5000)
+    (root / "notes.txt").write_text("plain")
+
+
+def test_traversals_prune_ignored_directories(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    make_workspace(tmp_path)
+    listed: list[str] = []
+    scandir = os.scandir
+
+    def recording_scandir(path: str) -> object:
+        listed.append(os.path.basename(path))
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", recording_scandir)
+    rules = IgnoreRules()
+    model = WorkspaceModel(str(tmp_path), rules)
+    workspace_fingerprint(str(tmp_path), rules=rules)
+    assert "images" not in listed
+    assert scan_markdown_files(str(tmp_path)) == model.markdown_files()
+    assert model.find_directories("images") == []
+
+    rules = IgnoreRules([*rules.patterns, "/drafts/"], extensions=[".md", ".txt"], max_file_size=1000)
+    files = [os.path.join("01 alpha", "01 alpha.md"), os.path.join("08 Momentum", "08 Momentum.md"), "notes.txt"]
+    assert scan_markdown_files(str(tmp_path), rules) == files
+    assert WorkspaceModel(str(tmp_path), rules).markdown_files() == files
+    assert workspace_fingerprint(str(tmp_path), rules=rules) != workspace_fingerprint(str(tmp_path))
+
+
+@pytest.mark.anyio
+async def test_context_and_ignore_file_configure_the_tools(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    make_workspace(tmp_path)
+    (tmp_path / ".agentignore").write_text("# local rules\ndrafts/\n")
+    tools = importlib.import_module("react_agent.tools")
+    runtime = SimpleNamespace(context=Context(workspace_path=str(tmp_path), workspace_max_file_size=1000))
+    monkeypatch.setattr(tools, "get_runtime", lambda schema: runtime)
+
+    assert (await tools.find_directory("images"))["count"] == 0
+    assert (await tools.find_directory("drafts"))["count"] == 0
+    assert (await tools.list_directory_files("."))["file_count"] == 2
+    assert "error" in await tools.list_directory_files("01 alpha/images")
+    assert "error" in await tools.read_file("drafts/draft.md")
+    assert "error" in await tools.read_file("big.md")
+
+    runtime.context = Context(workspace_path=str(tmp_path), workspace_ignore="!images/,!drafts/")
+    assert (await tools.find_directory("images"))["count"] == 2
+    assert (await tools.list_directory_files("."))["file_count"] == 4
+    assert workspace_rules(runtime.context) is workspace_rules(runtime.context)
@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+IMPORT_BUDGET_MS = 250
+"""Budget for ``import react_agent``. It takes about 1 ms when nothing heavy is
+imported, so only slow top-level code, not a busy machine, exceeds it."""
+
+HEAVY_MODULES = ["langgraph", "langchain_core", "langchain_openai", "langchain_tavily", "openai", "dotenv"]
+
+
+def python(code: str, *flags: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run([sys.executable, *flags, "-c", code], capture_output=True, text=True, check=True)
+
+
+def import_time_ms() -> float:
+    result = python("import react_agent", "-X", "importtime")
+    line = next(line for line in result.stderr.splitlines() if line.rstrip().endswith("| react_agent"))
+    return int(line.split("|")[1]) / 1000
+
+
+def test_import_stays_within_budget() -> None:
+    # The best of several runs, so that one slow start does not fail the test.
+    assert min(import_time_ms() for _ in range(5)) < IMPORT_BUDGET_MS
+
+
+def test_import_and_graph_build_defer_heavy_packages() -> None:
+    check = "import sys; print(sorted(m for m in {!r} if m in sys.modules))"
+    assert python("import react_agent; " + check.format(HEAVY_MODULES)).stdout.strip() == "[]"
+    # Building the graph needs LangGraph, but not the model or search providers.
+    providers = ["langchain_openai", "langchain_tavily", "openai"]
+    built = python("from react_agent import graph; graph.get_graph(); " + check.format(providers))
+    assert built.stdout.strip() == "[]"
+
+
+def test_assigned_graph_replaces_the_lazy_one() -> None:
+    code = "import react_agent, react_agent.graph; react_agent.graph = 'patched'; print(react_agent.graph)"
+    assert python(code).stdout.strip() == "patched"
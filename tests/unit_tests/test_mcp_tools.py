@@ -0,0 +1,128 @@
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("langchain_mcp_adapters")
+
+from react_agent.mcp_tools import CircuitBreaker, MCPToolProvider  # noqa: E402
+
+STUB_SERVER = str(Path(__file__).parent / "mcp_stub_server.py")
+
+
+def stub(startup_delay: float = 0) -> dict:
+    return {
+        "transport": "stdio",
+        "command": sys.executable,
+        "args": [STUB_SERVER],
+        "env": {"STUB_STARTUP_DELAY": str(startup_delay)},
+    }
+
+
+@pytest.mark.anyio
+async def test_cached_schemas_lazy_session_and_reconnect(tmp_path: Path) -> None:
+    connections = {"stub": stub()}
+
+    async with MCPToolProvider(connections, cache_dir=tmp_path) as provider:
+        assert sorted(t.name for t in await provider.aget_tools()) == ["add", "crash", "sleep"]
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    async with MCPToolProvider(connections, cache_dir=tmp_path) as provider:
+        tools = {t.name: t for t in await provider.aget_tools()}
+        assert provider.metrics()["stub"]["connects"] == 0
+
+        for b in range(3):
+            result = await tools["add"].ainvoke({"a": 1, "b": b})
+            assert result[0]["text"] == str(1 + b)
+        assert provider.metrics()["stub"]["connects"] == 1
+
+        # A call lost after it was sent is reported, not repeated.
+        result = await tools["crash"].ainvoke({})
+        assert "unavailable" in result[0]["text"]
+        result = await tools["add"].ainvoke({"a": 2, "b": 2})
+        assert result[0]["text"] == "4"
+        assert provider.metrics()["stub"]["connects"] == 2
+
+        # A call that could not be sent is retried on a new connection.
+        await provider._servers["stub"]._session._write_stream.aclose()  # type: ignore[union-attr]
+        result = await tools["add"].ainvoke({"a": 3, "b": 3})
+        assert result[0]["text"] == "6"
+        assert provider.metrics()["stub"]["connects"] == 3
+
+
+@pytest.mark.anyio
+async def test_slow_server_only_loses_its_own_tools(tmp_path: Path) -> None:
+    connections = {"fast": stub(), "slow": stub(startup_delay=30)}
+    provider = MCPToolProvider(connections, cache_dir=tmp_path, connect_timeout=3)
+    start = time.perf_counter()
+    tools = await provider.aget_tools()
+    assert time.perf_counter() - start < 10
+    assert sorted(t.name for t in tools) == ["add", "crash", "sleep"]
+    assert provider.metrics()["slow"]["state"] == "closed"
+    assert provider._servers["slow"].breaker.failures == 1
+    await provider.aclose()
+
+
+@pytest.mark.anyio
+async def test_call_deadline_and_circuit_breaker(tmp_path: Path) -> None:
+    async with MCPToolProvider(
+        {"stub": stub()}, cache_dir=tmp_path, call_timeout=1, failure_threshold=2
+    ) as provider:
+        tools = {t.name: t for t in await provider.aget_tools()}
+        await tools["add"].ainvoke({"a": 1, "b": 1})
+        for _ in range(2):
+            result = await tools["sleep"].ainvoke({"seconds": 5})
+            assert "did not answer" in result[0]["text"]
+        result = await tools["add"].ainvoke({"a": 1, "b": 1})
+        assert "circuit open" in result[0]["text"]
+        metrics = provider.metrics()["stub"]
+        assert metrics["state"] == "open"
+        assert (metrics["calls"], metrics["timeouts"], metrics["rejected"]) == (3, 2, 1)
+        assert metrics["latency_p50_ms"] is not None
+
+
+def test_circuit_breaker_probes_once_after_reset() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    now[0] = 10
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    now[0] = 20
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+@pytest.mark.parametrize("outcome", ["error", "cancelled"])
+@pytest.mark.anyio
+async def test_probe_is_released_when_it_neither_succeeds_nor_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, outcome: str
+) -> None:
+    provider = MCPToolProvider({"stub": stub()}, cache_dir=tmp_path, failure_threshold=1, reset_timeout=0)
+    server = provider._servers["stub"]
+    server.breaker.record_failure()
+    assert server.breaker.state == "half_open"
+
+    async def probe(*args: object, **kwargs: object) -> None:
+        if outcome == "error":
+            raise ValueError("bad arguments")
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(server, "_call_with_reconnect", probe)
+    if outcome == "error":
+        with pytest.raises(ValueError):
+            await server.call_tool("add", {})
+    else:
+        task = asyncio.create_task(server.call_tool("add", {}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert server.breaker.allow()
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import deque
+from collections.abc import Iterator
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_openai import ChatOpenAI
+
+from react_agent.ratelimit import ModelCallGuard, TokenBucket, is_transient
+
+from .fake_openai_server import FakeOpenAIServer
+
+
+@pytest.fixture
+def server() -> Iterator[FakeOpenAIServer]:
+    server = FakeOpenAIServer()
+    yield server
+    server.close()
+
+
+def chat_model(server: FakeOpenAIServer) -> ChatOpenAI:
+    return ChatOpenAI(model="fake", api_key="test", base_url=server.base_url, max_retries=0)  # type: ignore[arg-type]
+
+
+@pytest.mark.anyio
+async def test_transient_errors_are_retried(server: FakeOpenAIServer) -> None:
+    guard = ModelCallGuard(requests_per_minute=6000, max_retries=2, backoff=0.01)
+    server.script = [{"status": 429}, {"status": 503}]
+    response = await guard.ainvoke(chat_model(server), "hi")
+    assert response.text == "reply 3"
+    metrics = guard.metrics()
+    assert (metrics["calls"], metrics["attempts"], metrics["retries"], metrics["rate_limited"]) == (1, 3, 2, 1)
+    assert metrics["rate_fraction"] == pytest.approx(0.55)
+
+    server.script = [{"status": 400}]
+    with pytest.raises(Exception) as error:
+        await guard.ainvoke(chat_model(server), "hi")
+    assert not is_transient(error.value)
+    server.script = [{"status": 500}] * 3
+    with pytest.raises(Exception):
+        await guard.ainvoke(chat_model(server), "hi")
+    assert guard.metrics()["failures"] == 2
+
+
+@pytest.mark.anyio
+async def test_slow_calls_are_hedged(server: FakeOpenAIServer) -> None:
+    guard = ModelCallGuard(hedge=True, min_hedge_samples=3)
+    model = chat_model(server)
+    for _ in range(3):
+        await guard.ainvoke(model, "warm up", key="step")
+    assert guard.hedge_delay("step") is not None and guard.hedge_delay("analysis") is None
+    server.script = [{"delay": 2}]
+    start = time.perf_counter()
+    response = await guard.ainvoke(model, "hi", key="step")
+    assert time.perf_counter() - start < 1
+    assert response.text == "reply 5"
+    metrics = guard.metrics()
+    assert (metrics["hedges"], metrics["hedge_wins"]) == (1, 1)
+
+
+def test_token_bucket_spaces_out_bursts() -> None:
+    bucket = TokenBucket(per_minute=600, burst=2)
+    delays = [bucket.reserve(1) for _ in range(5)]
+    assert delays[:2] == [0, 0]
+    assert delays[2:] == pytest.approx([0.1, 0.2, 0.3], abs=0.01)
+    assert not bucket.try_reserve(1)
+    bucket.slow_down()
+    assert bucket.rate == pytest.approx(5)
+    assert bucket.reserve(10) == pytest.approx((3 + 2) / 5, abs=0.01)
+
+
+@pytest.mark.anyio
+async def test_cancelled_call_cancels_its_request() -> None:
+    guard = ModelCallGuard(hedge=True, min_hedge_samples=1)
+    guard._latencies["step"] = deque([10.0])
+    started = asyncio.Event()
+    cancelled = []
+
+    async def slow(input: str) -> str:
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.append(input)
+            raise
+        return input
+
+    call = asyncio.create_task(guard.ainvoke(RunnableLambda(slow), "hi", key="step"))
+    await started.wait()
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    await asyncio.sleep(0)
+    assert cancelled == ["hi"]
+
+
+@pytest.mark.anyio
+async def test_usage_correction_refunds_only_what_was_charged() -> None:
+    guard = ModelCallGuard(tokens_per_minute=600)
+    assert guard.tokens is not None and guard.tokens.capacity == 100
+    usage = {"input_tokens": 50, "output_tokens": 1, "total_tokens": 51}
+    model = RunnableLambda(lambda _: AIMessage(content="ok", usage_metadata=usage))
+    await guard.ainvoke(model, "hi", tokens=1000)
+    # 100 charged, 50 used: half the bucket is left, not all of it.
+    assert guard.tokens._tokens == pytest.approx(50, abs=1)
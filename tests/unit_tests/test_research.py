@@ -0,0 +1,52 @@
+import asyncio
+import time
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from react_agent.research import SubAgentScheduler
+
+
+@pytest.mark.anyio
+async def test_sub_tasks_run_concurrently_under_the_limit() -> None:
+    running = peak = 0
+
+    async def research(state: dict[str, Any]) -> dict[str, Any]:
+        nonlocal running, peak
+        task = state["messages"][0][1]
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.2)
+        running -= 1
+        if task == "broken":
+            raise RuntimeError("no results")
+        return {"messages": [AIMessage(content=f"notes on {task}")]}
+
+    scheduler = SubAgentScheduler(RunnableLambda(research), max_concurrency=3)
+    tasks = [f"topic {i}" for i in range(5)] + ["broken", "topic 0", " "]
+    start = time.perf_counter()
+    output = await scheduler.as_tool().ainvoke({"tasks": tasks})
+    elapsed = time.perf_counter() - start
+
+    assert peak == 3
+    assert elapsed < 0.2 * 6 / 2
+    # One result per sub-task given; the repeated one ran once.
+    assert (output["completed"], output["failed"]) == (6, 2)
+    assert [r["task"] for r in output["results"]] == [*tasks[:7], ""]
+    assert output["results"][6]["result"] == output["results"][0]["result"]
+    assert "Empty" in output["results"][7]["error"]
+    assert output["results"][1]["result"] == "notes on topic 1"
+    assert "no results" in output["results"][5]["error"]
+
+
+@pytest.mark.anyio
+async def test_slow_sub_tasks_time_out() -> None:
+    async def research(state: dict[str, Any]) -> dict[str, Any]:
+        await asyncio.sleep(5)
+        return {}
+
+    scheduler = SubAgentScheduler(RunnableLambda(research), timeout=0.1)
+    [result] = await scheduler.arun(["slow"])
+    assert "timed out" in result["error"]
@@ -0,0 +1,93 @@
+import importlib
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from react_agent.context import Context
+from react_agent.retrieval import RetrievalIndex, split_passages
+from react_agent.vectors import HashingEmbeddings
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    embedded = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+def make_workspace(root: Path) -> None:
+    (root / "08 Momentum").mkdir()
+    (root / "08 Momentum" / "08 Momentum.md").write_text(
+        "# Momentum\nPast winners keep outperforming past losers.\n\n"
+        "## Time-series momentum\nAn asset's own past return predicts its future return.\n"
+    )
+    (root / "05 EMH").mkdir()
+    (root / "05 EMH" / "05 EMH.md").write_text(
+        "# 有效市场假说\n价格反映所有可得信息。\n\n# Trading costs\nBid-ask spreads and price impact.\n"
+    )
+
+
+def test_long_sections_are_split_at_paragraphs() -> None:
+    paragraph = "资产定价 " * 30 + "\n\n"
+    data = ("# Long\n" + paragraph * 10).encode()
+    passages = split_passages(data, "long.md", max_bytes=400)
+    assert len(passages) > 1
+    assert all(p.end - p.start <= 400 for p in passages)
+    assert {p.section_id for p in passages} == {passages[0].section_id}
+    assert all(p.text == data[p.start : p.end].decode().strip() for p in passages)
+    # Without any line break the cut still falls between characters.
+    assert split_passages(("# X\n" + "因子" * 500).encode(), "x.md", max_bytes=100)
+
+
+def test_hybrid_search_and_incremental_updates(tmp_path: Path) -> None:
+    make_workspace(tmp_path)
+    files = ["08 Momentum/08 Momentum.md", "05 EMH/05 EMH.md"]
+    embeddings = CountingEmbeddings()
+    index = RetrievalIndex(str(tmp_path), embeddings, path=tmp_path / "cache")
+    assert index.update(files)
+    assert len(index) == embeddings.embedded == 4
+
+    top, _ = index.search("own past return predicts", k=1)[0]
+    assert top.heading == "Momentum > Time-series momentum"
+    assert index.search("有效市场", k=1)[0][0].path == "05 EMH/05 EMH.md"
+
+    (tmp_path / "05 EMH" / "05 EMH.md").write_text(
+        "# 有效市场假说\n价格反映所有可得信息。\n\n# Trading costs\nCommissions and taxes.\n"
+    )
+    assert index.update(files)
+    assert embeddings.embedded == 5
+    assert index.search("commissions", k=1)[0][0].heading == "Trading costs"
+
+    reloaded_embeddings = CountingEmbeddings()
+    reloaded = RetrievalIndex(str(tmp_path), reloaded_embeddings, path=tmp_path / "cache")
+    assert not reloaded.update(files)
+    assert reloaded_embeddings.embedded == 0
+    assert reloaded.search("commissions", k=1)[0][0].heading == "Trading costs"
+
+    other = RetrievalIndex(str(tmp_path), CountingEmbeddings(dims=64), path=tmp_path / "cache")
+    assert other.update(files)
+    assert len(list((tmp_path / "cache").glob("retrieval-*.npy"))) == 2
+
+    reloaded.update(files[:1])
+    assert {p.path for p, _ in reloaded.search("price", k=10)} == {files[0]}
+
+
+@pytest.mark.anyio
+async def test_search_workspace_tool(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    make_workspace(tmp_path)
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".git" / "notes.md").write_text("# Momentum\nignored")
+    tools = importlib.import_module("react_agent.tools")
+    runtime = SimpleNamespace(context=Context(workspace_path=str(tmp_path)))
+    monkeypatch.setattr(tools, "get_runtime", lambda schema: runtime)
+
+    found = await tools.search_workspace("winners losers momentum", k=2)
+    assert found["count"] == 2
+    assert found["results"][0]["path"] == "08 Momentum/08 Momentum.md"
+    section = await tools.read_section(found["results"][0]["section_id"])
+    assert section["content"].startswith("# Momentum")
+
+    runtime.context = Context(workspace_path=str(tmp_path / "missing"))
+    assert "error" in await tools.search_workspace("momentum")
@@ -0,0 +1,82 @@
+from collections import deque
+from typing import Any
+
+import pytest
+from langchain.agents.middleware import ModelRequest, ModelResponse
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, ToolMessage
+
+from react_agent.routing import (
+    ComplexityPolicy,
+    ModelPool,
+    ModelRouterMiddleware,
+    RouteStats,
+    StepFeatures,
+)
+
+
+def tool_turn(*results: str) -> list[AnyMessage]:
+    calls = [{"name": "search", "args": {}, "id": str(i)} for i in range(len(results))]
+    return [
+        HumanMessage("question"),
+        AIMessage("", tool_calls=calls),
+        *[ToolMessage(r, tool_call_id=str(i)) for i, r in enumerate(results)],
+    ]
+
+
+def test_policy_escalates_per_signal() -> None:
+    policy = ComplexityPolicy(tiers=("fast", "medium", "strong"), long_prompt_tokens=100)
+    assert policy(StepFeatures(1, 50, False)) == "fast"
+    assert policy(StepFeatures(1, 50, True)) == "medium"
+    assert policy(StepFeatures(3, 150, False)) == "strong"
+    assert policy(StepFeatures(3, 150, True)) == "strong"
+
+
+def test_routes_lazily_and_records_metrics() -> None:
+    built: list[str] = []
+
+    def factory(name: str) -> Any:
+        def build() -> GenericFakeChatModel:
+            built.append(name)
+            return GenericFakeChatModel(messages=iter([]), name=name)
+
+        return build
+
+    pool = ModelPool({"fast": factory("fast"), "strong": factory("strong")})
+    router = ModelRouterMiddleware(pool, prices={"strong": (1.0, 2.0)})
+    used: list[str | None] = []
+
+    def handler(request: ModelRequest) -> ModelResponse:
+        used.append(request.model.name)
+        usage = {"input_tokens": 1000, "output_tokens": 500, "total_tokens": 1500}
+        return ModelResponse(result=[AIMessage("ok", usage_metadata=usage)])
+
+    def call(messages: list[AnyMessage]) -> None:
+        router.wrap_model_call(ModelRequest(model=pool.get("fast"), messages=messages), handler)
+
+    call(tool_turn("sunny"))
+    assert built == ["fast"]
+    call(tool_turn("Tool error: bad input"))
+    call(tool_turn("a", "b", "c"))
+    call(tool_turn('{"error": "not found"}'))
+    assert used == ["fast", "strong", "strong", "strong"]
+    assert built == ["fast", "strong"]
+
+    def failing(request: ModelRequest) -> ModelResponse:
+        raise RuntimeError("rate limited")
+
+    with pytest.raises(RuntimeError):
+        router.wrap_model_call(ModelRequest(model=pool.get("fast"), messages=tool_turn("ok")), failing)
+
+    metrics = router.metrics()
+    assert (metrics["fast"]["calls"], metrics["fast"]["errors"]) == (2, 1)
+    assert metrics["strong"]["calls"] == 3
+    assert metrics["strong"]["cost"] == 3 * (1.0 + 1.0)
+    assert metrics["fast"]["cost"] == 0
+    assert metrics["strong"]["latency_p50_ms"] is not None
+
+
+def test_route_latency_quantiles_are_in_seconds() -> None:
+    stats = RouteStats(latencies=deque([0.3, 0.1, 0.2, 0.4]))
+    assert (stats.quantile(0.5), stats.quantile(1.0)) == (0.3, 0.4)
+    assert RouteStats().quantile(0.5) is None
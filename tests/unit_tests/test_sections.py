@@ -0,0 +1,106 @@
+import importlib
+import json
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from react_agent.context import Context
+from react_agent.sections import SectionIndex, chunk_markdown
+
+DOCUMENT = """Lecture notes.
+
+# 动量 Momentum
+Intro.
+
+## Time-series momentum
+Returns persist.
+
+```python
+# not a heading
+```
+
+## Cross-sectional momentum ##
+Winners minus losers.
+
+# Summary
+Done.
+
+# Summary
+Again.
+"""
+
+
+def test_chunks_by_heading_hierarchy() -> None:
+    data = DOCUMENT.encode()
+    sections = chunk_markdown(data, "08 Momentum/08 Momentum.md")
+    assert [s.headings for s in sections] == [
+        (),
+        ("动量 Momentum",),
+        ("动量 Momentum", "Time-series momentum"),
+        ("动量 Momentum", "Cross-sectional momentum"),
+        ("Summary",),
+        ("Summary",),
+    ]
+    assert [s.level for s in sections] == [0, 1, 2, 2, 1, 1]
+    time_series = data[sections[2].start : sections[2].end].decode()
+    assert time_series.startswith("## Time-series momentum") and "# not a heading" in time_series
+    parent = data[sections[1].start : sections[1].subtree_end].decode()
+    assert parent.startswith("# 动量") and parent.endswith("Winners minus losers.\n\n")
+    assert len({s.id for s in sections}) == len(sections)
+
+
+def test_ids_survive_edits_elsewhere() -> None:
+    before = chunk_markdown(DOCUMENT.encode(), "a.md")
+    after = chunk_markdown(DOCUMENT.replace("Intro.", "A much longer intro.").encode(), "a.md")
+    assert [s.id for s in before] == [s.id for s in after]
+    assert before[3].start != after[3].start
+    assert chunk_markdown(DOCUMENT.encode(), "b.md")[3].id != before[3].id
+
+
+def test_index_is_persisted_and_refreshed(tmp_path: Path) -> None:
+    (tmp_path / "notes").mkdir()
+    doc = tmp_path / "notes" / "a.md"
+    doc.write_text(DOCUMENT)
+    rel = os.path.join("notes", "a.md")
+    index = SectionIndex(str(tmp_path), tmp_path / "cache" / "sections.json")
+    assert index.update([rel]) == 6
+
+    reloaded = SectionIndex(str(tmp_path), index.path)
+    section = reloaded.find(rel, "cross-SECTIONAL   momentum")[0]
+    assert reloaded.read(section) == "## Cross-sectional momentum ##\nWinners minus losers.\n\n"
+    assert len(reloaded.find(rel, "Summary")) == 2
+    assert reloaded.find(rel, "动量 Momentum > Time-series momentum")[0].level == 2
+    assert reloaded.read(reloaded.find(rel, "动量 Momentum")[0], max_bytes=4) == "# "
+
+    doc.write_text(DOCUMENT.replace("Winners minus losers.", "Long minus short."))
+    fresh = reloaded.get(section.id)
+    assert fresh is not None and "Long minus short." in reloaded.read(fresh)
+    doc.unlink()
+    assert reloaded.get(section.id) is None
+    reloaded.update([])
+    assert json.loads(index.path.read_text())["files"] == {}
+
+
+@pytest.mark.anyio
+async def test_section_tools(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "08 Momentum").mkdir()
+    (tmp_path / "08 Momentum" / "08 Momentum.md").write_text(DOCUMENT)
+    tools = importlib.import_module("react_agent.tools")
+    runtime = SimpleNamespace(context=Context(workspace_path=str(tmp_path)))
+    monkeypatch.setattr(tools, "get_runtime", lambda schema: runtime)
+
+    listing = await tools.list_sections("08 Momentum/08 Momentum.md")
+    assert listing["count"] == 6
+    assert listing["sections"][2]["heading"] == "动量 Momentum > Time-series momentum"
+
+    by_id = await tools.read_section(listing["sections"][2]["id"])
+    assert by_id["content"].startswith("## Time-series momentum\nReturns persist.")
+    by_heading = await tools.read_section("动量 Momentum", "08 Momentum/08 Momentum.md", include_subsections=True)
+    assert "Winners minus losers." in by_heading["content"] and not by_heading["truncated"]
+    ambiguous = await tools.read_section("Summary", "08 Momentum/08 Momentum.md")
+    assert len(ambiguous["matches"]) == 2
+    assert "error" in await tools.read_section("no-such-id")
+    assert "error" in await tools.list_sections("../outside.md")
+    assert "error" in await tools.list_sections("08 Momentum/missing.md")
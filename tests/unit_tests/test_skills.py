@@ -0,0 +1,117 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from langchain.agents.middleware import ModelRequest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from react_agent.skills import SkillMiddleware, SkillRegistry
+
+
+def write_skill(directory: Path, name: str, description: str, body: str) -> None:
+    (directory / f"{name}.md").write_text(
+        f"---\nname: {name}\ndescription: {description}\n---\n{body}", encoding="utf-8"
+    )
+
+
+@pytest.fixture
+def registry(tmp_path: Path) -> SkillRegistry:
+    write_skill(tmp_path, "sales", "Sales schema.", "# Sales\norders table\n")
+    write_skill(tmp_path, "inventory", "Inventory schema.", "# Inventory\n")
+    write_skill(tmp_path, "hr", "HR schema.", "# HR\n")
+    return SkillRegistry.from_directory(tmp_path, max_loaded=2)
+
+
+def test_registry_indexes_metadata_only(registry: SkillRegistry) -> None:
+    assert sorted(registry.names()) == ["hr", "inventory", "sales"]
+    assert "- **sales**: Sales schema." in registry.prompt
+    assert registry._loaded == {}
+
+
+def test_registry_loads_bodies_with_lru(registry: SkillRegistry) -> None:
+    assert registry.load("sales") == "# Sales\norders table\n"
+    registry.load("inventory")
+    registry.load("hr")
+    assert list(registry._loaded) == ["inventory", "hr"]
+    assert registry.load("missing") is None
+
+
+def test_load_skill_tool(registry: SkillRegistry) -> None:
+    tool = SkillMiddleware(registry).tools[0]
+    assert tool.invoke({"skill_name": "hr"}) == "Loaded skill: hr\n\n# HR\n"
+    assert "Available skills" in tool.invoke({"skill_name": "nope"})
+
+
+def test_middleware_reuses_extended_system_message(registry: SkillRegistry) -> None:
+    middleware = SkillMiddleware(registry)
+    base = SystemMessage(content="You are a SQL assistant.")
+    request = ModelRequest(
+        model=GenericFakeChatModel(messages=iter([])), messages=[], system_message=base
+    )
+    seen: list[SystemMessage] = []
+
+    def handler(req: ModelRequest) -> AIMessage:
+        assert req.system_message is not None
+        seen.append(req.system_message)
+        return AIMessage(content="ok")
+
+    middleware.wrap_model_call(request, handler)  # type: ignore[arg-type]
+    middleware.wrap_model_call(request, handler)  # type: ignore[arg-type]
+    assert seen[0] is seen[1]
+    assert "## Available Skills" in seen[0].text
+    assert "You are a SQL assistant." in seen[0].text
+
+
+def test_registry_search_ranks_by_description(registry: SkillRegistry) -> None:
+    assert [s.name for s in registry.search("inventory stock levels", 1)] == ["inventory"]
+
+
+def test_middleware_discloses_top_k_skills(registry: SkillRegistry) -> None:
+    middleware = SkillMiddleware(registry, top_k=1)
+    assert [t.name for t in middleware.tools] == ["load_skill", "search_skills"]
+    request = ModelRequest(
+        model=GenericFakeChatModel(messages=iter([])),
+        messages=[HumanMessage(content="Show me the sales orders")],
+        system_message=SystemMessage(content="base"),
+    )
+    seen: list[str] = []
+
+    def handler(req: ModelRequest) -> AIMessage:
+        assert req.system_message is not None
+        seen.append(req.system_message.text)
+        return AIMessage(content="ok")
+
+    middleware.wrap_model_call(request, handler)  # type: ignore[arg-type]
+    assert "**sales**" in seen[0]
+    assert "**inventory**" not in seen[0]
+    assert "search_skills" in seen[0]
+    assert "**hr**" in middleware.tools[1].invoke({"query": "HR"})
+
+
+@pytest.mark.anyio
+async def test_async_load_shares_concurrent_reads(registry: SkillRegistry) -> None:
+    results = await asyncio.gather(*(registry.aload("sales") for _ in range(5)))
+    assert results == ["# Sales\norders table\n"] * 5
+    assert list(registry._loaded) == ["sales"]
+    assert registry._reading == {}
+    assert await registry.aload("missing") is None
+
+
+@pytest.mark.anyio
+async def test_async_middleware_and_tools(registry: SkillRegistry) -> None:
+    middleware = SkillMiddleware(registry, top_k=1)
+    request = ModelRequest(
+        model=GenericFakeChatModel(messages=iter([])),
+        messages=[HumanMessage(content="inventory")],
+        system_message=SystemMessage(content="base"),
+    )
+
+    async def handler(req: ModelRequest) -> AIMessage:
+        assert req.system_message is not None
+        return AIMessage(content=req.system_message.text)
+
+    response = await middleware.awrap_model_call(request, handler)  # type: ignore[arg-type]
+    assert "**inventory**" in str(response.content)  # type: ignore[union-attr]
+    loaded = await middleware.tools[0].ainvoke({"skill_name": "inventory"})
+    assert loaded == "Loaded skill: inventory\n\n# Inventory\n"
@@ -0,0 +1,60 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from react_agent.sql_guard import SQLQueryGuard
+
+
+@pytest.fixture
+def database(tmp_path: Path) -> Path:
+    path = tmp_path / "guard.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE artist (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("CREATE TABLE album (id INTEGER PRIMARY KEY, artist_id INTEGER, title TEXT)")
+    conn.executemany("INSERT INTO artist VALUES (?, ?)", [(i, f"a{i}") for i in range(1, 2001)])
+    conn.executemany(
+        "INSERT INTO album VALUES (?, ?, ?)", [(i, i % 2000 + 1, f"t{i}") for i in range(1, 3001)]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_rejects_cartesian_join(database: Path) -> None:
+    guard = SQLQueryGuard(database, max_estimated_rows=1_000_000)
+    result = guard.run("SELECT a.name, b.title FROM artist a, album b")
+    assert result["error"] == "query_too_expensive"
+    assert result["estimated_rows"] == 2000 * 3000
+    assert "join condition" in result["message"]
+
+
+def test_runs_indexed_join(database: Path) -> None:
+    guard = SQLQueryGuard(database, max_estimated_rows=1_000_000, max_result_rows=5)
+    result = guard.run(
+        "SELECT a.name, b.title FROM album b JOIN artist a ON a.id = b.artist_id"
+    )
+    assert result["columns"] == ["name", "title"]
+    assert len(result["rows"]) == 5
+    assert result["truncated"] is True
+
+
+def test_interrupts_slow_query(database: Path) -> None:
+    guard = SQLQueryGuard(database, timeout_seconds=0.2)
+    result = guard.run(
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) "
+        "SELECT count(*) FROM c"
+    )
+    assert result["error"] == "query_timeout"
+
+
+def test_database_is_read_only(database: Path) -> None:
+    result = SQLQueryGuard(database).run("DELETE FROM artist")
+    assert result["error"] == "query_error"
+
+
+def test_opens_paths_with_uri_characters(database: Path) -> None:
+    path = database.with_name("guard?v=1#%.db")
+    database.rename(path)
+    result = SQLQueryGuard(path).run("SELECT count(*) FROM artist")
+    assert result["rows"] == [[2000]]
@@ -0,0 +1,65 @@
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, RemoveMessage
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import StateGraph, add_messages
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+from react_agent.state import State, TrimMessages, merge_messages
+
+
+def thread(n: int) -> list[AnyMessage]:
+    return [HumanMessage(content=str(i), id=f"m{i}") for i in range(n)]
+
+
+def ids(messages: Any) -> list[str]:
+    return [m.id for m in messages]
+
+
+def test_ordinary_updates_match_add_messages() -> None:
+    left = thread(4)
+    updates: list[Any] = [
+        AIMessage(content="new", id="a"),
+        HumanMessage(content="replaced", id="m1"),
+        RemoveMessage(id="m2"),
+        ("user", "no id"),
+    ]
+    expected = add_messages(left, updates)
+    merged = merge_messages(left, updates)
+    assert ids(merged)[:4] == ids(expected)[:4] == ["m0", "m1", "m3", "a"]
+    assert merged[1].content == "replaced"
+    assert merged[4].id is not None
+    assert ids(merge_messages(merged, [RemoveMessage(id=REMOVE_ALL_MESSAGES), *left[:1]])) == ["m0"]
+    with pytest.raises(ValueError):
+        merge_messages(left, [RemoveMessage(id="missing")])
+
+
+def test_trims_reuse_the_id_map_across_merges() -> None:
+    merged = merge_messages(thread(10), [TrimMessages.keep_last(6)])
+    assert ids(merged) == [f"m{i}" for i in range(4, 10)]
+    # The map is carried over: replacing after a prefix trim hits the right slot.
+    merged = merge_messages(merged, [HumanMessage(content="x", id="m5"), AIMessage(content="y", id="a")])
+    assert ids(merged) == ["m4", "m5", "m6", "m7", "m8", "m9", "a"]
+    assert merged[1].content == "x"
+    merged = merge_messages(merged, [TrimMessages.drop_range(1, 3)])
+    assert ids(merged) == ["m4", "m7", "m8", "m9", "a"]
+    merged = merge_messages(merged, [TrimMessages.drop_before("m9"), RemoveMessage(id="a")])
+    assert ids(merged) == ["m9"]
+    with pytest.raises(ValueError):
+        merge_messages(merged, [TrimMessages.drop_before("m4")])
+
+
+@pytest.mark.anyio
+async def test_graph_state_trims_through_a_checkpointer() -> None:
+    def respond(state: State) -> dict[str, Any]:
+        return {"messages": [AIMessage(content="ok"), TrimMessages.keep_last(2)]}
+
+    builder = StateGraph(State)
+    builder.add_node(respond)
+    builder.add_edge("__start__", "respond")
+    graph = builder.compile(checkpointer=InMemorySaver())
+    config: Any = {"configurable": {"thread_id": "1"}}
+    for text in ["a", "b", "c"]:
+        result = await graph.ainvoke({"messages": [("user", text)]}, config)
+    assert [m.content for m in result["messages"]] == ["c", "ok"]
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import pytest
+from langgraph.store.base import GetOp, IndexConfig
+
+from react_agent.store import SQLiteStore
+from react_agent.vectors import HashingEmbeddings
+
+
+def test_put_get_delete(tmp_path: Path) -> None:
+    store = SQLiteStore(tmp_path / "store.db")
+    assert store.get(("users",), "user_123") is None
+    store.put(("users",), "user_123", {"name": "John Smith", "language": "English"})
+    item = store.get(("users",), "user_123")
+    assert item is not None
+    assert item.value == {"name": "John Smith", "language": "English"}
+    assert item.namespace == ("users",)
+    store.delete(("users",), "user_123")
+    assert store.get(("users",), "user_123") is None
+
+
+def test_persists_across_instances(tmp_path: Path) -> None:
+    SQLiteStore(tmp_path / "store.db").put(("users",), "u1", {"name": "Bob"})
+    item = SQLiteStore(tmp_path / "store.db").get(("users",), "u1")
+    assert item is not None and item.value == {"name": "Bob"}
+
+
+def test_update_keeps_created_at() -> None:
+    store = SQLiteStore()
+    store.put(("users",), "u1", {"age": 1})
+    first = store.get(("users",), "u1")
+    store.put(("users",), "u1", {"age": 2})
+    second = store.get(("users",), "u1")
+    assert first is not None and second is not None
+    assert second.value == {"age": 2}
+    assert second.created_at == first.created_at
+
+
+def test_search_by_namespace_prefix_and_filter() -> None:
+    store = SQLiteStore()
+    store.put(("users", "eu"), "a", {"age": 30})
+    store.put(("users", "us"), "b", {"age": 40})
+    store.put(("usersx",), "c", {"age": 50})
+    assert [i.key for i in store.search(("users",))] == ["a", "b"]
+    assert [i.key for i in store.search(("users",), filter={"age": {"$gt": 35}})] == ["b"]
+    assert [i.key for i in store.search((), limit=1, offset=2)] == ["c"]
+
+
+def test_list_namespaces() -> None:
+    store = SQLiteStore()
+    for ns in [("a", "x"), ("a", "y"), ("b",)]:
+        for key in ("k1", "k2"):
+            store.put(ns, key, {})
+    assert store.list_namespaces() == [("a", "x"), ("a", "y"), ("b",)]
+    assert store.list_namespaces(prefix=("a",)) == [("a", "x"), ("a", "y")]
+    assert store.list_namespaces(max_depth=1) == [("a",), ("b",)]
+
+
+@pytest.mark.anyio
+async def test_abatch_gets_and_puts() -> None:
+    store = SQLiteStore()
+    await store.aput(("users",), "u1", {"name": "Ann"})
+    items = await store.abatch(
+        [GetOp(namespace=("users",), key="u1"), GetOp(namespace=("users",), key="u2")]
+    )
+    assert [getattr(i, "key", None) for i in items] == ["u1", None]
+
+
+def test_semantic_search_with_filter_and_reload(tmp_path: Path) -> None:
+    index: IndexConfig = {"dims": 256, "embed": HashingEmbeddings(256), "fields": ["text"]}
+    store = SQLiteStore(tmp_path / "store.db", index=index)
+    store.put(("memories", "u1"), "m1", {"text": "likes spicy sichuan food", "kind": "food"})
+    store.put(("memories", "u1"), "m2", {"text": "works as a data engineer", "kind": "job"})
+    store.put(("memories", "u2"), "m3", {"text": "likes sichuan food too", "kind": "food"})
+
+    results = store.search(("memories", "u1"), query="what food does the user like", limit=2)
+    assert results[0].key == "m1"
+    assert results[0].score is not None and results[0].score > 0
+    assert {r.key for r in results} == {"m1", "m2"}
+    assert [r.key for r in store.search(("memories",), query="food", filter={"kind": "job"})] == ["m2"]
+
+    store.delete(("memories", "u1"), "m1")
+    reopened = SQLiteStore(tmp_path / "store.db", index=index)
+    assert [r.key for r in reopened.search(("memories",), query="sichuan food", limit=1)] == ["m3"]
+
+
+def test_filtered_semantic_search_fetches_candidates_in_batches(monkeypatch: pytest.MonkeyPatch) -> None:
+    index: IndexConfig = {"dims": 64, "embed": HashingEmbeddings(64), "fields": ["text"]}
+    store = SQLiteStore(index=index, cache_size=0)
+    for i in range(40):
+        store.put(("docs",), f"d{i}", {"text": f"note {i} about factor returns", "kind": "even" if i % 2 == 0 else "odd"})
+    fetches: list[int] = []
+    fetch = store._fetch
+    monkeypatch.setattr(store, "_fetch", lambda keys: fetches.append(len(keys)) or fetch(keys))
+
+    results = store.search(("docs",), query="factor returns", filter={"kind": "odd"}, limit=3, offset=1)
+    assert len(results) == 3 and all(r.value["kind"] == "odd" for r in results)
+    assert fetches == [16]
+    fetches.clear()
+    assert len(store.search((), query="factor returns", limit=5)) == 5
+    assert fetches == [5]
@@ -0,0 +1,105 @@
+import asyncio
+from typing import Any
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage, RemoveMessage
+
+from react_agent.summarization import RollingSummaryMiddleware
+
+
+def make_messages(n: int) -> list[AnyMessage]:
+    messages: list[AnyMessage] = []
+    for i in range(n):
+        cls = HumanMessage if i % 2 == 0 else AIMessage
+        messages.append(cls(content=f"message {i} " + "word " * 20, id=f"m{i}"))
+    return messages
+
+
+class RecordingModel(GenericFakeChatModel):
+    prompts: list[str] = []
+
+    def _generate(self, messages: Any, *args: Any, **kwargs: Any) -> Any:
+        self.prompts.append(messages[-1].text)
+        return super()._generate(messages, *args, **kwargs)
+
+
+def make_model() -> RecordingModel:
+    return RecordingModel(messages=iter([AIMessage(content="summary 1"), AIMessage(content="summary 2")]))
+
+
+def test_sync_fold_only_sends_new_messages() -> None:
+    model = make_model()
+    middleware = RollingSummaryMiddleware(model, trigger_tokens=100, keep_messages=2)
+    messages = make_messages(6)
+    update = middleware.before_model({"messages": messages}, None)  # type: ignore[arg-type]
+    assert update is not None
+    assert update["running_summary"] == "summary 1"
+    assert [m.id for m in update["messages"] if isinstance(m, RemoveMessage)] == ["m0", "m1", "m2", "m3"]
+
+    remaining = messages[4:] + make_messages(10)[6:]
+    update = middleware.before_model(
+        {"messages": remaining, "running_summary": "summary 1"}, None  # type: ignore[arg-type]
+    )
+    assert update is not None
+    assert "summary 1" in model.prompts[1]
+    assert "message 0 " not in model.prompts[1]
+    assert "message 4 " in model.prompts[1]
+
+
+def test_below_trigger_is_a_no_op() -> None:
+    middleware = RollingSummaryMiddleware(make_model(), trigger_tokens=10_000)
+    assert middleware.before_model({"messages": make_messages(30)}, None) is None  # type: ignore[arg-type]
+
+
+@pytest.mark.anyio
+async def test_background_fold_is_applied_on_next_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    middleware = RollingSummaryMiddleware(
+        make_model(), trigger_tokens=100, keep_messages=2, max_tokens=100_000
+    )
+    monkeypatch.setattr(middleware, "_thread_id", lambda: "t1")
+    messages = make_messages(6)
+    state: Any = {"messages": messages}
+    assert await middleware.aafter_agent(state, None) is None  # type: ignore[arg-type]
+    task = middleware._pending["t1"]
+    await task
+    update = await middleware.abefore_model(state, None)  # type: ignore[arg-type]
+    assert update is not None
+    assert update["running_summary"] == "summary 1"
+    assert middleware._pending == {}
+
+
+@pytest.mark.anyio
+async def test_runs_without_thread_id_fold_inline() -> None:
+    model = make_model()
+    middleware = RollingSummaryMiddleware(model, trigger_tokens=100, keep_messages=2, max_tokens=100_000)
+    first: Any = {"messages": make_messages(6)}
+    await middleware.aafter_agent(first, None)  # type: ignore[arg-type]
+    assert middleware._pending == {}
+
+    second: Any = {"messages": [HumanMessage(content="other run " + "word " * 80, id=f"o{i}") for i in range(4)]}
+    update = await middleware.abefore_model(second, None)  # type: ignore[arg-type]
+    assert update is not None
+    assert [m.id for m in update["messages"]] == ["o0", "o1"]
+    assert "message 0 " not in model.prompts[0]
+
+
+class FailingModel(GenericFakeChatModel):
+    async def _agenerate(self, *args: Any, **kwargs: Any) -> Any:
+        raise ValueError("provider down")
+
+
+@pytest.mark.anyio
+async def test_failed_background_fold_is_retried_inline(monkeypatch: pytest.MonkeyPatch) -> None:
+    middleware = RollingSummaryMiddleware(
+        FailingModel(messages=iter([])), trigger_tokens=100, keep_messages=2, max_tokens=100_000
+    )
+    monkeypatch.setattr(middleware, "_thread_id", lambda: "t1")
+    state: Any = {"messages": make_messages(6)}
+    await middleware.aafter_agent(state, None)  # type: ignore[arg-type]
+    await asyncio.gather(middleware._pending["t1"], return_exceptions=True)
+
+    middleware.model = make_model()
+    update = await middleware.abefore_model(state, None)  # type: ignore[arg-type]
+    assert update is not None and update["running_summary"] == "summary 1"
+    assert middleware._pending == {}
@@ -0,0 +1,72 @@
+import sys
+import threading
+from collections.abc import Sequence
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+
+from react_agent.tokens import MESSAGE_OVERHEAD, TokenCounter, approximate_text_tokens
+
+
+def test_approximation_counts_cjk_per_character() -> None:
+    assert approximate_text_tokens("") == 0
+    assert approximate_text_tokens("abcdefgh") == 2
+    assert approximate_text_tokens("金融实证") == 4
+    counter = TokenCounter(encoding=None)
+    assert not counter.exact
+    call = AIMessage(content="", tool_calls=[{"name": "search", "args": {"q": "x"}, "id": "c1"}])
+    assert counter.count_message(call) > MESSAGE_OVERHEAD
+
+
+def test_counts_are_cached_per_message_id() -> None:
+    calls: list[str] = []
+
+    def count(messages: Sequence[AnyMessage]) -> int:
+        calls.append(messages[0].text)
+        return 10
+
+    counter = TokenCounter(message_counter=count, max_cached=2)
+    history: list[AnyMessage] = [HumanMessage(content="a", id="1"), AIMessage(content="b", id="2")]
+    assert counter(history) == 20
+    assert counter([*history, HumanMessage(content="c", id="3")]) == 30
+    assert calls == ["a", "b", "c"]
+    # "1" was the least recently used entry and has been evicted.
+    counter.forget(["3"])
+    assert counter(history) == 20
+    assert calls == ["a", "b", "c", "a"]
+    assert counter([HumanMessage(content="d")]) == 10
+
+
+def test_edited_messages_are_recounted() -> None:
+    counter = TokenCounter(encoding=None)
+    short = counter.count_message(HumanMessage(content="abcd", id="1"))
+    assert counter.count_message(HumanMessage(content="abcd" * 10, id="1")) > short
+
+
+@pytest.mark.anyio
+async def test_encoding_loads_off_the_event_loop(monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+
+    def get_encoding(name: str) -> SimpleNamespace:
+        release.wait(5)
+        return SimpleNamespace(encode=list)
+
+    monkeypatch.setitem(sys.modules, "tiktoken", SimpleNamespace(get_encoding=get_encoding))
+    counter = TokenCounter()
+    message = HumanMessage(content="abcdefgh", id="1")
+    assert counter.count_message(message) == MESSAGE_OVERHEAD + 2
+    assert not counter._counts
+    release.set()
+    assert await counter.aload()
+    assert counter.count_message(message) == MESSAGE_OVERHEAD + 8
+
+
+def test_edited_tool_call_args_are_recounted() -> None:
+    counter = TokenCounter(encoding=None)
+
+    def call(query: str) -> AIMessage:
+        return AIMessage(content="", id="1", tool_calls=[{"name": "search", "args": {"q": query}, "id": "c1"}])
+
+    short = counter.count_message(call("x"))
+    assert counter.count_message(call("momentum factor returns " * 10)) > short
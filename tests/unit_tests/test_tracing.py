@@ -0,0 +1,94 @@
+import importlib
+import json
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGenerationChunk
+
+from react_agent.context import Context
+from react_agent.tracing import Histogram, get_tracer
+
+graph_module = importlib.import_module("react_agent.graph")
+
+
+class ToolCallingFakeModel(GenericFakeChatModel):
+    def bind_tools(self, tools: Any, **kwargs: Any) -> Any:
+        return self
+
+    def _stream(self, messages: list[BaseMessage], stop: Any = None, run_manager: Any = None, **kwargs: Any) -> Any:
+        message = next(self.messages)
+        chunk = ChatGenerationChunk(
+            message=AIMessageChunk(
+                content=message.content,
+                tool_call_chunks=[
+                    {"name": c["name"], "args": json.dumps(c["args"]), "id": c["id"], "index": i}
+                    for i, c in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+            )
+        )
+        if run_manager:
+            run_manager.on_llm_new_token(message.text, chunk=chunk)
+        yield chunk
+
+
+def replies() -> Iterator[AIMessage]:
+    usage = {"input_tokens": 120, "output_tokens": 8, "total_tokens": 128}
+    yield AIMessage("workspace report", usage_metadata=usage)
+    yield AIMessage(
+        "", tool_calls=[{"name": "find_directory", "args": {"keyword": "docs"}, "id": "1"}], usage_metadata=usage
+    )
+    yield AIMessage("done", usage_metadata=usage)
+
+
+@pytest.mark.anyio
+async def test_graph_records_nested_spans(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    model = ToolCallingFakeModel(messages=replies())
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda name: model)
+    (tmp_path / "notes.md").write_text("# Notes\n")
+    trace_file = tmp_path / "trace.jsonl"
+    context = Context(workspace_path=str(tmp_path), trace=True, trace_file=str(trace_file))
+
+    async for _ in graph_module.graph.astream(
+        {"messages": [("user", "hi")]}, context=context, stream_mode="messages"
+    ):
+        pass
+    tracer = get_tracer(trace_file)
+    tracer.flush()
+
+    spans = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    names = sorted(f"{s['kind']}:{s['name']}" for s in spans)
+    assert names.count("node:call_model") == 2
+    assert names.count("tool:find_directory") == 1
+    for stage in ["scan", "read_documents", "analyze"]:
+        assert f"stage:workspace_index.{stage}" in names
+    by_id = {s["span_id"]: s for s in spans}
+    models = [s for s in spans if s["kind"] == "model"]
+    assert len(models) == 3
+    assert by_id[models[0]["parent_id"]]["name"] == "workspace_index.analyze"
+    assert {by_id[m["parent_id"]]["name"] for m in models[1:]} == {"call_model"}
+    assert all(m["attributes"]["prompt_tokens"] == 120 for m in models)
+    assert all(m["attributes"]["ttft_ms"] <= m["duration_ms"] for m in models)
+    assert tracer.histograms()["node:call_model"]["count"] == 2
+
+
+@pytest.mark.anyio
+async def test_tracing_is_off_by_default(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda name: ToolCallingFakeModel(messages=replies()))
+    monkeypatch.chdir(tmp_path)
+    await graph_module.graph.ainvoke({"messages": [("user", "hi")]}, context=Context(workspace_path=str(tmp_path)))
+    assert not (tmp_path / "traces").exists()
+
+
+def test_histogram_quantiles_are_within_a_bucket() -> None:
+    histogram = Histogram()
+    for ms in range(1, 1001):
+        histogram.observe(float(ms))
+    summary = histogram.summary()
+    assert summary["count"] == 1000
+    assert 500 <= summary["p50_ms"] <= 500 * 1.125
+    assert 990 <= summary["p99_ms"] <= 1000
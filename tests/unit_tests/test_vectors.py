@@ -0,0 +1,38 @@
+import numpy as np
+
+from react_agent.vectors import HashingEmbeddings, VectorIndex
+
+
+def test_hashing_embeddings_are_stable_and_normalized() -> None:
+    embeddings = HashingEmbeddings(dims=64)
+    a, b = embeddings.embed_documents(["金融实证方法 alpha", "金融实证方法 alpha"])
+    assert a == b
+    assert abs(float(np.linalg.norm(a)) - 1.0) < 1e-5
+    assert embeddings.embed_query("") == [0.0] * 64
+
+
+def test_index_search_replace_and_remove() -> None:
+    index = VectorIndex(dims=2)
+    index.add("x", [1.0, 0.0])
+    index.add("y", [0.0, 1.0])
+    index.add("z", [1.0, 1.0])
+    assert [i for i, _ in index.search([1.0, 0.1], 2)] == ["x", "z"]
+    index.add("x", [0.0, -1.0])
+    assert [i for i, _ in index.search([1.0, 0.1], 1)] == ["z"]
+    index.remove("z")
+    assert len(index) == 2
+    assert [i for i, _ in index.search([1.0, 0.1], 3, lambda i: i != "y")] == ["x"]
+
+
+def test_ivf_search_matches_brute_force_on_clusters() -> None:
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, 16))
+    vectors = np.repeat(centers, 50, axis=0) + rng.normal(scale=0.05, size=(400, 16))
+    brute = VectorIndex(dims=16)
+    ivf = VectorIndex(dims=16, ivf_lists=8, n_probe=2, train_threshold=200)
+    ids = list(range(400))
+    brute.add_many(ids, vectors)
+    ivf.add_many(ids, vectors)
+    assert ivf._centroids is not None
+    query = centers[3]
+    assert [i for i, _ in ivf.search(query, 10)] == [i for i, _ in brute.search(query, 10)]
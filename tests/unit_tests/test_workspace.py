@@ -0,0 +1,203 @@
+import asyncio
+import importlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from react_agent.context import Context
+from react_agent.ignore import DEFAULT_IGNORE, IgnoreRules
+from react_agent.workspace import (
+    SingleFlight,
+    WorkspaceModel,
+    WorkspaceWatcher,
+    stop_watching,
+    watched_workspace,
+    workspace_fingerprint,
+)
+
+
+def test_fingerprint_tracks_indexed_files_only(tmp_path: Path) -> None:
+    (tmp_path / "lecture").mkdir()
+    notes = tmp_path / "lecture" / "notes.md"
+    notes.write_text("# Alpha\n")
+    (tmp_path / "lecture" / "figure.jpg").write_bytes(b"\xff")
+    (tmp_path / ".git").mkdir()
+    before = workspace_fingerprint(str(tmp_path))
+
+    (tmp_path / "lecture" / "figure.jpg").write_bytes(b"\xff\xd8")
+    (tmp_path / ".git" / "HEAD").write_text("ref")
+    assert workspace_fingerprint(str(tmp_path)) == before
+
+    notes.write_text("# Alpha\n\nMore.\n")
+    after_edit = workspace_fingerprint(str(tmp_path))
+    assert after_edit != before
+    (tmp_path / "lecture" / "images").mkdir()
+    assert workspace_fingerprint(str(tmp_path)) == after_edit
+    (tmp_path / "lecture" / "appendix").mkdir()
+    assert workspace_fingerprint(str(tmp_path)) != after_edit
+    after_edit = workspace_fingerprint(str(tmp_path))
+    assert workspace_fingerprint(str(tmp_path / "missing")) != workspace_fingerprint(str(tmp_path / "other"))
+
+    stat = notes.stat()
+    os.utime(notes, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert workspace_fingerprint(str(tmp_path)) not in (before, after_edit)
+
+
+@pytest.mark.anyio
+async def test_concurrent_calls_share_one_job() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    calls = 0
+
+    async def job() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return f"result {calls}"
+
+    results = await asyncio.gather(*(flight.run("ws", job, keep=lambda r: False) for _ in range(10)))
+    assert results == ["result 1"] * 10
+    assert await flight.run("ws", job) == "result 2"
+    assert await flight.run("ws", job) == "result 2"
+    assert await flight.run("ws", job, reuse=False) == "result 3"
+    assert calls == 3
+
+
+@pytest.mark.anyio
+async def test_cancelled_caller_does_not_cancel_the_job() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+    started = asyncio.Event()
+
+    async def job() -> str:
+        started.set()
+        await asyncio.sleep(0.02)
+        return "done"
+
+    first = asyncio.ensure_future(flight.run("ws", job))
+    await started.wait()
+    second = asyncio.ensure_future(flight.run("ws", job))
+    first.cancel()
+    assert await second == "done"
+
+
+@pytest.mark.anyio
+async def test_failures_are_shared_but_not_kept() -> None:
+    flight: SingleFlight[str] = SingleFlight()
+
+    async def job() -> str:
+        await asyncio.sleep(0)
+        raise RuntimeError("down")
+
+    results = await asyncio.gather(flight.run("ws", job), flight.run("ws", job), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    async def ok() -> str:
+        return "up"
+
+    assert await flight.run("ws", ok) == "up"
+
+
+def make_workspace(root: Path) -> None:
+    for lecture in ["01 Alpha", "02 Momentum"]:
+        (root / lecture / "images").mkdir(parents=True)
+        (root / lecture / f"{lecture}.md").write_text(f"# {lecture}\n")
+        (root / lecture / "images" / "a1b2.jpg").write_bytes(b"\xff")
+    (root / "a" / "b" / "c" / "d" / "e" / "f").mkdir(parents=True)
+    (root / "a" / "b" / "c" / "d" / "deep.md").write_text("deep")
+    (root / ".git").mkdir()
+    (root / "README.md").write_text("readme")
+
+
+@pytest.mark.anyio
+async def test_model_tree_matches_directory_scan(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    graph_module = importlib.import_module("react_agent.graph")
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda name: None)
+    make_workspace(tmp_path)
+    guard = graph_module.call_guard(Context())
+    scanned, _ = await graph_module._index_workspace(str(tmp_path), "m", guard)
+    modeled, _ = await graph_module._index_workspace(str(tmp_path), "m", guard, WorkspaceModel(str(tmp_path)))
+    assert json.loads(modeled) == json.loads(scanned)
+    assert json.loads(scanned)["document_count"] == 4
+
+
+def test_refresh_tracks_changes(tmp_path: Path) -> None:
+    make_workspace(tmp_path)
+    model = WorkspaceModel(str(tmp_path))
+    assert model.find_directories("alpha") == ["01 Alpha"]
+    assert model.markdown_files("01 Alpha") == [os.path.join("01 Alpha", "01 Alpha.md")]
+    assert not model.refresh()
+
+    (tmp_path / "01 Alpha" / "images" / "c3d4.jpg").write_bytes(b"\xff")
+    assert not model.refresh()
+    generation = model.generation
+    (tmp_path / "03 Value" / "notes").mkdir(parents=True)
+    (tmp_path / "03 Value" / "notes" / "value.md").write_text("# Value\n")
+    (tmp_path / "README.md").write_text("readme, longer")
+    assert model.refresh()
+    assert model.generation == generation + 1
+    assert model.find_directories("value") == ["03 Value"]
+    assert os.path.join("03 Value", "notes", "value.md") in model.markdown_files()
+    assert model.tree()[0]["children"][-1]["size"] == len("readme, longer")
+
+    shutil.rmtree(tmp_path / "02 Momentum")
+    assert model.refresh()
+    assert model.find_directories("momentum") == []
+    assert not model.is_directory("02 Momentum/images")
+    assert model.markdown_files() == WorkspaceModel(str(tmp_path)).markdown_files()
+
+
+def test_watcher_polls_in_the_background(tmp_path: Path) -> None:
+    watcher = WorkspaceWatcher(str(tmp_path), interval=0.02, use_watchfiles=False)
+    watcher.start()
+    try:
+        (tmp_path / "new.md").write_text("new")
+        deadline = time.monotonic() + 5
+        while watcher.model.markdown_files() != ["new.md"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert watcher.model.markdown_files() == ["new.md"]
+    finally:
+        watcher.stop()
+    assert not watcher.running
+
+
+@pytest.mark.anyio
+async def test_tools_read_the_watched_model(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    make_workspace(tmp_path)
+    tools = importlib.import_module("react_agent.tools")
+    runtime = SimpleNamespace(context=Context(workspace_path=str(tmp_path), watch_workspace=True))
+    monkeypatch.setattr(tools, "get_runtime", lambda schema: runtime)
+    try:
+        assert (await tools.find_directory("momentum"))["matching_directories"] == ["02 Momentum"]
+        monkeypatch.setattr(tools.os, "walk", None)
+        model = watched_workspace(str(tmp_path))
+        assert model is not None
+        (tmp_path / "02 Momentum" / "extra.md").write_text("extra")
+        model.refresh()
+        listing = await tools.list_directory_files("02 Momentum")
+        assert listing["file_count"] == 2
+        assert (await tools.find_directory("images"))["count"] == 0
+        assert "error" in await tools.list_directory_files("missing")
+    finally:
+        stop_watching()
+
+
+def test_new_rules_replace_the_watcher_of_a_root(tmp_path: Path) -> None:
+    workspace = importlib.import_module("react_agent.workspace")
+    try:
+        first = workspace.watch_workspace(str(tmp_path))
+        old = workspace._watchers[str(tmp_path)]
+        assert workspace.watch_workspace(str(tmp_path)) is first
+        rules = IgnoreRules([*DEFAULT_IGNORE, "drafts/"])
+        second = workspace.watch_workspace(str(tmp_path), rules=rules)
+        assert second is not first and second.rules == rules
+        assert list(workspace._watchers) == [str(tmp_path)]
+        assert old._stop.is_set()
+        assert watched_workspace(str(tmp_path)) is None
+        assert watched_workspace(str(tmp_path), rules) is second
+    finally:
+        stop_watching()
+    assert workspace._watchers == {}